@@ -1,4 +1,6 @@
 from .src.Manager import Manager
 from .src.Device import Device
+from .src.DeviceRegistry import DeviceRegistry, get_registry
+from .src.RemoteManager import RemoteManager
 from .src.components.DwfException import DwfException
 from .src.constants.dwf_types import *
@@ -0,0 +1,60 @@
+# Measure BlockPipeline throughput against the number of worker processes with a synthetic spectrum workload.
+# No device is needed.
+#
+# Usage: python digilent_waveforms/benchmarks/BlockPipeline.py [samples per block] [blocks]
+import sys
+import os
+import time
+
+import numpy as np
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms.src.components.BlockPipeline import BlockPipeline
+from digilent_waveforms.src.constants.ai_types import AiBlock
+
+# Benchmark configuration
+num_channels = 2
+samples_per_block = int(sys.argv[1]) if len(sys.argv) > 1 else 65536
+num_blocks = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+sample_rate = 1000000
+
+
+def block_spectrum(data: np.ndarray, first_sample_index: int, sample_rate: float) -> np.ndarray:
+    # Per block DSP: windowed magnitude spectrum of every channel
+    window = np.hanning(data.shape[1])
+    return np.abs(np.fft.rfft(data * window, axis=1)).max(axis=1)
+
+
+if __name__ == "__main__":
+    data = np.random.default_rng(0).standard_normal((num_channels, samples_per_block)).tolist()
+    print(f"{num_blocks} blocks of {num_channels} x {samples_per_block} samples, {os.cpu_count()} CPUs")
+
+    start_time = time.perf_counter()
+    for block_index in range(0, num_blocks):
+        block_spectrum(np.asarray(data), block_index * samples_per_block, sample_rate)
+    inline_time = time.perf_counter() - start_time
+    print(f"{'Inline':>12}: {num_blocks / inline_time:8.1f} blocks/s")
+
+    for max_workers in sorted({1, 2, max(1, (os.cpu_count() or 1) // 2), os.cpu_count() or 1}):
+        pipeline = BlockPipeline(block_spectrum, max_workers=max_workers)
+
+        # Start the workers before timing
+        pipeline.submit(AiBlock(data, list(range(0, num_channels)), 0, 0, 0, sample_rate, 0))
+        pipeline.flush()
+
+        submit_time = 0.0
+        start_time = time.perf_counter()
+        for block_index in range(0, num_blocks):
+            block = AiBlock(data, list(range(0, num_channels)), block_index * samples_per_block, 0, 0, sample_rate, 0)
+            submit_start = time.perf_counter()
+            pipeline.submit(block)
+            submit_time += time.perf_counter() - submit_start
+        results = pipeline.flush()
+        elapsed = time.perf_counter() - start_time
+        pipeline.close()
+
+        in_order = [result.sequence for result in results] == list(range(1, num_blocks + 1))
+        print(
+            f"{max_workers:>4} workers: {num_blocks / elapsed:8.1f} blocks/s, "
+            f"{submit_time / num_blocks * 1000:.2f} ms per submit (reader thread), in order: {in_order}"
+        )
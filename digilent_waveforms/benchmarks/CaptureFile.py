@@ -0,0 +1,65 @@
+# Capture file size and read time: a synthetic 14 bit ADC signal (two sines plus noise, 2 channels) is written with
+# each encoding, then one second ranges at random positions are read back.  "FLOAT64 calibrated" applies a
+# non power of two gain and an offset to the codes like device calibration does, so every mantissa bit is used.
+#
+# Usage: python digilent_waveforms/benchmarks/CaptureFile.py [sample rate] [seconds] [reads]
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms.src.components.CaptureFile import CaptureReader, CaptureWriter
+from digilent_waveforms.src.constants.ai_types import CaptureEncoding
+
+sample_rate = float(sys.argv[1]) if len(sys.argv) > 1 else 1e6
+duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+num_reads = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+LSB = 10 / 2**14  # 14 bit codes over a 10 V range
+BLOCK_SAMPLES = 100000
+
+
+def get_codes(num_samples: int) -> np.ndarray:
+    times = np.arange(0, num_samples) / sample_rate
+    signal = np.stack([np.sin(2 * np.pi * 1000 * times), 0.5 * np.sin(2 * np.pi * 1234 * times + 1)])
+    signal += np.random.default_rng(0).normal(0, 0.002, signal.shape)
+    return np.rint(signal / LSB)
+
+
+def measure(name: str, samples: np.ndarray, path: str, **writer_options) -> None:
+    start = time.perf_counter()
+    writer = CaptureWriter(path, [0, 1], sample_rate, **writer_options)
+    for offset in range(0, samples.shape[1], BLOCK_SAMPLES):
+        writer.write(samples[:, offset : offset + BLOCK_SAMPLES], offset)
+    writer.close()
+    write_time = time.perf_counter() - start
+
+    reader = CaptureReader(path)
+    read_samples = int(sample_rate)
+    starts = np.random.default_rng(1).integers(0, max(1, samples.shape[1] - read_samples), num_reads)
+    read_times = []
+    for start_index in starts:
+        reader._cached_chunk = -1  # Every read starts cold
+        start = time.perf_counter()
+        reader.read(int(start_index), read_samples)
+        read_times.append(time.perf_counter() - start)
+    reader.close()
+
+    print(
+        f"{name:<20} {os.path.getsize(path) / samples.nbytes * 100:>5.1f} % of float64 "
+        + f"write {write_time / duration * 1000:>6.1f} ms/s   read 1 s: "
+        + f"min {min(read_times) * 1000:>6.1f} ms, median {np.median(read_times) * 1000:>6.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    codes = get_codes(int(sample_rate * duration))
+    print(f"2 channels, {sample_rate:g} S/s, {duration:g} s, {num_reads} reads")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "capture.cap")
+        measure("FLOAT64", codes * LSB, path)
+        measure("FLOAT64 calibrated", codes * LSB * 1.0012345 + 0.00123, path)
+        measure("INT16", codes * LSB, path, encoding=CaptureEncoding.INT16, scale=LSB)
@@ -0,0 +1,139 @@
+# Per call overhead of the FDwf calls made at every analog input poll, untyped (a library attribute lookup and new
+# ctypes arguments at every call) versus prototyped through DwfLibrary with prebuilt arguments.  Uses the first
+# WaveForms device when one is connected, otherwise a libm function with a similar signature shows the ctypes
+# overhead alone, bound both ways DwfLibrary binds functions: with the errcheck return code check, and without it
+# and the return value tested inline as the HOT_PATH status functions are.  The AnalogIn.get_state() and
+# get_record_status() poll is also timed against SimulatedDwf, which needs no device and shows the Python side of
+# a poll.  Each figure is the best of several interleaved repeats.  On libm the errcheck callback makes a call about
+# 15 % slower than untyped, while the inline check is a few percent faster.  On SimulatedDwf the emulation itself
+# dominates and both poll paths take about the same time.
+#
+# Usage: python digilent_waveforms/benchmarks/DwfLibrary.py [iterations] [repeats]
+import ctypes.util
+import sys
+import os
+import time
+from ctypes import CDLL, POINTER, byref, c_byte, c_double, c_int
+from typing import Any, Callable
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms import DwfException, Manager
+from digilent_waveforms.src.backends.SimulatedDwf import SimulatedDwf
+from digilent_waveforms.src.components.DwfLibrary import DwfLibrary, bind
+
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+
+def time_call(call, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    return (time.perf_counter() - start) / iterations
+
+
+def compare(calls: dict[str, Callable[[], None]]) -> None:
+    # Repeats alternate between the calls, so all see the same machine load.  Reductions are relative to the first.
+    for call in calls.values():
+        call()  # Warm up
+    best = {name: float("inf") for name in calls}
+    for _ in range(repeats):
+        for name, call in calls.items():
+            best[name] = min(best[name], time_call(call, iterations))
+    baseline = next(iter(best.values()))
+    for name, duration in best.items():
+        print(f"{name:<44} {duration * 1e6:>8.3f} us {(1 - duration / baseline) * 100:>7.1f} %")
+
+
+def get_untyped_poll(library: Any, handle: int) -> Callable[[], None]:
+    def untyped_poll() -> None:
+        # Call pattern before the prototyped bindings
+        state = c_byte()
+        library.FDwfAnalogInStatus(c_int(handle), c_int(1), byref(state))
+        available = c_int()
+        lost = c_int()
+        corrupted = c_int()
+        library.FDwfAnalogInStatusRecord(c_int(handle), byref(available), byref(lost), byref(corrupted))
+
+    return untyped_poll
+
+
+def benchmark_poll(manager: Manager, untyped_library: Any) -> None:
+    device = manager.open_first_device()
+    print(f"Device: {device.name} ({device.serial_number}), one poll = FDwfAnalogInStatus + FDwfAnalogInStatusRecord")
+    analog_in = device.AnalogInput
+    try:
+        analog_in.record([0], 100000)
+
+        def prototyped_poll() -> None:
+            analog_in.get_state()
+            analog_in.get_record_status()
+
+        compare(
+            {
+                "Untyped": get_untyped_poll(untyped_library, device.device_handle.value),
+                "AnalogIn.get_state() + get_record_status()": prototyped_poll,
+            }
+        )
+    finally:
+        analog_in.stop()
+        manager.close_device(device)
+
+
+def benchmark_device(manager: Manager) -> None:
+    library: CDLL = manager.dwf.library if isinstance(manager.dwf, DwfLibrary) else manager.dwf
+    benchmark_poll(manager, CDLL(library._name))  # Separate function objects, without prototypes
+
+
+def benchmark_simulated() -> None:
+    manager = Manager(dwf=SimulatedDwf(speed=0))
+    benchmark_poll(manager, manager.dwf)
+
+
+def benchmark_libm() -> None:
+    # frexp(double, int *) stands in for a status call: a value argument and an output pointer
+    path = ctypes.util.find_library("m") or ctypes.util.find_library("c")
+    print(f"No WaveForms device, one call = frexp() from {path}")
+    untyped_library = CDLL(path)
+
+    def check_result(result: float, function, args: tuple) -> float:
+        # Same shape as DwfLibrary._check_result
+        if result == 0:
+            raise DwfException(message=f"{function.__name__} failed")
+        return result
+
+    frexp_checked = bind(CDLL(path), "frexp", [c_double, POINTER(c_int)], restype=c_double, errcheck=check_result)
+    frexp = bind(CDLL(path), "frexp", [c_double, POINTER(c_int)], restype=c_double)
+    exponent = c_int()
+    exponent_ref = byref(exponent)
+
+    def untyped_call() -> None:
+        value = c_int()
+        untyped_library.frexp(c_double(1000.0), byref(value))
+
+    def checked_call() -> None:
+        frexp_checked(1000.0, exponent_ref)
+
+    def inline_checked_call() -> None:
+        if not frexp(1000.0, exponent_ref):
+            raise DwfException(message="frexp failed")
+
+    compare(
+        {
+            "Untyped": untyped_call,
+            "Prototyped, errcheck": checked_call,
+            "Prototyped, inline check (HOT_PATH)": inline_checked_call,
+        }
+    )
+
+
+if __name__ == "__main__":
+    try:
+        manager = Manager()
+        if manager.get_num_devices() == 0:
+            raise DwfException(message="No device")
+        benchmark_device(manager)
+    except (OSError, DwfException):
+        benchmark_libm()
+    print()
+    benchmark_simulated()
@@ -0,0 +1,85 @@
+# Time to fill one DASYLab output block, item by item (the ProcessData loop before OutputBlockWriter) versus the
+# OutputBlockWriter bulk paths.  Stub output blocks stand in for the lys ones: a ctypes float array (buffer protocol),
+# a list (slice assignment) and an object supporting item assignment only (loop fallback).
+#
+# Usage: python digilent_waveforms/benchmarks/OutputBlockWriter.py [block size] [iterations]
+import sys
+import os
+import time
+from ctypes import c_float
+
+import numpy as np
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms_dasylab.components.OutputBlockWriter import OutputBlockWriter
+
+block_size = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+
+
+class BufferBlock:
+    # Output block exposing its sample memory through the buffer protocol
+    def __init__(self, size: int):
+        self.samples = (c_float * size)()
+
+    def __buffer__(self, flags: int) -> memoryview:
+        return memoryview(self.samples)
+
+    def __getitem__(self, index: int) -> float:
+        return self.samples[index]
+
+    def __setitem__(self, index: int, value: float) -> None:
+        self.samples[index] = value
+
+
+class ItemBlock:
+    # Output block supporting single item assignment only
+    def __init__(self, size: int):
+        self.samples = [0.0] * size
+
+    def __getitem__(self, index: int) -> float:
+        return self.samples[index]
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            raise TypeError("Slice assignment not supported")
+        self.samples[index] = value
+
+
+def time_fill(name: str, fill, iterations: int) -> float:
+    fill()  # Warm up, and let the writer detect its fill mode
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fill()
+    per_block = (time.perf_counter() - start) / iterations
+    print(f"{name:<44} {per_block * 1e6:>10.1f} us")
+    return per_block
+
+
+def compare(name: str, OutBuff, values) -> None:
+    writer = OutputBlockWriter()
+
+    def loop_fill() -> None:
+        for sample_index in range(block_size):
+            OutBuff[sample_index] = values[sample_index]
+
+    print(name)
+    before = time_fill("  Item loop", loop_fill, iterations)
+    after = time_fill("  OutputBlockWriter", lambda: writer.write(OutBuff, values), iterations)
+    print(f"  {'Mode':<42} {writer.mode.value:>10}")
+    print(f"  {'Speedup':<42} {before / after:>10.1f} x")
+    assert abs(OutBuff[block_size - 1] - values[block_size - 1]) < 1e-3
+
+
+if __name__ == "__main__":
+    print(f"Block size {block_size} samples, {iterations} blocks")
+    analog_values = np.random.default_rng(0).uniform(-5, 5, block_size).tolist()
+    digital_levels = (np.arange(block_size) >> 1 & 1).astype(np.uint8)
+    if sys.version_info >= (3, 12):
+        compare("Buffer protocol block, analog samples", BufferBlock(block_size), analog_values)
+        compare("Buffer protocol block, digital levels", BufferBlock(block_size), digital_levels)
+    compare("ctypes array block, analog samples", (c_float * block_size)(), analog_values)
+    compare("ctypes array block, digital levels", (c_float * block_size)(), digital_levels)
+    compare("List block, analog samples", [0.0] * block_size, analog_values)
+    compare("List block, digital levels", [0.0] * block_size, digital_levels)
+    compare("Item assignment block, analog samples", ItemBlock(block_size), analog_values)
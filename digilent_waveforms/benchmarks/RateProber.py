@@ -0,0 +1,63 @@
+# Measures the maximum lossless analog input record rate of a device on this host, for each channel count, and saves
+# it to the capability cache.  The DASYLab module warns when the worksheet's timebase rate exceeds the measured rate.
+# Probe with the host under its usual load (e.g. DASYLab running), the result depends on it.
+#
+# Usage (from the repository root):
+#   python digilent_waveforms/benchmarks/RateProber.py [--serial SN] [--channels 1 2] [--dwell 5]
+#   python digilent_waveforms/benchmarks/RateProber.py --simulated --dwell 0.5
+import argparse
+import os
+import sys
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms import Manager
+from digilent_waveforms.src.backends.SimulatedDwf import SimulatedDwf
+from digilent_waveforms.src.components.CapabilityCache import CapabilityCache
+
+
+def open_device(manager: Manager, serial_number: str):
+    if not serial_number:
+        return manager.open_first_device()
+    for info in manager.get_devices_info():
+        if info.serial_number == serial_number:
+            return manager.open_device(info.index)
+    raise SystemExit(f"Device ({serial_number}) not found")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maximum lossless analog input record rate per channel count")
+    parser.add_argument("--serial", default="", help="Device serial number, the first device by default")
+    parser.add_argument("--channels", type=int, nargs="*", help="Channel counts to probe, all by default")
+    parser.add_argument("--dwell", type=float, default=2.0, help="Seconds each rate must record without loss")
+    parser.add_argument("--resolution", type=float, default=0.02, help="Relative resolution of the result")
+    parser.add_argument("--min-rate", type=float, default=1000, help="Lowest rate probed in S/s")
+    parser.add_argument(
+        "--max-rate", type=float, default=0, help="Highest rate probed in S/s, the device's maximum by default"
+    )
+    parser.add_argument("--poll", type=float, default=0.01, help="Sleep between polls in seconds")
+    parser.add_argument("--cache", default=None, help="Capability cache file, the per user cache by default")
+    parser.add_argument("--no-save", action="store_true", help="Do not save the results to the capability cache")
+    parser.add_argument("--simulated", action="store_true", help="Probe a simulated device")
+    args = parser.parse_args()
+
+    manager = Manager(dwf=SimulatedDwf(speed=1)) if args.simulated else Manager()
+    device = open_device(manager, args.serial)
+    cache = None if args.no_save else CapabilityCache(args.cache)
+    print(device.get_device_info_str())
+    print(f"Dwell time {args.dwell} s, resolution {args.resolution * 100:.1f} %")
+    try:
+        results = device.probe_record_rates(
+            args.channels,
+            cache,
+            dwell_time=args.dwell,
+            resolution=args.resolution,
+            min_rate=args.min_rate,
+            max_rate=args.max_rate or None,
+            poll_interval=args.poll,
+        )
+        for result in results.values():
+            print(result.to_str())
+        if cache is not None:
+            print(f"Saved to ({cache.file_path})")
+    finally:
+        manager.close_device(device)
@@ -0,0 +1,75 @@
+# Compare analog input sample loss with the WaveForms SDK running in this process (Manager) and in a dedicated
+# acquisition process (RemoteManager) while this interpreter is kept busy by GIL holding Python work.
+#
+# Usage: python digilent_waveforms/benchmarks/RemoteAcquisition.py [sample rate] [seconds] [busy ms]
+import sys
+import os
+import threading
+import time
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms import DwfException, Manager, RemoteManager
+
+# Benchmark configuration
+channels = [0, 1]
+sample_rate = float(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+duration = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+busy_ms = float(sys.argv[3]) if len(sys.argv) > 3 else 50  # GIL held per processing step
+
+
+def busy_work(milliseconds: float) -> None:
+    # Pure Python work holds the GIL, like a slow block handler or GUI callback
+    end_time = time.perf_counter() + milliseconds / 1000
+    total = 0
+    while time.perf_counter() < end_time:
+        for i in range(1000):
+            total += i
+
+
+def background_load(stop_event: threading.Event) -> None:
+    # A second thread competing for the GIL
+    while not stop_event.is_set():
+        busy_work(5)
+
+
+def run(manager, label: str) -> None:
+    device = manager.open_first_device()
+    stop_event = threading.Event()
+    load_thread = threading.Thread(target=background_load, args=(stop_event,), daemon=True)
+    load_thread.start()
+
+    num_samples = 0
+    lost = 0
+    try:
+        device.AnalogInput.record(channels, sample_rate)
+        end_time = time.time() + duration
+        while time.time() < end_time:
+            block = device.AnalogInput.read_block(channels)
+            num_samples += block.num_samples
+            lost += block.lost
+            busy_work(busy_ms)
+        device.AnalogInput.stop()
+    finally:
+        stop_event.set()
+        load_thread.join()
+        manager.close_device(device)
+
+    total = num_samples + lost
+    loss = lost / total * 100 if total else 0
+    print(f"{label:>16}: {num_samples} samples read, {lost} lost ({loss:.3f}%)")
+
+
+if __name__ == "__main__":
+    try:
+        print(f"{len(channels)} channels at {sample_rate} S/s for {duration} s, {busy_ms} ms GIL load per read")
+        run(Manager(), "In process")
+
+        remote_manager = RemoteManager()
+        try:
+            run(remote_manager, "Out of process")
+        finally:
+            remote_manager.shutdown()
+
+    except DwfException as e:
+        print(e.message)
+        print(e.error)
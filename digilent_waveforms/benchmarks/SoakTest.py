@@ -0,0 +1,330 @@
+# Long duration soak / load test on simulated devices.  Drives N devices x M channels in record mode through Manager,
+# Device and AnalogIn (or the DASYLab module's pscript lifecycle with stubbed Ly / lys modules) and reports lost
+# samples, RSS growth, CPU time and poll latency percentiles at every report interval.  The run fails (exit code 1) if
+# any error is logged.
+#
+# Usage (from the repository root):
+#   python digilent_waveforms/benchmarks/SoakTest.py --devices 4 --channels 2 --rate 1000000 --hours 24
+#   python digilent_waveforms/benchmarks/SoakTest.py --dasylab --cycle 60 --minutes 30
+import argparse
+import gc
+import logging
+import os
+import sys
+import time
+import types
+
+import numpy as np
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms import DeviceRegistry, Manager
+from digilent_waveforms.src.backends.SimulatedDwf import SimulatedDwf
+
+
+def get_rss_bytes() -> int:
+    try:
+        import psutil  # type: ignore
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # Peak, Linux reports KiB
+
+
+class ErrorCounter(logging.Handler):
+    # Counts the errors logged by the library and the DASYLab module, any error fails the run
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.count = 0
+        self.first_message = ""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.count == 0:
+            self.first_message = record.getMessage()
+        self.count += 1
+
+
+class LatencyHistogram:
+    # Fixed size histogram of poll latencies on log spaced bins (1 us to 10 s, 2 % wide), so the whole run's
+    # percentiles take constant memory
+    def __init__(self):
+        self.edges = np.geomspace(1e-6, 10, int(np.log(1e7) / np.log(1.02)) + 1)
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)  # Plus underflow and overflow bins
+        self.max = 0.0
+
+    def add(self, latencies: list[float]) -> None:
+        if latencies:
+            np.add.at(self.counts, np.searchsorted(self.edges, latencies), 1)
+            self.max = max(self.max, max(latencies))
+
+    def percentile(self, q: float) -> float:
+        # Upper edge of the bin holding the q-th percentile (at most the maximum), in seconds
+        total = self.counts.sum()
+        if total == 0:
+            return 0.0
+        index = int(np.searchsorted(np.cumsum(self.counts), total * q / 100))
+        return min(float(self.edges[min(index, len(self.edges) - 1)]), self.max)
+
+
+class SoakReport:
+    # Per interval and whole run statistics
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.start_time = time.perf_counter()
+        self.start_cpu = time.process_time()
+        self.rss_samples: list[tuple[float, int]] = []
+        self.num_samples = 0
+        self.lost = 0
+        self._interval_start = self.start_time
+        self._interval_cpu = self.start_cpu
+        self._interval_samples = 0
+        self._interval_lost = 0
+        self._latencies: list[float] = []
+        self._all_latencies = LatencyHistogram()
+        print(
+            f"{'Elapsed':>10} {'MS/s':>8} {'Lost':>10} {'RSS MiB':>9} {'Objects':>9} {'CPU %':>6} "
+            f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+        )
+
+    def add_poll(self, latency: float, num_samples: int, lost: int) -> None:
+        self._latencies.append(latency)
+        self._interval_samples += num_samples
+        self._interval_lost += lost
+
+    def report_if_due(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        elapsed = now - self._interval_start
+        if elapsed < self.interval and not force:
+            return
+
+        rss = get_rss_bytes()
+        self.rss_samples.append((now - self.start_time, rss))
+        cpu = time.process_time()
+        latencies = np.array(self._latencies) * 1000 if self._latencies else np.zeros(1)
+        p50, p99 = np.percentile(latencies, [50, 99])
+        print(
+            f"{now - self.start_time:>9.0f}s {self._interval_samples / elapsed / 1e6:>8.3f} {self._interval_lost:>10} "
+            f"{rss / 2**20:>9.1f} {len(gc.get_objects()):>9} {(cpu - self._interval_cpu) / elapsed * 100:>6.1f} "
+            f"{p50:>8.2f} {p99:>8.2f} {latencies.max():>8.2f}"
+        )
+
+        self.num_samples += self._interval_samples
+        self.lost += self._interval_lost
+        self._all_latencies.add(self._latencies)
+        self._latencies = []
+        self._interval_samples = 0
+        self._interval_lost = 0
+        self._interval_start = now
+        self._interval_cpu = cpu
+
+    def print_summary(self) -> None:
+        self.report_if_due(force=True)
+        elapsed = time.perf_counter() - self.start_time
+        latencies = self._all_latencies
+        print(f"\nDuration {elapsed:.0f} s, {self.num_samples} samples, {self.lost} lost")
+        print(f"CPU time {time.process_time() - self.start_cpu:.1f} s")
+        print(
+            f"Poll latency p50 {latencies.percentile(50) * 1000:.2f} ms, p99 {latencies.percentile(99) * 1000:.2f} ms, "
+            f"p99.9 {latencies.percentile(99.9) * 1000:.2f} ms, max {latencies.max * 1000:.2f} ms"
+        )
+
+        # RSS trend after the first interval (warm up)
+        trend = self.rss_samples[1:]
+        if len(trend) >= 3:
+            times = np.array([t for t, _ in trend])
+            rss = np.array([r for _, r in trend], dtype=np.float64)
+            slope = np.polyfit(times, rss, 1)[0]
+            print(f"RSS {rss[0] / 2**20:.1f} -> {rss[-1] / 2**20:.1f} MiB, trend {slope * 3600 / 2**20:+.2f} MiB/hour")
+
+
+def run_library(args: argparse.Namespace, report: SoakReport, end_time: float) -> None:
+    manager = Manager(dwf=SimulatedDwf(num_devices=args.devices, ai_count=args.channels, speed=args.speed))
+    channels = list(range(0, args.channels))
+    devices = [manager.open_device(index) for index in range(0, args.devices)]
+    for device in devices:
+        device.AnalogInput.record(channels, args.rate)
+
+    while time.perf_counter() < end_time:
+        for device in devices:
+            poll_start = time.perf_counter()
+            block = device.AnalogInput.read_block(channels)
+            report.add_poll(time.perf_counter() - poll_start, block.num_samples, block.lost)
+        report.report_if_due()
+        time.sleep(args.poll)
+
+    for device in devices:
+        device.AnalogInput.stop()
+        manager.close_device(device)
+
+
+def stub_dasylab_modules(rate: float, block_size: int) -> None:
+    # Minimal stand-ins for the modules DASYLab provides to Python script modules
+    class OutBuff:
+        def __init__(self):
+            self.samples = [0.0] * block_size
+
+        def __setitem__(self, index, value) -> None:
+            self.samples[index] = value
+
+        def Release(self) -> None:
+            pass
+
+    class mclass:
+        NumOutChannel = 0
+        DlgNumChannels = 0
+        DlgMaxChannels = 0
+
+        def GetOutputBlock(self, channel: int) -> OutBuff:
+            # Created on first use, pscript.__init__ does not call mclass.__init__
+            if "_out_buff" not in vars(self):
+                self._out_buff = OutBuff()
+            return self._out_buff
+
+        def SetConnectors(self, num_inputs: int, num_outputs: int) -> None:
+            self.NumOutChannel = num_outputs
+
+        def SetSampleDistance(self, channel: int, value: float) -> None:
+            pass
+
+        def SetMaxBlockSize(self, channel: int, value: int) -> None:
+            pass
+
+        def SetChannelType(self, channel: int, value: int) -> None:
+            pass
+
+        def SetChannelFlags(self, channel: int, value: int) -> None:
+            pass
+
+    Ly = types.ModuleType("Ly")
+    Ly.CT_NORMAL = 0  # type: ignore
+    Ly.CF_NORMAL = 0  # type: ignore
+    Ly.GetTimeBaseBlockSize = lambda time_base: block_size  # type: ignore
+    Ly.GetTimeBaseSampleDistance = lambda time_base: 1 / rate  # type: ignore
+    Ly.StopExperiment = lambda: print("Ly.StopExperiment()")  # type: ignore
+    lys = types.ModuleType("lys")
+    lys.mclass = mclass  # type: ignore
+    debugpy = types.ModuleType("debugpy")
+    debugpy.listen = lambda *args, **kwargs: None  # type: ignore
+    debugpy.wait_for_client = lambda: None  # type: ignore
+    sys.modules.update({"Ly": Ly, "lys": lys, "debugpy": debugpy})
+
+
+def get_container_sizes(objects: dict[str, object]) -> dict[str, int]:
+    # Lengths of the list and dict attributes of the specified objects
+    sizes: dict[str, int] = {}
+    for object_name, obj in objects.items():
+        for name, value in vars(obj).items():
+            if isinstance(value, (list, dict)):
+                sizes[f"{object_name}.{name}"] = len(value)
+    return sizes
+
+
+def print_container_growth(first_sizes: dict[str, int], last_sizes: dict[str, int], num_cycles: int) -> None:
+    # Containers that grow with every worksheet restart are leaks
+    growing = [
+        (name, first_sizes[name], size) for name, size in last_sizes.items() if size > first_sizes.get(name, size)
+    ]
+    for name, first_size, size in growing:
+        print(f"Possible leak: {name} grew from {first_size} to {size} entries over {num_cycles} restarts")
+    if not growing:
+        print(f"No container growth over {num_cycles} restarts")
+
+
+def run_dasylab(args: argparse.Namespace, report: SoakReport, end_time: float) -> None:
+    # One module per simulated device, worksheet stopped and restarted every cycle seconds
+    stub_dasylab_modules(args.rate, args.block_size)
+    import digilent_waveforms.src.DeviceRegistry as device_registry
+    import digilent_waveforms_dasylab_module as dasylab_module
+
+    device_registry._registry = DeviceRegistry(
+        Manager(dwf=SimulatedDwf(num_devices=args.devices, ai_count=args.channels, speed=args.speed))
+    )
+    modules = []
+    for index in range(0, args.devices):
+        module = dasylab_module.pscript(None)
+        module.info.selected_device_serial_number = module.pvar.device_manager.serial_numbers[index]
+        module.Load()
+        module.SetConnectors(0, args.channels)
+        modules.append(module)
+
+    def get_module_container_sizes() -> dict[str, int]:
+        sizes: dict[str, int] = {}
+        for index, module in enumerate(modules):
+            objects = {"info": module.info, "pvar": module.pvar, "device_manager": module.pvar.device_manager}
+            sizes.update({f"[{index}] {name}": size for name, size in get_container_sizes(objects).items()})
+        return sizes
+
+    num_cycles = 0
+    first_sizes: dict[str, int] = {}
+    while time.perf_counter() < end_time:
+        for module in modules:
+            # The dialog enumerates devices whenever it is opened
+            module.pvar.device_manager.enumerate_devices()
+            module.Start()
+        cycle_end = min(end_time, time.perf_counter() + args.cycle)
+
+        while time.perf_counter() < cycle_end:
+            for module in modules:
+                analog_in = module.pvar.wf_device.AnalogInput
+                lost_before = analog_in._ai_lost_count
+                samples_before = analog_in._ai_sample_count
+                poll_start = time.perf_counter()
+                module.ProcessData()
+                report.add_poll(
+                    time.perf_counter() - poll_start,
+                    analog_in._ai_sample_count - samples_before,
+                    analog_in._ai_lost_count - lost_before,
+                )
+            report.report_if_due()
+            time.sleep(args.poll)
+
+        for module in modules:
+            module.Stop()
+        num_cycles += 1
+        if num_cycles == 1:
+            first_sizes = get_module_container_sizes()
+
+    print_container_growth(first_sizes, get_module_container_sizes(), num_cycles)
+    for module in modules:
+        module.Delete()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Soak test on simulated devices")
+    parser.add_argument("--devices", type=int, default=2)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--rate", type=float, default=100000, help="Sample rate in S/s")
+    parser.add_argument("--speed", type=float, default=1.0, help="Simulated time / real time")
+    parser.add_argument("--hours", type=float, default=0)
+    parser.add_argument("--minutes", type=float, default=1)
+    parser.add_argument("--interval", type=float, default=10, help="Report interval in seconds")
+    parser.add_argument("--poll", type=float, default=0.01, help="Sleep between polls in seconds")
+    parser.add_argument("--dasylab", action="store_true", help="Run the DASYLab module lifecycle")
+    parser.add_argument("--cycle", type=float, default=60, help="DASYLab: seconds between worksheet restarts")
+    parser.add_argument("--block-size", type=int, default=4096, help="DASYLab: output block size")
+    args = parser.parse_args()
+
+    duration = args.hours * 3600 if args.hours else args.minutes * 60
+    mode = "DASYLab module" if args.dasylab else "library"
+    print(f"Soak test ({mode}): {args.devices} devices x {args.channels} channels at {args.rate} S/s for {duration} s")
+
+    error_counter = ErrorCounter()
+    logging.getLogger().addHandler(error_counter)
+
+    report = SoakReport(args.interval)
+    end_time = time.perf_counter() + duration
+    if args.dasylab:
+        run_dasylab(args, report, end_time)
+    else:
+        run_library(args, report, end_time)
+    report.print_summary()
+
+    if error_counter.count:
+        print(f"FAILED: {error_counter.count} errors logged, the first: {error_counter.first_message}")
+        sys.exit(1)
@@ -0,0 +1,57 @@
+# Per event cost of the trace ring buffer compared with logging a per-poll debug message, with the debug level
+# disabled as in production: an f-string message (built even though it is discarded), a lazy %-style message and a
+# level guarded message.
+#
+# Usage: python digilent_waveforms/benchmarks/Trace.py [iterations]
+import logging
+import sys
+import os
+import time
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.components.utils.Trace import Trace
+from digilent_waveforms.src.constants.trace_types import TraceEvent
+
+iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+
+def time_calls(name: str, call, iterations: int) -> float:
+    call()  # Warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        call()
+    per_call = (time.perf_counter() - start) / iterations
+    print(f"{name:<44} {per_call * 1e9:>8.1f} ns")
+    return per_call
+
+
+if __name__ == "__main__":
+    Logger.setLevel(logging.INFO)
+    trace = Trace()
+    disabled_trace = Trace(enabled=False)
+    available, lost, corrupted, poll_interval = 4096, 0, 0, 0.01
+
+    time_calls("Trace.record()", lambda: trace.record(TraceEvent.AiStatus, available, lost, corrupted), iterations)
+    time_calls(
+        "Trace.record(), disabled",
+        lambda: disabled_trace.record(TraceEvent.AiStatus, available, lost, corrupted),
+        iterations,
+    )
+    time_calls(
+        "Logger.debug(f-string), level disabled",
+        lambda: Logger.debug(f"AI status {available} {lost} {corrupted}, poll {poll_interval * 1000:.1f} ms"),
+        iterations,
+    )
+    time_calls(
+        "Logger.debug(%-style), level disabled",
+        lambda: Logger.debug("AI status %d %d %d, poll %.1f ms", available, lost, corrupted, poll_interval * 1000),
+        iterations,
+    )
+
+    def guarded() -> None:
+        if Logger.isEnabledFor(logging.DEBUG):
+            Logger.debug("AI status %d %d %d, poll %.1f ms", available, lost, corrupted, poll_interval * 1000)
+
+    time_calls("Level guard, level disabled", guarded, iterations)
+    print(f"{trace.get_num_records()} events kept, last: {trace.get_records()[-1].to_str()}")
@@ -0,0 +1,43 @@
+# Update include path for local import
+import sys
+import os
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms import Manager, DwfException
+from digilent_waveforms.src.constants import DeviceCloseBehavior
+
+# Example configuration
+ai_channels = [0]
+ao_channel = 0
+setpoint = 1.0  # Volts
+gain = 0.5
+loop_period = 0.001  # Seconds
+loop_duration = 5  # Seconds
+
+try:
+    # Initialize the Digilent WaveForms Manager
+    wf_manager = Manager()
+
+    # Set stop behavior to stop outputs when program execution stops
+    wf_manager.set_device_close_behavior(DeviceCloseBehavior.StopRunning)
+
+    # Open first WaveForms device
+    wf_device = wf_manager.open_first_device()
+    print(f"Using {wf_device.name} {wf_device.serial_number}")
+
+    # Simple integral controller driving AO channel 0 so that AI channel 0 reaches the setpoint
+    output = [0.0]
+
+    def controller(samples: list[float]) -> float:
+        output[0] += gain * (setpoint - samples[0])
+        return output[0]
+
+    stats = wf_device.run_control_loop(ai_channels, ao_channel, controller, period=loop_period, duration=loop_duration)
+    print(stats.to_str())
+
+    # Close the device handle
+    wf_manager.close_all_devices()
+
+except DwfException as e:
+    print(e.message)
+    print(e.error)
@@ -0,0 +1,53 @@
+# Update include path for local import
+import sys
+import os
+import time
+
+# Update path to enable relative import (for easier development)
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms import Manager, DwfException
+from digilent_waveforms.src.backends.ReplayDwf import ReplayDwf
+from digilent_waveforms.src.components.StreamRecorder import StreamRecorder
+
+# Example configuration
+ai_channels = [0, 1]
+sample_rate = 100000
+record_seconds = 5
+replay_speed = 10  # 1: real time, N: N x real time, 0: as fast as possible
+recording_path = "ai_recording.f64"
+
+try:
+    # Record the raw stream of the first device
+    wf_manager = Manager()
+    wf_device = wf_manager.open_first_device()
+    print(f"Recording {wf_device.name} {wf_device.serial_number} for {record_seconds} s")
+
+    recorder = StreamRecorder(recording_path, ai_channels, sample_rate)
+    recorder.attach(wf_device.AnalogInput)
+    wf_device.AnalogInput.record(channels=ai_channels, sample_rate=sample_rate, range=10)
+    end_time = time.time() + record_seconds
+    while time.time() < end_time:
+        wf_device.AnalogInput.read_block(ai_channels)
+        time.sleep(0.05)
+    wf_device.AnalogInput.stop()
+    recorder.close()
+    wf_manager.close_device(wf_device)
+    print(f"Recorded {recorder.num_samples} samples to {recording_path}")
+
+    # Replay the recording through the same API
+    replay_manager = Manager(dwf=ReplayDwf([recording_path], speed=replay_speed))
+    replay_device = replay_manager.open_first_device()
+    replay_device.AnalogInput.record(channels=ai_channels, sample_rate=sample_rate, range=10)
+
+    num_samples = 0
+    start_time = time.time()
+    while num_samples < recorder.num_samples:
+        ai_data, lost_count, corrupted_count = replay_device.AnalogInput.read_available_samples(ai_channels)
+        num_samples += len(ai_data[0])
+        time.sleep(0.01)
+    print(f"Replayed {num_samples} samples in {time.time() - start_time:.2f} s, {lost_count} samples lost")
+    replay_manager.close_device(replay_device)
+
+except DwfException as e:
+    print(e.message)
+    print(e.error)
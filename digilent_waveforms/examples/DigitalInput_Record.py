@@ -0,0 +1,52 @@
+# Update include path for local import
+import sys
+import os
+import time
+
+import numpy as np
+
+# Update path to enable relative import (for easier development)
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms import Manager, DwfException
+from digilent_waveforms.src.components.DigitalInput import find_edges, get_sample_format
+from digilent_waveforms.src.constants.di_types import DiEdge
+
+# Example configuration
+lines = [0, 1, 2, 3]
+sample_rate = 1000000
+record_seconds = 1
+
+try:
+    # Initialize the Digilent WaveForms Manager
+    wf_manager = Manager()
+
+    # Open first WaveForms device
+    wf_device = wf_manager.open_first_device()
+    print(f"Using {wf_device.name} {wf_device.serial_number}, {wf_device.di_count} digital lines")
+    wf_device.DigitalInput.check_lines(lines)
+
+    # Record the lines, packed into the smallest sample format that holds them
+    wf_device.DigitalInput.record(sample_rate, get_sample_format(lines))
+
+    blocks = []
+    end_time = time.time() + record_seconds
+    while time.time() < end_time:
+        time.sleep(0.01)
+        block = wf_device.DigitalInput.read_block()
+        if block.lost:
+            print(f"{block.lost} samples lost before sample {block.first_sample_index}")
+        blocks.append(block.data)
+
+    wf_device.DigitalInput.stop()
+    wf_manager.close_all_devices()
+
+    # Count the rising edges of each line
+    data = np.concatenate(blocks)
+    print(f"Recorded {len(data)} samples at {wf_device.DigitalInput.actual_sample_rate} S/s")
+    for line in lines:
+        rising_edges = find_edges(data, line, DiEdge.Rising)
+        print(f"DIO {line}: {len(rising_edges)} rising edges")
+
+except DwfException as e:
+    print(e.message)
+    print(e.error)
@@ -0,0 +1,32 @@
+# Update include path for local import
+import sys
+import os
+
+# Update path to enable relative import (for easier development)
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms import Manager, DwfException
+from digilent_waveforms.src.components.FrequencySweep import get_log_frequencies
+
+# Example configuration: W1 drives the circuit input, wired to C1 (reference), C2 measures the circuit output
+start_frequency = 100
+stop_frequency = 100000
+num_points = 31
+amplitude = 1.0
+
+try:
+    # Initialize the Digilent WaveForms Manager
+    wf_manager = Manager()
+
+    # Open first WaveForms device
+    wf_device = wf_manager.open_first_device()
+    print(f"Using {wf_device.name} {wf_device.serial_number}")
+
+    frequencies = get_log_frequencies(start_frequency, stop_frequency, num_points)
+    bode_data = wf_device.run_frequency_sweep(frequencies, ao_channel=0, response_channel=1, amplitude=amplitude)
+    wf_manager.close_all_devices()
+
+    print(bode_data.to_str())
+
+except DwfException as e:
+    print(e.message)
+    print(e.error)
@@ -0,0 +1,36 @@
+# Update include path for local import
+import sys
+import os
+import time
+
+sys.path.insert(0, f"{os.getcwd()}")
+from digilent_waveforms import DwfException
+from digilent_waveforms.src.components.StreamPublisher import StreamSubscriber
+
+# Example configuration
+stream_name = sys.argv[1] if len(sys.argv) > 1 else "digilent_SN210321A1234"  # Published by the DASYLab module
+duration = 10  # Seconds
+
+try:
+    # Map the published stream, data is read in place without copies
+    subscriber = StreamSubscriber(stream_name)
+    print(f"Reading {subscriber.num_channels} channels at {subscriber.get_sample_rate()} S/s from ({stream_name})")
+
+    end_time = time.time() + duration
+    while time.time() < end_time:
+        view = subscriber.read()
+        if view is None:
+            time.sleep(0.01)
+            continue
+
+        # view.data is a read only (channels, samples) NumPy view into shared memory
+        means = view.data.mean(axis=1)
+        if subscriber.is_valid(view):
+            print(f"Samples {view.first_sample_index} - {view.first_sample_index + view.data.shape[1]}: mean {means}")
+
+    print(f"Subscriber overruns: {subscriber.overrun_count}, acquisition lost samples: {subscriber.get_lost_count()}")
+    subscriber.close()
+
+except DwfException as e:
+    print(e.message)
+    print(e.error)
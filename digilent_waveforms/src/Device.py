@@ -1,4 +1,5 @@
 from ctypes import *  # type: ignore
+from typing import Optional
 
 # Digilent WaveForms Imports
 from digilent_waveforms.src.constants.dwfconstants import *
@@ -6,6 +7,11 @@ from digilent_waveforms.src.constants.dwf_types import DeviceType
 from digilent_waveforms.src.constants.ai_types import AiAcquisitionMode
 from digilent_waveforms.src.components.AnalogOut import AnalogOut
 from digilent_waveforms.src.components.AnalogInput import AnalogIn
+from digilent_waveforms.src.components.DigitalInput import DigitalIn
+from digilent_waveforms.src.components.ControlLoop import ControlCallback, ControlLoop, ControlLoopStats
+from digilent_waveforms.src.components.FrequencySweep import BodeData, FrequencySweep
+from digilent_waveforms.src.components.CapabilityCache import CapabilityCache
+from digilent_waveforms.src.components.RateProber import RateProbeResult, RateProber
 
 
 class Device:
@@ -19,9 +25,11 @@ class Device:
     # Subsystems
     AnalogOutput: AnalogOut
     AnalogInput: AnalogIn
+    DigitalInput: DigitalIn
 
     ai_count = 0
     ao_count = 0
+    di_count = 0
 
     _ai_mode: AiAcquisitionMode
     _ai_sample_count: int = 0
@@ -53,7 +61,9 @@ class Device:
 
         # Instantiate subsystems
         self.AnalogOutput = AnalogOut(self.dwf, self.device_handle, self.ao_count)
-        self.AnalogInput = AnalogIn(self.dwf, self.device_handle, self.ai_count)
+        self.AnalogInput = AnalogIn(self.dwf, self.device_handle, self.ai_count, self.device_type)
+        self.DigitalInput = DigitalIn(self.dwf, self.device_handle)
+        self.di_count = self.DigitalInput.line_count
 
         # Prevent config options from being applied at each call.  Instead apply config options only when FDwfAnalogInConfigure is called.
         self.dwf.FDwfDeviceAutoConfigureSet(self.device_handle, c_int(0))
@@ -73,6 +83,120 @@ class Device:
             + str(self.revision).ljust(64)
         )
 
+    # ---------- Control loop ----------
+    def create_control_loop(
+        self,
+        ai_channels: list[int],
+        ao_channel: int,
+        callback: ControlCallback,
+        period: float = 0.001,
+        sample_rate: float = 100000,
+        ai_range: float = 5,
+        initial_offset: float = 0,
+    ) -> ControlLoop:
+        return ControlLoop(
+            self.dwf,
+            self.device_handle,
+            self.AnalogInput,
+            self.AnalogOutput,
+            ai_channels,
+            ao_channel,
+            callback,
+            period=period,
+            sample_rate=sample_rate,
+            ai_range=ai_range,
+            initial_offset=initial_offset,
+        )
+
+    def run_control_loop(
+        self,
+        ai_channels: list[int],
+        ao_channel: int,
+        callback: ControlCallback,
+        period: float = 0.001,
+        iterations: int = 0,
+        duration: float = 0,
+        sample_rate: float = 100000,
+        ai_range: float = 5,
+        initial_offset: float = 0,
+    ) -> ControlLoopStats:
+        control_loop = self.create_control_loop(
+            ai_channels, ao_channel, callback, period, sample_rate, ai_range, initial_offset
+        )
+        try:
+            return control_loop.run(iterations=iterations, duration=duration)
+        finally:
+            control_loop.stop()
+
+    # ---------- Frequency sweep ----------
+    def create_frequency_sweep(
+        self,
+        ao_channel: int = 0,
+        response_channel: int = 1,
+        reference_channel: Optional[int] = 0,
+        amplitude: float = 1.0,
+        offset: float = 0,
+        ai_range: float = 5,
+        **sweep_options,
+    ) -> FrequencySweep:
+        return FrequencySweep(
+            self.dwf,
+            self.device_handle,
+            self.AnalogInput,
+            self.AnalogOutput,
+            ao_channel=ao_channel,
+            response_channel=response_channel,
+            reference_channel=reference_channel,
+            amplitude=amplitude,
+            offset=offset,
+            ai_range=ai_range,
+            **sweep_options,
+        )
+
+    def run_frequency_sweep(
+        self,
+        frequencies: list[float],
+        ao_channel: int = 0,
+        response_channel: int = 1,
+        reference_channel: Optional[int] = 0,
+        amplitude: float = 1.0,
+        offset: float = 0,
+        ai_range: float = 5,
+        **sweep_options,
+    ) -> BodeData:
+        frequency_sweep = self.create_frequency_sweep(
+            ao_channel, response_channel, reference_channel, amplitude, offset, ai_range, **sweep_options
+        )
+        try:
+            return frequency_sweep.run(frequencies)
+        finally:
+            frequency_sweep.stop()
+
+    # ---------- Record rate probe ----------
+    def create_rate_prober(self, **prober_options) -> RateProber:
+        return RateProber(self.AnalogInput, **prober_options)
+
+    def probe_record_rates(
+        self,
+        channel_counts: Optional[list[int]] = None,
+        cache: Optional[CapabilityCache] = None,
+        **prober_options,
+    ) -> dict[int, RateProbeResult]:
+        # Measure the maximum lossless record rate of each channel count and use it as the AnalogInput record rate
+        # limit.  The results are also saved to the capability cache, if given.
+        results = self.create_rate_prober(**prober_options).probe_all(channel_counts)
+        for num_channels, result in results.items():
+            if result.max_rate is not None:
+                self.AnalogInput.record_rate_limits[num_channels] = result.max_rate
+        if cache is not None:
+            cache.add_probe_results(self.serial_number, self.device_type, results.values())
+            cache.save()
+        return results
+
+    def load_capabilities(self, cache: CapabilityCache) -> bool:
+        # Use the record rates previously measured for this device, returns whether any were found
+        return cache.apply(self)
+
     def _get_analog_input_count(self) -> int:
         retval = c_int()
         self.dwf.FDwfAnalogInChannelCount(self.device_handle, byref(retval))
@@ -0,0 +1,310 @@
+from typing import Optional, Union
+import threading
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.Manager import Manager
+from digilent_waveforms.src.Device import Device
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.constants.ai_types import AiBlock
+from digilent_waveforms.src.constants.dwf_types import DeviceInfo
+from digilent_waveforms.src.constants.error_codes import RegistryError
+
+
+class AcquisitionSubscription:
+    # A consumer of a SharedAcquisition, receives the blocks of its own channel subset.  At most max_queued_seconds of
+    # unread samples are kept, older blocks are dropped and reported as lost.
+    channels: list[int]
+    range: float
+    max_queued_seconds: float
+    overflow_count: int  # Samples dropped because the subscriber did not read them in time
+    _blocks: list[AiBlock]
+
+    def __init__(
+        self, acquisition: "SharedAcquisition", channels: list[int], range: float, max_queued_seconds: float = 10
+    ):
+        self.acquisition = acquisition
+        self.channels = channels
+        self.range = range
+        self.max_queued_seconds = max_queued_seconds
+        self.overflow_count = 0
+        self._blocks = []
+        self._num_queued = 0
+        self._is_streaming = False  # Received the stream before a restart
+        self._pending_lost = 0  # Samples missed while restarting, reported by the next block
+
+    def start(self) -> None:
+        self.acquisition.start()
+
+    def read_block(self) -> AiBlock:
+        # Read all samples received since the last call, up to the first gap (later blocks stay queued)
+        if not self._blocks:
+            self.acquisition.poll()
+        return self._pop_contiguous_blocks()
+
+    def unsubscribe(self) -> None:
+        self.acquisition.unsubscribe(self)
+
+    def _push(self, block: AiBlock) -> None:
+        self._blocks.append(block)
+        self._num_queued += block.num_samples
+
+        # Drop the oldest blocks of a subscriber that stopped reading, the next block reports them as lost
+        max_queued = max(block.num_samples, int(self.max_queued_seconds * block.sample_rate))
+        while self._num_queued > max_queued and len(self._blocks) > 1:
+            dropped = self._blocks.pop(0)
+            self._num_queued -= dropped.num_samples
+            self._blocks[0].lost += dropped.lost + dropped.num_samples
+            self.overflow_count += dropped.num_samples
+
+    def _pop_contiguous_blocks(self) -> AiBlock:
+        if not self._blocks:
+            analog_in = self.acquisition.device.AnalogInput
+            return AiBlock(
+                [[] for _ in self.channels],
+                self.channels,
+                self.acquisition.get_stream_index(),
+                0,
+                0,
+                analog_in.actual_sample_rate,
+                analog_in.sample_clock.host_time_of(analog_in.sample_index),
+            )
+
+        first = self._blocks.pop(0)
+        self._num_queued -= first.num_samples
+        data = first.data
+        corrupted = first.corrupted
+        while self._blocks and self._blocks[0].lost == 0:
+            block = self._blocks.pop(0)
+            self._num_queued -= block.num_samples
+            for channel_index in range(0, len(data)):
+                data[channel_index] += block.data[channel_index]
+            corrupted += block.corrupted
+
+        return AiBlock(
+            data, self.channels, first.first_sample_index, first.lost, corrupted, first.sample_rate, first.host_time
+        )
+
+
+class SharedAcquisition:
+    # A single analog input record stream on a device, fanned out to any number of subscribers by channel subset.
+    # The device records the union of the subscribed channels.  Sample indices stay continuous when the device is
+    # restarted to add channels, the samples missed during the restart are reported as lost.
+    device: Device
+    sample_rate: float = 0
+    subscriptions: list[AcquisitionSubscription]
+    is_running: bool = False
+
+    def __init__(self, device: Device):
+        self.device = device
+        self.subscriptions = []
+        self._recorded_channels: list[int] = []
+        self._index_offset = 0  # Stream index of the device acquisition's first sample
+        self._lock = threading.RLock()
+
+    def subscribe(self, channels: list[int], sample_rate: float, range: float = 5) -> AcquisitionSubscription:
+        with self._lock:
+            if self.subscriptions and sample_rate != self.sample_rate:
+                msg = f"Device ({self.device.serial_number}) is already recording at {self.sample_rate} S/s, a subscriber requested {sample_rate} S/s"
+                raise DwfException(RegistryError.SAMPLE_RATE_MISMATCH.value, msg, msg)
+
+            for subscription in self.subscriptions:
+                shared_channels = set(channels) & set(subscription.channels)
+                if shared_channels and subscription.range != range:
+                    msg = f"Device ({self.device.serial_number}) channels {sorted(shared_channels)} are already recording with range {subscription.range}, a subscriber requested {range}"
+                    raise DwfException(RegistryError.RANGE_MISMATCH.value, msg, msg)
+
+            self.sample_rate = sample_rate
+            subscription = AcquisitionSubscription(self, channels, range)
+            self.subscriptions.append(subscription)
+            return subscription
+
+    def unsubscribe(self, subscription: AcquisitionSubscription) -> None:
+        with self._lock:
+            if subscription in self.subscriptions:
+                self.subscriptions.remove(subscription)
+            if not self.subscriptions:
+                self.stop()
+
+    def start(self) -> None:
+        # Start recording, or restart if a subscriber added channels to the stream
+        with self._lock:
+            channels = self._get_channel_union()
+            if self.is_running and channels == self._recorded_channels:
+                return
+
+            analog_in = self.device.AnalogInput
+            restart_index: Optional[int] = None
+            if not self.is_running:
+                self._index_offset = 0
+            else:
+                Logger.info(
+                    "Device (%s) restarting shared acquisition, channels %s -> %s",
+                    self.device.serial_number,
+                    self._recorded_channels,
+                    channels,
+                )
+                # Hand the existing subscribers their samples up to the restart
+                self.poll()
+                restart_index = analog_in.sample_index
+                restart_time = analog_in.sample_clock.host_time_of(restart_index)
+
+            config = analog_in.get_record_config(channels, self.sample_rate)
+            for subscription in self.subscriptions:
+                for channel in subscription.channels:
+                    config.channel(channel).range = subscription.range
+
+            analog_in.apply(config, start=True)
+            if restart_index is not None:
+                # Continue the stream's indices after the samples the restart missed, estimated from the host clock
+                missed = max(
+                    1, round((analog_in.sample_clock.start_time - restart_time) * analog_in.actual_sample_rate)
+                )
+                self._index_offset += restart_index + missed
+                for subscription in self.subscriptions:
+                    if subscription._is_streaming:
+                        subscription._pending_lost += missed
+            for subscription in self.subscriptions:
+                subscription._is_streaming = True
+            self._recorded_channels = channels
+            self.is_running = True
+
+    def stop(self) -> None:
+        with self._lock:
+            if self.is_running:
+                self.device.AnalogInput.stop()
+            self.is_running = False
+
+    def poll(self) -> None:
+        # Read the device once and distribute the data to every subscriber
+        with self._lock:
+            if not self.is_running:
+                return
+            block = self.device.AnalogInput.read_block(self._recorded_channels)
+            if block.num_samples == 0 and block.lost == 0:
+                return
+
+            for subscription in self.subscriptions:
+                if not subscription._is_streaming:
+                    continue  # Subscribed since the last start, its channels may not be recorded yet
+                data = [block.data[self._recorded_channels.index(channel)][:] for channel in subscription.channels]
+                subscription._push(
+                    AiBlock(
+                        data,
+                        subscription.channels,
+                        block.first_sample_index + self._index_offset,
+                        block.lost + subscription._pending_lost,
+                        block.corrupted,
+                        block.sample_rate,
+                        block.host_time,
+                    )
+                )
+                subscription._pending_lost = 0
+
+    def get_stream_index(self) -> int:
+        # Stream index of the next sample to be read
+        return self._index_offset + self.device.AnalogInput.sample_index
+
+    def _get_channel_union(self) -> list[int]:
+        channels: set[int] = set()
+        for subscription in self.subscriptions:
+            channels.update(subscription.channels)
+        return sorted(channels)
+
+
+class DeviceRegistry:
+    # Process wide registry of open devices.  Each device is opened once, shared by reference count and closed when
+    # the last user releases it.
+    manager: Manager
+
+    def __init__(self, manager: Optional[Manager] = None):
+        self.manager = manager if manager else Manager()
+        self.devices_info: list[DeviceInfo] = []
+        self._devices: dict[str, Device] = {}
+        self._ref_counts: dict[str, int] = {}
+        self._acquisitions: dict[str, SharedAcquisition] = {}
+        self._lock = threading.RLock()
+
+    def refresh_devices(self) -> list[DeviceInfo]:
+        with self._lock:
+            self.devices_info = self.manager.get_devices_info()
+            return self.devices_info
+
+    def get_devices_info(self, refresh: bool = False) -> list[DeviceInfo]:
+        if refresh or not self.devices_info:
+            return self.refresh_devices()
+        return self.devices_info
+
+    def acquire(self, serial_number: str) -> Device:
+        # Return the open device with the specified serial number, opening it on first use
+        with self._lock:
+            if serial_number in self._devices:
+                self._ref_counts[serial_number] += 1
+                return self._devices[serial_number]
+
+            device_index = self._get_device_index(serial_number)
+            if device_index < 0:
+                # The device list may be stale, enumerate once more
+                self.refresh_devices()
+                device_index = self._get_device_index(serial_number)
+            if device_index < 0:
+                msg = f"A device with the specified serial number ({serial_number}) is not available"
+                raise DwfException(RegistryError.DEVICE_NOT_FOUND.value, msg, msg)
+
+            device = self.manager.open_device(device_index)
+            self._devices[serial_number] = device
+            self._ref_counts[serial_number] = 1
+            Logger.debug("Registry opened device (%s)", serial_number)
+            return device
+
+    def release(self, device: Union[Device, str]) -> None:
+        # Drop one reference, the device is closed when no references remain
+        serial_number = device if isinstance(device, str) else device.serial_number
+        with self._lock:
+            if serial_number not in self._devices:
+                return
+            self._ref_counts[serial_number] -= 1
+            if self._ref_counts[serial_number] > 0:
+                return
+
+            acquisition = self._acquisitions.pop(serial_number, None)
+            if acquisition:
+                acquisition.stop()
+            self.manager.close_device(self._devices.pop(serial_number))
+            del self._ref_counts[serial_number]
+            Logger.debug("Registry closed device (%s)", serial_number)
+
+    def get_acquisition(self, device: Union[Device, str]) -> SharedAcquisition:
+        serial_number = device if isinstance(device, str) else device.serial_number
+        with self._lock:
+            if serial_number not in self._devices:
+                msg = f"The device with serial number ({serial_number}) must be acquired before recording"
+                raise DwfException(RegistryError.DEVICE_NOT_ACQUIRED.value, msg, msg)
+            if serial_number not in self._acquisitions:
+                self._acquisitions[serial_number] = SharedAcquisition(self._devices[serial_number])
+            return self._acquisitions[serial_number]
+
+    def get_ref_count(self, serial_number: str) -> int:
+        return self._ref_counts.get(serial_number, 0)
+
+    def is_open(self, serial_number: str) -> bool:
+        return serial_number in self._devices
+
+    def _get_device_index(self, serial_number: str) -> int:
+        for device_info in self.devices_info:
+            if device_info.serial_number == serial_number:
+                return device_info.index
+        return -1
+
+
+_registry: Optional[DeviceRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> DeviceRegistry:
+    # The process wide device registry, created on first use
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DeviceRegistry()
+        return _registry
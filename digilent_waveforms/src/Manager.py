@@ -3,22 +3,30 @@ from ctypes import *  # type: ignore
 from digilent_waveforms.src.Device import Device
 from digilent_waveforms.src.constants.dwfconstants import *
 from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.DwfLibrary import DwfLibrary
 from digilent_waveforms.src.constants.dwf_types import DeviceType, DeviceCloseBehavior, DeviceInfo
+from typing import Any
 import sys
 
 
 class Manager:
     module_version = "-.-.-"
 
-    def __init__(self):
-        # Open dwf shared object
-        if sys.platform.startswith("win"):
+    def __init__(self, dwf: Any = None):
+        # Open dwf shared object, or use the specified WaveForms SDK implementation (e.g. a replay backend)
+        if dwf is not None:
+            self.dwf = dwf
+        elif sys.platform.startswith("win"):
             self.dwf = cdll.dwf
         elif sys.platform.startswith("darwin"):
             self.dwf = cdll.LoadLibrary("/Library/Frameworks/dwf.framework/dwf")
         else:
             self.dwf = cdll.LoadLibrary("libdwf.so")
 
+        # Prototype the library functions once, failed calls raise DwfException
+        if isinstance(self.dwf, CDLL):
+            self.dwf = DwfLibrary(self.dwf)
+
         self.module_version = __version__
 
     def get_waveforms_version(self) -> str:
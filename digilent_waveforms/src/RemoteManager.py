@@ -0,0 +1,406 @@
+from typing import Any, Optional
+import multiprocessing
+import os
+import sys
+import threading
+import time
+import uuid
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.SampleClock import SampleClock
+from digilent_waveforms.src.components.StreamPublisher import StreamPublisher, StreamSubscriber
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.constants.ai_types import AiBlock
+from digilent_waveforms.src.constants.error_codes import AnalogInputErorr, RemoteError
+
+MANAGER_ID = "manager"
+
+
+class _ObjectRef:
+    # Reference to an object living in the acquisition process
+    def __init__(self, object_id: str, attributes: Optional[dict] = None):
+        self.object_id = object_id
+        self.attributes = attributes if attributes else {}
+
+
+def _device_ref(device: Any) -> _ObjectRef:
+    device_id = f"device:{device.serial_number}"
+    return _ObjectRef(
+        device_id,
+        {
+            "device_index": device.device_index,
+            "name": device.name,
+            "device_type": device.device_type,
+            "revision": device.revision,
+            "serial_number": device.serial_number,
+            "ai_count": device.ai_count,
+            "ao_count": device.ao_count,
+        },
+    )
+
+
+class _RecordStreamer(threading.Thread):
+    # Acquisition process side: polls record mode data and publishes it to shared memory
+    def __init__(self, analog_in: Any, channels: list[int], publisher: StreamPublisher, lock: threading.Lock):
+        super().__init__(daemon=True)
+        self.analog_in = analog_in
+        self.channels = channels
+        self.publisher = publisher
+        self.lock = lock
+        self.poll_interval = 0.005
+        self.error: Optional[tuple[int, str, str]] = None  # (code, error, message) of the failure that stopped it
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        try:
+            while not self._stop_event.is_set():
+                with self.lock:
+                    block = self.analog_in.read_block(self.channels)
+                if block.num_samples > 0:
+                    self.publisher.publish(block)
+                self._stop_event.wait(min(self.poll_interval, self.analog_in.get_poll_interval()))
+        except DwfException as e:
+            self.error = (e.code, e.error, e.message)
+        except Exception as e:
+            self.error = (RemoteError.STREAM_FAILED.value, type(e).__name__, str(e))
+
+        if self.error:
+            # Flag the failure in the stream header, the parent reads the details with __stream_error__
+            Logger.error("Record streamer stopped: %s", self.error[2])
+            self.publisher.set_error(self.error[0])
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+        self.publisher.close()
+
+
+def _serve(conn: Any) -> None:
+    # Acquisition process entry point.  All libdwf calls are made here.
+    from digilent_waveforms.src.Manager import Manager
+    from digilent_waveforms.src.Device import Device
+
+    objects: dict[str, Any] = {MANAGER_ID: Manager()}
+    streamers: dict[str, _RecordStreamer] = {}
+    lock = threading.Lock()
+
+    def stop_streamers(device_id: Optional[str] = None) -> None:
+        # Stop the streamers of a device, or of all devices, before its handle is closed
+        for object_id in list(streamers.keys()):
+            if device_id is None or object_id.startswith(f"{device_id}."):
+                streamers.pop(object_id).stop()
+
+    def resolve(value: Any) -> Any:
+        if isinstance(value, _ObjectRef):
+            return objects[value.object_id]
+        if isinstance(value, list):
+            return [resolve(item) for item in value]
+        return value
+
+    def wrap(value: Any) -> Any:
+        if isinstance(value, Device):
+            ref = _device_ref(value)
+            objects[ref.object_id] = value
+            objects[f"{ref.object_id}.AnalogInput"] = value.AnalogInput
+            objects[f"{ref.object_id}.AnalogOutput"] = value.AnalogOutput
+            return ref
+        return value
+
+    while True:
+        try:
+            object_id, method, args, kwargs = conn.recv()
+        except (EOFError, OSError):
+            break
+
+        try:
+            if method == "__shutdown__":
+                stop_streamers()
+                conn.send(("ok", None))
+                break
+            elif method == "__start_stream__":
+                channels, name, capacity, sample_rate = args
+                if object_id in streamers:
+                    streamers.pop(object_id).stop()
+                publisher = StreamPublisher(name, len(channels), capacity, sample_rate)
+                streamers[object_id] = _RecordStreamer(objects[object_id], channels, publisher, lock)
+                streamers[object_id].start()
+                result = None
+            elif method == "__stop_stream__":
+                if object_id in streamers:
+                    streamers.pop(object_id).stop()
+                result = None
+            elif method == "__stream_error__":
+                result = streamers[object_id].error if object_id in streamers else None
+            elif method == "__getattr__":
+                result = getattr(objects[object_id], args[0])
+            else:
+                if method == "close_device" and args and isinstance(args[0], _ObjectRef):
+                    stop_streamers(args[0].object_id)
+                elif method == "close_all_devices":
+                    stop_streamers()
+                with lock:
+                    result = getattr(objects[object_id], method)(*resolve(list(args)), **kwargs)
+            conn.send(("ok", wrap(result)))
+        except DwfException as e:
+            conn.send(("error", (e.code, e.error, e.message)))
+        except Exception as e:
+            conn.send(("error", (RemoteError.REMOTE_EXCEPTION.value, type(e).__name__, str(e))))
+
+
+class _RemoteClient:
+    # Parent process side of the connection to the acquisition process
+    def __init__(self, python_executable: Optional[str] = None):
+        context = multiprocessing.get_context("spawn")
+
+        # Embedded interpreters (e.g. DASYLab) report the host application as sys.executable
+        if python_executable:
+            context.set_executable(python_executable)
+        elif sys.platform.startswith("win") and not os.path.basename(sys.executable).lower().startswith("python"):
+            context.set_executable(os.path.join(sys.exec_prefix, "python.exe"))
+
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child_conn,), daemon=True)
+        self.process.start()
+        self._lock = threading.Lock()
+        self.devices: dict[str, RemoteDevice] = {}  # Devices opened through this client, by object id
+
+    def call(self, object_id: str, method: str, *args, **kwargs) -> Any:
+        args = tuple(_to_ref(arg) for arg in args)
+        with self._lock:
+            if not self.process.is_alive():
+                msg = "The acquisition process is not running"
+                raise DwfException(RemoteError.PROCESS_NOT_RUNNING.value, msg, msg)
+            self._conn.send((object_id, method, args, kwargs))
+            status, result = self._conn.recv()
+
+        if status == "error":
+            code, error, message = result
+            raise DwfException(code, error, message)
+        if isinstance(result, _ObjectRef) and result.object_id.startswith("device:"):
+            self.devices[result.object_id] = RemoteDevice(self, result)
+            return self.devices[result.object_id]
+        return result
+
+    def close(self) -> None:
+        try:
+            self.call(MANAGER_ID, "__shutdown__")
+        except Exception:
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def _to_ref(value: Any) -> Any:
+    if isinstance(value, _RemoteObject):
+        return _ObjectRef(value._object_id)
+    if isinstance(value, list):
+        return [_to_ref(item) for item in value]
+    return value
+
+
+class _RemoteObject:
+    # Forwards method calls to the matching object in the acquisition process
+    def __init__(self, client: _RemoteClient, object_id: str):
+        self._client = client
+        self._object_id = object_id
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def remote_method(*args, **kwargs):
+            return self._client.call(self._object_id, name, *args, **kwargs)
+
+        return remote_method
+
+    def get_remote_attribute(self, name: str) -> Any:
+        return self._client.call(self._object_id, "__getattr__", name)
+
+
+class RemoteAnalogIn(_RemoteObject):
+    # Analog input proxy.  Record mode data is read by the acquisition process and returned through shared memory,
+    # so acquisition keeps running while this interpreter is busy.
+    channel_count: int
+    STREAM_SECONDS = 10
+
+    def __init__(self, client: _RemoteClient, object_id: str, channel_count: int):
+        super().__init__(client, object_id)
+        self.channel_count = channel_count
+        self._subscriber: Optional[StreamSubscriber] = None
+        self._stream_channels: list[int] = []
+        self._pending_view: Any = None
+        self._next_sample_index = 0
+        self._ai_lost_count = 0
+        self._ai_corrupted_count = 0
+        self.sample_rate = 0.0
+        self.sample_clock = SampleClock(0)
+
+    def record(self, channels: list[int], sample_rate: float, num_samples: float = -1, range: float = 5):
+        self._client.call(self._object_id, "record", channels, sample_rate, num_samples, range)
+        self._start_stream(channels, sample_rate)
+
+    def apply(self, config: Any, start: bool = False) -> int:
+        num_changes = self._client.call(self._object_id, "apply", config, start)
+        if start and config.channels:
+            channels = sorted(channel for channel, settings in config.channels.items() if settings.enabled)
+            self._start_stream(channels, config.sample_rate or self.sample_rate)
+        return num_changes
+
+    def warm_restart(self) -> None:
+        self._client.call(self._object_id, "warm_restart")
+        self._start_stream(self._stream_channels, self.sample_rate)
+
+    def stop(self) -> None:
+        self._stop_stream()
+        self._client.call(self._object_id, "stop")
+
+    def read_block(self, channels: list[int]) -> AiBlock:
+        # Read the samples published since the last call, up to the first gap
+        channel_indices = self._get_channel_indices(channels)
+        data: list[list[float]] = [[] for _ in channels]
+        first_sample_index = self._next_sample_index
+        lost = 0
+
+        while self._subscriber:
+            view = self._pending_view if self._pending_view else self._subscriber.read()
+            self._pending_view = None
+            if view is None:
+                if len(data[0]) == 0:
+                    self._check_stream_error()
+                break
+
+            gap = view.first_sample_index - self._next_sample_index
+            if len(data[0]) > 0 and gap > 0:
+                # Keep the gap for the next block
+                self._pending_view = view
+                break
+            if len(data[0]) == 0:
+                first_sample_index = view.first_sample_index
+                lost = max(0, gap)
+
+            samples = view.data[channel_indices].tolist()
+            for channel_index in range(0, len(channels)):
+                data[channel_index] += samples[channel_index]
+            self._next_sample_index = view.first_sample_index + view.data.shape[1]
+
+        self._ai_lost_count += lost
+        if len(data[0]) > 0:
+            self.sample_clock.update(self._next_sample_index)
+        host_time = self.sample_clock.host_time_of(first_sample_index)
+        return AiBlock(data, channels, first_sample_index, lost, 0, self.sample_rate, host_time)
+
+    def read_available_samples(self, channels: list[int]) -> tuple[list[list[float]], int, int]:
+        block = self.read_block(channels)
+        return (block.data, self._ai_lost_count, self._ai_corrupted_count)
+
+    def read_samples_blocking(
+        self, ai_channels: list[int], num_samples: int, timeout_ms: float = 5000
+    ) -> tuple[list[list[float]], int, int]:
+        timeout_time = time.time() + timeout_ms / 1000
+        lost_count = self._ai_lost_count
+        corrupted_count = self._ai_corrupted_count
+        sample_data: list[list[float]] = [[] for _ in ai_channels]
+        while len(sample_data[0]) < num_samples:
+            if time.time() > timeout_time:
+                msg = f"Timeout waiting for AI sample data.  Read ({len(sample_data[0])}) out of requested ({num_samples}) samples in ({timeout_ms / 1000}) seconds."
+                raise DwfException(AnalogInputErorr.TIMEOUT_WAITING_SAMPLES.value, msg, msg)
+            data, _, _ = self.read_available_samples(ai_channels)
+            for channel_index in range(0, len(ai_channels)):
+                sample_data[channel_index] += data[channel_index]
+            time.sleep(0.01)
+
+        sample_data = [channel_data[0:num_samples] for channel_data in sample_data]
+        # Samples lost / corrupted during this read only
+        return (sample_data, self._ai_lost_count - lost_count, self._ai_corrupted_count - corrupted_count)
+
+    def get_subscriber_overrun_count(self) -> int:
+        # Samples published by the acquisition process but overwritten before this process read them
+        return self._subscriber.overrun_count if self._subscriber else 0
+
+    def _start_stream(self, channels: list[int], sample_rate: float) -> None:
+        self._stop_stream()
+        name = f"dwf_{uuid.uuid4().hex[0:16]}"
+        capacity = max(1024, int(sample_rate * self.STREAM_SECONDS))
+        self._client.call(self._object_id, "__start_stream__", channels, name, capacity, sample_rate)
+        self._subscriber = StreamSubscriber(name, from_oldest=True, track=True)
+        self._stream_channels = channels
+        self.sample_rate = sample_rate
+        self.sample_clock.reset(sample_rate)
+        self._pending_view = None
+        self._next_sample_index = 0
+        self._ai_lost_count = 0
+        self._ai_corrupted_count = 0
+
+    def _stop_stream(self) -> None:
+        if self._subscriber:
+            self._subscriber.close()
+            self._subscriber = None
+            if self._client.process.is_alive():
+                self._client.call(self._object_id, "__stop_stream__")
+
+    def _check_stream_error(self) -> None:
+        # Raise the error that stopped the acquisition process' streamer, once its published samples are read
+        if self._subscriber and self._subscriber.get_error_code():
+            error = self._client.call(self._object_id, "__stream_error__")
+            code, error, message = error if error else (self._subscriber.get_error_code(), "", "")
+            message = f"Record streaming stopped in the acquisition process: {message}"
+            raise DwfException(code, error, message)
+
+    def _get_channel_indices(self, channels: list[int]) -> list[int]:
+        try:
+            return [self._stream_channels.index(channel) for channel in channels]
+        except ValueError:
+            msg = f"Channels {channels} are not all being recorded (recording {self._stream_channels})"
+            raise DwfException(AnalogInputErorr.INVALID_CHANNEL.value, msg, msg)
+
+
+class RemoteDevice(_RemoteObject):
+    # Device proxy with the same attributes and subsystems as Device
+    device_index: int
+    name: str
+    revision: int
+    serial_number: str
+    ai_count: int
+    ao_count: int
+    AnalogInput: RemoteAnalogIn
+    AnalogOutput: _RemoteObject
+
+    def __init__(self, client: _RemoteClient, ref: _ObjectRef):
+        super().__init__(client, ref.object_id)
+        for name, value in ref.attributes.items():
+            setattr(self, name, value)
+        self.AnalogInput = RemoteAnalogIn(client, f"{ref.object_id}.AnalogInput", self.ai_count)
+        self.AnalogOutput = _RemoteObject(client, f"{ref.object_id}.AnalogOutput")
+
+
+class RemoteManager(_RemoteObject):
+    # Manager that runs the WaveForms SDK and record mode reading in a dedicated acquisition process, so the GIL of
+    # this interpreter can't starve acquisition.  Exposes the same API as Manager, devices are RemoteDevice proxies.
+    module_version: str
+
+    def __init__(self, python_executable: Optional[str] = None):
+        super().__init__(_RemoteClient(python_executable), MANAGER_ID)
+        self.module_version = self.get_remote_attribute("module_version")
+        Logger.debug("Acquisition process started (pid %d)", self._client.process.pid)
+
+    def close_device(self, device: RemoteDevice) -> None:
+        device.AnalogInput._stop_stream()
+        self._client.devices.pop(device._object_id, None)
+        self._client.call(MANAGER_ID, "close_device", device)
+
+    def close_all_devices(self) -> None:
+        self._stop_all_streams()
+        self._client.call(MANAGER_ID, "close_all_devices")
+
+    def shutdown(self) -> None:
+        # Stop the acquisition process
+        self._stop_all_streams()
+        self._client.close()
+
+    def _stop_all_streams(self) -> None:
+        # Unmap the shared memory streams of every open device, the acquisition process stops their streamers
+        for device in self._client.devices.values():
+            device.AnalogInput._stop_stream()
+        self._client.devices = {}
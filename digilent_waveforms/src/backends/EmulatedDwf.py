@@ -0,0 +1,501 @@
+from ctypes import addressof, c_ubyte
+from typing import Any, Callable, Optional
+import time
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.constants.ai_types import AiAcquisitionMode, InstrumentState
+from digilent_waveforms.src.constants.dwf_types import DeviceType
+from digilent_waveforms.src.constants.dwfconstants import funcDC, trigsrcAnalogOut1, trigsrcNone
+
+
+def _value(arg: Any) -> Any:
+    # Value of a ctypes scalar or a plain Python value
+    return arg.value if hasattr(arg, "value") else arg
+
+
+def _target(arg: Any) -> Any:
+    # Object referenced by byref(), or the object itself (arrays and string buffers may be passed directly)
+    return arg._obj if hasattr(arg, "_obj") else arg
+
+
+def _set(arg: Any, value: Any) -> None:
+    _target(arg).value = value
+
+
+def _array(buffer: Any, dtype: Any, count: int) -> np.ndarray:
+    # numpy view of a sample buffer passed as an address (c_void_p), a ctypes array or byref() of one
+    address = _value(buffer) if isinstance(_value(buffer), int) else addressof(_target(buffer))
+    return np.frombuffer((c_ubyte * (count * np.dtype(dtype).itemsize)).from_address(address), dtype=dtype)
+
+
+class EmulatedRecord:
+    # Acquisition state of an emulated instrument.  Samples are provided by the source callback:
+    # source(start, count) -> array of the count samples at source position start.  In record mode positions count
+    # from the start of the acquisition, in a single acquisition from the trigger (negative before it).
+    def __init__(
+        self,
+        source: Optional[Callable[[int, int], np.ndarray]],
+        source_length: int = -1,
+        gaps: Optional[dict[int, int]] = None,
+        sample_rate: Optional[float] = None,
+        buffer_size: int = 32768,
+    ):
+        self.source = source
+        self.source_length = source_length  # -1: endless
+        self.gaps = gaps if gaps else {}  # Source position: samples lost before it
+        self.fixed_sample_rate = sample_rate  # The device runs at this rate whatever is requested (e.g. a replay)
+        self.sample_rate = sample_rate if sample_rate else 1000.0
+        self.buffer_size = buffer_size
+        self.acquisition_mode = AiAcquisitionMode.Record.value
+        self.trigger_source = trigsrcNone.value
+        self.trigger_position = 0.0  # Seconds from the trigger to the middle of the buffer
+        self.trigger_auto_timeout = 0.0
+        self.running = False
+        self.reset()
+
+    def reset(self) -> None:
+        self._start_time = 0.0
+        self._trigger_time: Optional[float] = None
+        self._position = 0  # Source position of the next sample to deliver
+        self._acquired = 0  # Samples acquired by the device since the start
+        self._pending_lost = 0
+        self._status_start = 0
+        self._status_count = 0
+        self._status_data: Optional[np.ndarray] = None
+
+    def start(self) -> None:
+        self.reset()
+        self.running = True
+        self._start_time = time.perf_counter()
+        if self.is_single() and self.trigger_source == trigsrcNone.value:
+            self.trigger(self._start_time)
+
+    def is_single(self) -> bool:
+        return self.acquisition_mode == AiAcquisitionMode.Single.value
+
+    def trigger(self, trigger_time: Optional[float] = None) -> None:
+        # Only the first trigger of an armed single acquisition counts
+        if self.running and self.is_single() and self._trigger_time is None:
+            self._trigger_time = time.perf_counter() if trigger_time is None else trigger_time
+
+    def get_capture_end(self) -> float:
+        # Seconds from the trigger to the last sample of a single acquisition
+        return self.trigger_position + self.buffer_size / self.sample_rate / 2
+
+    def read_capture(self) -> None:
+        # The buffer of a done single acquisition becomes the status data
+        self._status_start = int(round(self.trigger_position * self.sample_rate - self.buffer_size / 2))
+        self._status_count = self.buffer_size
+        self._status_data = None
+
+    def get_state(self) -> InstrumentState:
+        if not self.running:
+            return InstrumentState.Ready
+        if self.source_length >= 0 and self._position >= self.source_length:
+            return InstrumentState.Done
+        return InstrumentState.Running
+
+    def get_status_data(self) -> np.ndarray:
+        # Samples of the last status read
+        if self._status_data is None:
+            self._status_data = self.source(self._status_start, self._status_count)
+        return self._status_data
+
+
+class EmulatedDevice:
+    # An emulated device.  Analog input samples are provided by the source callback, a (channels, count) array of
+    # samples, digital input record mode samples by digital_source, count packed integer samples.  The analog output
+    # only keeps its settings per channel, a source may generate them (e.g. a loopback).
+    serial_number: str
+    name: str
+    device_type: DeviceType
+    revision: int
+    ai_count: int
+    ao_count: int
+    di_count: int
+    analog_in: EmulatedRecord
+    digital_in: EmulatedRecord
+    analog_out: list[dict[str, Any]]
+
+    def __init__(
+        self,
+        serial_number: str,
+        source: Optional[Callable[[int, int], np.ndarray]],
+        ai_count: int,
+        name: str = "Emulated",
+        device_type: DeviceType = DeviceType.ANALOG_DISCOVERY_2,
+        revision: int = 1,
+        ao_count: int = 2,
+        source_length: int = -1,
+        gaps: Optional[dict[int, int]] = None,
+        sample_rate: Optional[float] = None,
+        digital_source: Optional[Callable[[int, int], np.ndarray]] = None,
+        di_count: int = 0,
+    ):
+        self.serial_number = serial_number
+        self.name = name
+        self.device_type = device_type
+        self.revision = revision
+        self.ai_count = ai_count
+        self.ao_count = ao_count
+        self.di_count = di_count if digital_source else 0
+        self.is_open = False
+        self.analog_in = EmulatedRecord(source, source_length, gaps, sample_rate, EmulatedDwf.BUFFER_SIZE_MAX)
+        self.digital_in = EmulatedRecord(digital_source, buffer_size=EmulatedDwf.DI_BUFFER_SIZE_MAX)
+        self.digital_in.sample_rate = EmulatedDwf.DI_CLOCK_FREQUENCY
+        self.di_sample_format = 16
+        self.analog_out = [
+            {"enabled": False, "function": funcDC.value, "frequency": 1000.0, "amplitude": 1.0, "offset": 0.0}
+            for _ in range(0, ao_count)
+        ]
+        self.ao_running = [False] * ao_count
+
+    def reset(self) -> None:
+        self.analog_in.reset()
+        self.digital_in.reset()
+        self.analog_in.running = False
+        self.digital_in.running = False
+        self.ao_running = [False] * self.ao_count
+
+    def get_ao_channels(self, channel: int) -> list[int]:
+        # Channel -1 addresses all channels
+        return list(range(0, self.ao_count)) if channel == -1 else [channel]
+
+
+class EmulatedDwf:
+    # Stand-in for the WaveForms SDK library (the dwf object used by Manager, Device and the subsystems).  Implements
+    # enumeration, device open/close, analog and digital input record mode, analog input single acquisitions with
+    # their trigger (none, auto timeout or an analog output start) and the analog output settings, with ctypes argument
+    # semantics, other FDwf calls succeed without effect.  Samples are acquired at speed x real time (0: as fast as they are read, never lost).
+    BUFFER_SIZE_MIN = 16
+    BUFFER_SIZE_MAX = 32768
+    SAMPLE_RATE_MAX = 100e6
+    AI_CLOCK_FREQUENCY = 100e6  # Like the hardware, the sample rate is this clock divided by an integer
+    RANGE_STEPS = [0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50]
+    DI_CLOCK_FREQUENCY = 100e6
+    DI_DIVIDER_MAX = 2**30
+    DI_BUFFER_SIZE_MAX = 4096
+
+    devices: list[EmulatedDevice]
+    speed: float
+
+    def __init__(self, devices: list[EmulatedDevice], speed: float = 1.0):
+        self.devices = devices
+        self.speed = speed
+        self.last_error = ""
+
+    def __getattr__(self, name: str) -> Callable[..., int]:
+        if not name.startswith("FDwf"):
+            raise AttributeError(name)
+
+        def not_emulated(*args) -> int:
+            return 1
+
+        return not_emulated
+
+    # ---------- Enumeration ----------
+    def FDwfGetVersion(self, version) -> int:
+        _set(version, b"emulated")
+        return 1
+
+    def FDwfGetLastErrorMsg(self, message) -> int:
+        _set(message, self.last_error.encode("utf-8"))
+        return 1
+
+    def FDwfEnum(self, filter, num_devices) -> int:
+        _set(num_devices, len(self.devices))
+        return 1
+
+    def FDwfEnumDeviceName(self, index, name) -> int:
+        _set(name, self.devices[_value(index)].name.encode("utf-8"))
+        return 1
+
+    def FDwfEnumSN(self, index, serial_number) -> int:
+        _set(serial_number, f"SN:{self.devices[_value(index)].serial_number}".encode("utf-8"))
+        return 1
+
+    def FDwfEnumDeviceType(self, index, device_id, revision) -> int:
+        device = self.devices[_value(index)]
+        _set(device_id, device.device_type.value)
+        _set(revision, device.revision)
+        return 1
+
+    def FDwfEnumDeviceIsOpened(self, index, is_used) -> int:
+        _set(is_used, int(self.devices[_value(index)].is_open))
+        return 1
+
+    # ---------- Device ----------
+    def FDwfDeviceOpen(self, index, handle) -> int:
+        index = _value(index)
+        if index < 0:
+            index = next((i for i, device in enumerate(self.devices) if not device.is_open), len(self.devices))
+        if index >= len(self.devices) or self.devices[index].is_open:
+            self.last_error = f"Device at index ({index}) is not available"
+            _set(handle, 0)
+            return 0
+        self.devices[index].is_open = True
+        self.devices[index].reset()
+        _set(handle, index + 1)
+        return 1
+
+    def FDwfDeviceClose(self, handle) -> int:
+        device = self._get_device(handle)
+        device.is_open = False
+        device.reset()
+        return 1
+
+    def FDwfDeviceCloseAll(self) -> int:
+        for device in self.devices:
+            device.is_open = False
+            device.reset()
+        return 1
+
+    def FDwfAnalogInChannelCount(self, handle, count) -> int:
+        _set(count, self._get_device(handle).ai_count)
+        return 1
+
+    def FDwfAnalogOutCount(self, handle, count) -> int:
+        _set(count, self._get_device(handle).ao_count)
+        return 1
+
+    # ---------- Analog input ----------
+    def FDwfAnalogInFrequencySet(self, handle, sample_rate) -> int:
+        record = self._get_device(handle).analog_in
+        if not record.fixed_sample_rate:
+            sample_rate = min(max(float(_value(sample_rate)), 1e-3), self.SAMPLE_RATE_MAX)
+            record.sample_rate = self.AI_CLOCK_FREQUENCY / max(1, round(self.AI_CLOCK_FREQUENCY / sample_rate))
+        return 1
+
+    def FDwfAnalogInFrequencyGet(self, handle, sample_rate) -> int:
+        _set(sample_rate, self._get_device(handle).analog_in.sample_rate)
+        return 1
+
+    def FDwfAnalogInFrequencyInfo(self, handle, minimum, maximum) -> int:
+        _set(minimum, 1e-3)
+        _set(maximum, self.SAMPLE_RATE_MAX)
+        return 1
+
+    def FDwfAnalogInBufferSizeInfo(self, handle, minimum, maximum) -> int:
+        _set(minimum, self.BUFFER_SIZE_MIN)
+        _set(maximum, self.BUFFER_SIZE_MAX)
+        return 1
+
+    def FDwfAnalogInBufferSizeSet(self, handle, buffer_size) -> int:
+        buffer_size = min(max(int(_value(buffer_size)), self.BUFFER_SIZE_MIN), self.BUFFER_SIZE_MAX)
+        self._get_device(handle).analog_in.buffer_size = buffer_size
+        return 1
+
+    def FDwfAnalogInBufferSizeGet(self, handle, buffer_size) -> int:
+        _set(buffer_size, self._get_device(handle).analog_in.buffer_size)
+        return 1
+
+    def FDwfAnalogInChannelRangeInfo(self, handle, minimum, maximum, num_steps) -> int:
+        _set(minimum, self.RANGE_STEPS[0])
+        _set(maximum, self.RANGE_STEPS[-1])
+        _set(num_steps, len(self.RANGE_STEPS))
+        return 1
+
+    def FDwfAnalogInChannelRangeSteps(self, handle, steps, num_steps) -> int:
+        steps = _target(steps)
+        for i in range(0, len(self.RANGE_STEPS)):
+            steps[i] = self.RANGE_STEPS[i]
+        _set(num_steps, len(self.RANGE_STEPS))
+        return 1
+
+    def FDwfAnalogInAcquisitionModeSet(self, handle, mode) -> int:
+        self._get_device(handle).analog_in.acquisition_mode = int(_value(mode))
+        return 1
+
+    def FDwfAnalogInTriggerSourceSet(self, handle, source) -> int:
+        self._get_device(handle).analog_in.trigger_source = int(_value(source))
+        return 1
+
+    def FDwfAnalogInTriggerPositionSet(self, handle, position) -> int:
+        self._get_device(handle).analog_in.trigger_position = float(_value(position))
+        return 1
+
+    def FDwfAnalogInTriggerAutoTimeoutSet(self, handle, timeout) -> int:
+        self._get_device(handle).analog_in.trigger_auto_timeout = float(_value(timeout))
+        return 1
+
+    def FDwfAnalogInConfigure(self, handle, reconfigure, start) -> int:
+        self._configure(self._get_device(handle).analog_in, _value(start))
+        return 1
+
+    def FDwfAnalogInStatus(self, handle, read_data, status) -> int:
+        record = self._get_device(handle).analog_in
+        if record.running and record.is_single():
+            _set(status, self._get_single_state(record, bool(_value(read_data))).value)
+        else:
+            _set(status, record.get_state().value)
+        return 1
+
+    def FDwfAnalogInStatusRecord(self, handle, available, lost, corrupted) -> int:
+        self._status_record(self._get_device(handle).analog_in, available, lost, corrupted)
+        return 1
+
+    def FDwfAnalogInStatusData(self, handle, channel, buffer, num_samples) -> int:
+        record = self._get_device(handle).analog_in
+        num_samples = min(int(_value(num_samples)), record._status_count)
+        _array(buffer, np.float64, num_samples)[:] = record.get_status_data()[_value(channel), 0:num_samples]
+        return 1
+
+    # ---------- Analog output ----------
+    def FDwfAnalogOutEnableSet(self, handle, channel, enabled) -> int:
+        return self._set_ao(handle, channel, "enabled", bool(_value(enabled)))
+
+    def FDwfAnalogOutFunctionSet(self, handle, channel, function) -> int:
+        return self._set_ao(handle, channel, "function", int(_value(function)))
+
+    def FDwfAnalogOutFrequencySet(self, handle, channel, frequency) -> int:
+        return self._set_ao(handle, channel, "frequency", float(_value(frequency)))
+
+    def FDwfAnalogOutAmplitudeSet(self, handle, channel, amplitude) -> int:
+        return self._set_ao(handle, channel, "amplitude", float(_value(amplitude)))
+
+    def FDwfAnalogOutOffsetSet(self, handle, channel, offset) -> int:
+        return self._set_ao(handle, channel, "offset", float(_value(offset)))
+
+    def FDwfAnalogOutConfigure(self, handle, channel, start) -> int:
+        # 0 stops, 1 (re)starts and triggers an analog input armed on the channel, 3 applies without a restart
+        device = self._get_device(handle)
+        start = _value(start)
+        for ao_channel in device.get_ao_channels(_value(channel)):
+            if start == 0:
+                device.ao_running[ao_channel] = False
+            elif start == 1:
+                device.ao_running[ao_channel] = True
+                if device.analog_in.trigger_source == trigsrcAnalogOut1.value + ao_channel:
+                    device.analog_in.trigger()
+        return 1
+
+    # ---------- Digital input ----------
+    def FDwfDigitalInBitsInfo(self, handle, num_bits) -> int:
+        _set(num_bits, self._get_device(handle).di_count)
+        return 1
+
+    def FDwfDigitalInInternalClockInfo(self, handle, frequency) -> int:
+        _set(frequency, self.DI_CLOCK_FREQUENCY)
+        return 1
+
+    def FDwfDigitalInDividerInfo(self, handle, divider_max) -> int:
+        _set(divider_max, self.DI_DIVIDER_MAX)
+        return 1
+
+    def FDwfDigitalInDividerSet(self, handle, divider) -> int:
+        divider = min(max(int(_value(divider)), 1), self.DI_DIVIDER_MAX)
+        self._get_device(handle).digital_in.sample_rate = self.DI_CLOCK_FREQUENCY / divider
+        return 1
+
+    def FDwfDigitalInDividerGet(self, handle, divider) -> int:
+        _set(divider, int(round(self.DI_CLOCK_FREQUENCY / self._get_device(handle).digital_in.sample_rate)))
+        return 1
+
+    def FDwfDigitalInBufferSizeInfo(self, handle, buffer_size_max) -> int:
+        _set(buffer_size_max, self.DI_BUFFER_SIZE_MAX)
+        return 1
+
+    def FDwfDigitalInBufferSizeSet(self, handle, buffer_size) -> int:
+        buffer_size = min(max(int(_value(buffer_size)), self.BUFFER_SIZE_MIN), self.DI_BUFFER_SIZE_MAX)
+        self._get_device(handle).digital_in.buffer_size = buffer_size
+        return 1
+
+    def FDwfDigitalInSampleFormatSet(self, handle, num_bits) -> int:
+        self._get_device(handle).di_sample_format = int(_value(num_bits))
+        return 1
+
+    def FDwfDigitalInConfigure(self, handle, reconfigure, start) -> int:
+        self._configure(self._get_device(handle).digital_in, _value(start))
+        return 1
+
+    def FDwfDigitalInStatus(self, handle, read_data, status) -> int:
+        _set(status, self._get_device(handle).digital_in.get_state().value)
+        return 1
+
+    def FDwfDigitalInStatusRecord(self, handle, available, lost, corrupted) -> int:
+        self._status_record(self._get_device(handle).digital_in, available, lost, corrupted)
+        return 1
+
+    def FDwfDigitalInStatusData(self, handle, buffer, num_bytes) -> int:
+        device = self._get_device(handle)
+        dtype = {8: np.uint8, 16: np.uint16, 32: np.uint32}[device.di_sample_format]
+        num_samples = min(int(_value(num_bytes)) // np.dtype(dtype).itemsize, device.digital_in._status_count)
+        _array(buffer, dtype, num_samples)[:] = device.digital_in.get_status_data()[0:num_samples]
+        return 1
+
+    # ---------- Helpers ----------
+    def _get_device(self, handle: Any) -> EmulatedDevice:
+        return self.devices[_value(handle) - 1]
+
+    def _configure(self, record: EmulatedRecord, start: Any) -> None:
+        if start:
+            record.start()
+        else:
+            record.running = False
+
+    def _set_ao(self, handle: Any, channel: Any, name: str, value: Any) -> int:
+        device = self._get_device(handle)
+        for ao_channel in device.get_ao_channels(_value(channel)):
+            device.analog_out[ao_channel][name] = value
+        return 1
+
+    def _get_single_state(self, record: EmulatedRecord, read_data: bool) -> InstrumentState:
+        # Armed until the trigger (or the auto timeout), then triggered until the samples up to the end of the buffer
+        # are acquired.  Reading the status of a done acquisition reads its buffer.
+        if record._trigger_time is None:
+            if record.trigger_auto_timeout <= 0:
+                return InstrumentState.Armed
+            auto_time = record._start_time + (record.trigger_auto_timeout / self.speed if self.speed > 0 else 0)
+            if time.perf_counter() < auto_time:
+                return InstrumentState.Armed
+            record.trigger(auto_time)
+
+        if self.speed > 0 and time.perf_counter() < record._trigger_time + record.get_capture_end() / self.speed:
+            return InstrumentState.Triggered
+        if read_data:
+            record.read_capture()
+        return InstrumentState.Done
+
+    def _status_record(self, record: EmulatedRecord, available: Any, lost: Any, corrupted: Any) -> None:
+        num_available, num_lost = self._acquire(record) if record.running else (0, 0)
+        _set(available, num_available)
+        _set(lost, num_lost)
+        _set(corrupted, 0)
+
+    def _acquire(self, record: EmulatedRecord) -> tuple[int, int]:
+        # Advance the emulated acquisition, returns (available, lost) like FDwfAnalogInStatusRecord
+        remaining = record.source_length - record._position if record.source_length >= 0 else -1
+
+        if self.speed > 0:
+            elapsed = time.perf_counter() - record._start_time
+            record._acquired = max(record._acquired, int(elapsed * record.sample_rate * self.speed))
+            unread = record._acquired - record._position
+            if remaining >= 0:
+                unread = min(unread, remaining)
+        else:
+            unread = record.buffer_size if remaining < 0 else min(record.buffer_size, remaining)
+
+        # Samples the host did not read in time are overwritten in the device buffer
+        lost = record._pending_lost
+        record._pending_lost = 0
+        if unread > record.buffer_size:
+            overwritten_end = record._position + unread - record.buffer_size
+            lost += overwritten_end - record._position
+            lost += sum(n for position, n in record.gaps.items() if record._position < position <= overwritten_end)
+            record._position = overwritten_end
+            unread = record.buffer_size
+
+        # A recorded gap ends the read, it is reported as lost by the next one
+        for gap_position, gap_lost in record.gaps.items():
+            if record._position < gap_position <= record._position + unread:
+                unread = gap_position - record._position
+                record._pending_lost += gap_lost
+                break
+
+        record._status_start = record._position
+        record._status_count = max(0, unread)
+        record._status_data = None
+        record._position += record._status_count
+        return (record._status_count, lost)
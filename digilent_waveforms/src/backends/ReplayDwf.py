@@ -0,0 +1,46 @@
+from typing import Union
+import os
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.backends.EmulatedDwf import EmulatedDevice, EmulatedDwf
+from digilent_waveforms.src.components.StreamRecorder import StreamRecording
+
+
+class ReplayDwf(EmulatedDwf):
+    # Serves recordings through the WaveForms SDK interface, use with Manager(dwf=ReplayDwf(...)).  Each recording is
+    # a device that acquires the recorded samples at the recorded sample rate, recorded gaps are reported as lost
+    # samples.  speed: 1 real time, N for N x real time, 0 as fast as the samples are read.
+    recordings: list[StreamRecording]
+
+    def __init__(self, recordings: list[Union[str, StreamRecording]], speed: float = 1.0, ai_count: int = 0):
+        self.recordings = [
+            recording if isinstance(recording, StreamRecording) else StreamRecording(recording)
+            for recording in recordings
+        ]
+        devices: list[EmulatedDevice] = []
+        for index, recording in enumerate(self.recordings):
+            num_channels = max(ai_count, max(recording.channels) + 1 if recording.channels else 0)
+            devices.append(
+                EmulatedDevice(
+                    f"REPLAY{index:02d}",
+                    self._get_source(recording, num_channels),
+                    num_channels,
+                    name=f"Replay {os.path.basename(recording.path)}",
+                    source_length=recording.num_samples,
+                    gaps=dict(recording.gaps),
+                    sample_rate=recording.sample_rate,
+                )
+            )
+        super().__init__(devices, speed)
+
+    def _get_source(self, recording: StreamRecording, num_channels: int):
+        # Device channel n plays the recorded channel n, channels that were not recorded read 0
+        def source(start: int, count: int) -> np.ndarray:
+            samples = np.zeros((num_channels, count))
+            recorded = recording.read(start, count)
+            samples[recording.channels, 0 : recorded.shape[1]] = recorded
+            return samples
+
+        return source
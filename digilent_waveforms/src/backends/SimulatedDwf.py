@@ -0,0 +1,91 @@
+from typing import Optional
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.backends.EmulatedDwf import EmulatedDevice, EmulatedDwf
+from digilent_waveforms.src.constants.dwf_types import DeviceType
+from digilent_waveforms.src.constants.dwfconstants import funcSine, trigsrcAnalogOut1
+
+
+class SimulatedDwf(EmulatedDwf):
+    # Simulated devices for tests without hardware, use with Manager(dwf=SimulatedDwf(...)).  Every analog input
+    # channel acquires a sine (phase shifted by channel) plus noise, at the requested sample rate.  A single acquisition
+    # triggered by an analog output channel instead captures that channel's output, looped back: the first analog
+    # input channel directly, the others through a first order low-pass filter of cutoff Hz (e.g. the device under
+    # test of a frequency sweep).  The digital input lines count in binary: line n toggles every 2^n samples.
+    NOISE_TABLE_SIZE = 65536
+
+    def __init__(
+        self,
+        num_devices: int = 1,
+        ai_count: int = 2,
+        speed: float = 1.0,
+        frequency: float = 1000,
+        amplitude: float = 1.0,
+        noise: float = 0.01,
+        device_type: DeviceType = DeviceType.ANALOG_DISCOVERY_2,
+        di_count: int = 16,
+        cutoff: float = 1000,
+    ):
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.cutoff = cutoff
+        self._noise = np.random.default_rng(0).normal(0, noise, self.NOISE_TABLE_SIZE) if noise > 0 else None
+        self._phases = (np.arange(0, ai_count) * np.pi / 2)[:, np.newaxis]
+
+        devices: list[EmulatedDevice] = []
+        for index in range(0, num_devices):
+            device = EmulatedDevice(
+                f"SIM{index:06d}",
+                None,
+                ai_count,
+                name="Simulated",
+                device_type=device_type,
+                digital_source=self._get_digital_source(di_count),
+                di_count=di_count,
+            )
+            device.analog_in.source = self._get_source(device)
+            devices.append(device)
+        super().__init__(devices, speed)
+
+    def _get_source(self, device: EmulatedDevice):
+        def source(start: int, count: int) -> np.ndarray:
+            positions = np.arange(start, start + count)
+            samples = self._get_loopback_samples(device, positions)
+            if samples is None:
+                samples = self.amplitude * np.sin(
+                    2 * np.pi * self.frequency / device.analog_in.sample_rate * positions + self._phases
+                )
+            if self._noise is not None:
+                samples += self._noise[positions % self.NOISE_TABLE_SIZE]
+            return samples
+
+        return source
+
+    def _get_loopback_samples(self, device: EmulatedDevice, positions: np.ndarray) -> Optional[np.ndarray]:
+        # Steady state response to the analog output channel that triggered a single acquisition, positions count
+        # samples from the trigger (the output start)
+        ao_channel = device.analog_in.trigger_source - trigsrcAnalogOut1.value
+        if not device.analog_in.is_single() or ao_channel < 0 or ao_channel >= device.ao_count:
+            return None
+        settings = device.analog_out[ao_channel]
+        samples = np.full((device.ai_count, len(positions)), settings["offset"])
+        if settings["function"] == funcSine.value:
+            gains = np.ones(device.ai_count, dtype=complex)
+            gains[1:] = 1 / (1 + 1j * settings["frequency"] / self.cutoff)
+            times = positions / device.analog_in.sample_rate
+            samples += (
+                settings["amplitude"]
+                * np.abs(gains)[:, np.newaxis]
+                * np.sin(2 * np.pi * settings["frequency"] * times + np.angle(gains)[:, np.newaxis])
+            )
+        return samples
+
+    def _get_digital_source(self, di_count: int):
+        mask = (1 << di_count) - 1
+
+        def digital_source(start: int, count: int) -> np.ndarray:
+            return np.arange(start, start + count, dtype=np.uint64) & np.uint64(mask)
+
+        return digital_source
@@ -1,13 +1,30 @@
 from ctypes import *  # type: ignore
+from typing import Any, Callable, Optional
 import time
 
+import numpy as np
+
 # Digilent WaveForms Imports
+from digilent_waveforms.src.components.BufferTuner import BufferTuner
 from digilent_waveforms.src.components.DwfAi import DwfAi
 from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.DwfLibrary import call_error
+from digilent_waveforms.src.components.SampleClock import SampleClock
 from digilent_waveforms.src.components.utils.Logger import Logger
-from digilent_waveforms.src.constants.ai_types import AiAcquisitionMode, InstrumentState
+from digilent_waveforms.src.components.utils.Trace import Trace, get_trace
+from digilent_waveforms.src.constants.ai_types import (
+    AiAcquisitionMode,
+    AiBlock,
+    AiCapture,
+    AnalogInConfig,
+    InstrumentState,
+    RECORD_THROUGHPUT,
+    RecordRatePolicy,
+)
+from digilent_waveforms.src.constants.dwf_types import DeviceType
 from digilent_waveforms.src.constants.dwfconstants import *
 from digilent_waveforms.src.constants.error_codes import AnalogInputErorr
+from digilent_waveforms.src.constants.trace_types import TraceEvent
 
 
 class AnalogIn:
@@ -21,17 +38,113 @@ class AnalogIn:
     _ai_lost_count = 0
     _ai_corrupted_count = 0
 
-    def __init__(self, dwf: CDLL, device_handle: c_int, channel_count: int):
+    # Shadow of the last state pushed to the device
+    _applied: dict[str, Any]
+    _applied_channels: dict[int, dict[str, Any]]
+
+    # Start-to-first-sample latency of the most recent acquisition, in seconds
+    first_sample_latency: Optional[float] = None
+    _start_time: Optional[float] = None
+
+    # Absolute sample counter since acquisition start, lost samples included
+    sample_index: int = 0
+
+    # Sample rate reported by the device after coercion
+    actual_sample_rate: float = 0
+    _actual_sample_rate_stale = True
+    sample_clock: SampleClock
+
+    # Optional automatic buffer size / poll interval tuning
+    buffer_tuner: Optional[BufferTuner] = None
+    _pending_lost = 0
+    # Samples a capture's last poll returned past its end: (channels, first sample index, (channels, n) array).  The
+    # next capture() / read_block() returns them first.
+    _carry_over: Optional[tuple[list[int], int, np.ndarray]] = None
+    DEFAULT_POLL_INTERVAL = 0.1
+
+    # Consumers of the block stream, called with every block read in record mode
+    _block_handlers: list[Callable[[AiBlock], None]]
+
+    # Per-poll trace events
+    _trace: Trace
+
+    # Record mode streaming throughput shared by the enabled channels, in samples per second, None if unknown
+    record_throughput: Optional[float] = None
+    # Measured lossless record rates (RateProber) by enabled channel count, used instead of the throughput
+    record_rate_limits: dict[int, float]
+    record_rate_policy: RecordRatePolicy = RecordRatePolicy.Warn
+    _sample_rate_max: Optional[float] = None
+
+    def __init__(self, dwf: CDLL, device_handle: c_int, channel_count: int, device_type: Optional[DeviceType] = None):
+        self._trace = get_trace()
         self.device_handle = device_handle
         self.channel_count = channel_count
+        self.record_throughput = RECORD_THROUGHPUT.get(device_type) if device_type else None
+        self.record_rate_limits = {}
         self.dwf = dwf
         self.dwf_ai = DwfAi(self.dwf, self.device_handle)
+        self.sample_clock = SampleClock(0)
+        self._block_handlers = []
+        self.invalidate_config()
+
+        # Setting name -> (FDwf setter, value to ctypes argument)
+        self._setting_writers = {
+            "acquisition_mode": (self.dwf.FDwfAnalogInAcquisitionModeSet, lambda mode: c_int(mode.value)),
+            "sample_rate": (self.dwf.FDwfAnalogInFrequencySet, c_double),
+            "record_length": (self.dwf.FDwfAnalogInRecordLengthSet, c_double),
+            "buffer_size": (self.dwf.FDwfAnalogInBufferSizeSet, c_int),
+        }
+        self._channel_setting_writers = {
+            "enabled": (self.dwf.FDwfAnalogInChannelEnableSet, c_int),
+            "range": (self.dwf.FDwfAnalogInChannelRangeSet, c_double),
+        }
+        self._channel_args = {channel: c_int(channel) for channel in range(-1, self.channel_count)}
+
+        # Prebuilt arguments of the status calls made at every poll, these calls check their return value inline
+        self._status = self.dwf.FDwfAnalogInStatus
+        self._status_record = self.dwf.FDwfAnalogInStatusRecord
+        self._status_data = self.dwf.FDwfAnalogInStatusData
+        self._read_data = c_int(1)
+        self._state_buffer = c_byte()
+        self._state_ref = byref(self._state_buffer)
+        self._record_buffers = (c_int(), c_int(), c_int())
+        self._record_refs = tuple(byref(buffer) for buffer in self._record_buffers)
 
     def set_sample_rate(self, sample_rate: float) -> None:
         self.dwf.FDwfAnalogInFrequencySet(self.device_handle, c_double(sample_rate))
+        self._applied["sample_rate"] = sample_rate
+        self._actual_sample_rate_stale = True
+
+    def get_sample_rate(self) -> float:
+        # Actual sample rate, after the device has coerced the requested rate
+        retval = c_double()
+        self.dwf.FDwfAnalogInFrequencyGet(self.device_handle, byref(retval))
+        return retval.value
 
     def set_buffer_size(self, buffer_size: int) -> None:
         self.dwf.FDwfAnalogInBufferSizeSet(self.device_handle, c_int(buffer_size))
+        self._applied["buffer_size"] = buffer_size
+
+    def get_buffer_size_min_max(self) -> tuple[int, int]:
+        min = c_int()
+        max = c_int()
+        self.dwf.FDwfAnalogInBufferSizeInfo(self.device_handle, byref(min), byref(max))
+        return (min.value, max.value)
+
+    # ---------- Buffer auto tuning ----------
+    def enable_buffer_auto_tune(self, **tuner_options) -> BufferTuner:
+        # Grow the device buffer and poll faster on sample loss, shrink it back when there is plenty of headroom
+        buffer_size_min, buffer_size_max = self.get_buffer_size_min_max()
+        self.buffer_tuner = BufferTuner(buffer_size_min, buffer_size_max, **tuner_options)
+        Logger.info("AI buffer auto tuning enabled, buffer size limits %d to %d", buffer_size_min, buffer_size_max)
+        return self.buffer_tuner
+
+    def disable_buffer_auto_tune(self) -> None:
+        self.buffer_tuner = None
+
+    def get_poll_interval(self) -> float:
+        # Recommended time between reads, in seconds
+        return self.buffer_tuner.poll_interval if self.buffer_tuner else self.DEFAULT_POLL_INTERVAL
 
     # ---------- Channel enable / disable ----------
     def set_channels_enabled(self, channels: list[int], enabled: list[bool]) -> None:
@@ -39,6 +152,7 @@ class AnalogIn:
             self._check_channels(channels, enabled, "set_channels_enabled", "enables")
             for i in range(0, len(channels)):
                 self.dwf.FDwfAnalogInChannelEnableSet(self.device_handle, c_int(channels[i]), c_int(enabled[i]))
+            self._update_channel_shadow(channels, "enabled", enabled)
         except Exception as e:
             raise e
 
@@ -49,7 +163,7 @@ class AnalogIn:
         self.set_channels_enabled(channels, [True] * len(channels))
 
     def enable_all_channels(self) -> None:
-        self.dwf.enable_channel(-1)
+        self.enable_channels(list(range(0, self.channel_count)))
 
     def disable_channel(self, channel: int) -> None:
         self.set_channels_enabled([channel], [False])
@@ -58,7 +172,29 @@ class AnalogIn:
         self.set_channels_enabled(channels, [False] * len(channels))
 
     def disable_all_channels(self) -> None:
-        self.dwf.disable_channel(-1)
+        self.disable_channels(list(range(0, self.channel_count)))
+
+    def set_enabled_channels(self, channels: list[int]) -> int:
+        # Enable exactly the given channels and disable all others.  Only the channels whose enable state differs
+        # from the last applied state are written, returns their number.
+        return self.apply(self.get_channel_mask_config(channels))
+
+    def get_enabled_channels(self) -> list[int]:
+        # Channels enabled by the last applied state
+        return [
+            channel
+            for channel in range(0, self.channel_count)
+            if self._applied_channels.get(channel, {}).get("enabled", False)
+        ]
+
+    def get_channel_mask_config(self, channels: list[int], config: Optional[AnalogInConfig] = None) -> AnalogInConfig:
+        # Set the enable state of every channel, the given channels enabled and all others disabled
+        config = config if config is not None else AnalogInConfig()
+        for channel in channels:
+            self._get_channel_arg(channel)
+        for channel in range(0, self.channel_count):
+            config.set_channel(channel, enabled=channel in channels)
+        return config
 
     # ---------- Specs ----------
     def get_sample_rate_min_max(self) -> tuple[float, float]:
@@ -67,6 +203,40 @@ class AnalogIn:
         self.dwf.FDwfAnalogInFrequencyInfo(self.device_handle, byref(min), byref(max))
         return (min.value, max.value)
 
+    def get_sample_rate_max(self) -> float:
+        if self._sample_rate_max is None:
+            _, self._sample_rate_max = self.get_sample_rate_min_max()
+        return self._sample_rate_max
+
+    def get_max_record_rate(self, num_channels: Optional[int] = None) -> Optional[float]:
+        # Highest per channel sample rate the device can stream in record mode without loss with num_channels
+        # enabled (the currently enabled channels by default).  None if the device's throughput is unknown.
+        if num_channels is None:
+            num_channels = len(self.get_enabled_channels())
+        if num_channels in self.record_rate_limits:
+            return self.record_rate_limits[num_channels]
+        if self.record_throughput is None:
+            return None
+        max_rate = self.record_throughput / max(1, num_channels)
+        sample_rate_max = self.get_sample_rate_max()
+        return min(max_rate, sample_rate_max) if sample_rate_max > 0 else max_rate
+
+    def check_record_rate(self, sample_rate: float, num_channels: Optional[int] = None) -> bool:
+        # Apply the record rate policy to a record rate with num_channels enabled, returns whether it is lossless
+        max_rate = self.get_max_record_rate(num_channels)
+        if max_rate is None or sample_rate <= max_rate or self.record_rate_policy == RecordRatePolicy.Ignore:
+            return True
+
+        num_channels = len(self.get_enabled_channels()) if num_channels is None else num_channels
+        msg = (
+            f"The record rate ({sample_rate} S/s) exceeds the maximum lossless rate ({max_rate} S/s) with "
+            f"{num_channels} channel(s) enabled."
+        )
+        if self.record_rate_policy == RecordRatePolicy.Reject:
+            raise DwfException(AnalogInputErorr.RECORD_RATE_EXCEEDED.value, msg, msg)
+        Logger.warning(msg)
+        return False
+
     def get_range_min_max_num_steps(self) -> tuple[float, float, float]:
         min = c_double()
         max = c_double()
@@ -92,6 +262,7 @@ class AnalogIn:
             self._check_channels(channels, ranges, "set_input_ranges", "ranges")
             for i in range(0, len(channels)):
                 self.dwf.FDwfAnalogInChannelRangeSet(self.device_handle, c_int(channels[i]), c_double(ranges[i]))
+            self._update_channel_shadow(channels, "range", ranges)
         except Exception as e:
             raise e
 
@@ -101,114 +272,341 @@ class AnalogIn:
     def set_input_range_all_channels(self, range: float) -> None:
         return self.set_input_range(-1, range)
 
+    # ---------- Trigger ----------
+    def set_trigger_source(self, source: c_ubyte) -> None:
+        # One of the trigsrc constants, e.g. trigsrcAnalogOut1 to start with analog output channel 0
+        self.dwf.FDwfAnalogInTriggerSourceSet(self.device_handle, source)
+
+    def set_trigger_position(self, position: float) -> None:
+        # Time in seconds from the trigger to the middle of the buffer
+        self.dwf.FDwfAnalogInTriggerPositionSet(self.device_handle, c_double(position))
+
+    def set_trigger_auto_timeout(self, timeout: float) -> None:
+        # Acquire without a trigger after this many seconds, 0 to wait for the trigger indefinitely
+        self.dwf.FDwfAnalogInTriggerAutoTimeoutSet(self.device_handle, c_double(timeout))
+
     # ---------- Record Mode ----------
     def set_record_length(self, length: float) -> None:
         self.dwf.FDwfAnalogInRecordLengthSet(self.device_handle, c_double(length))
+        self._applied["record_length"] = length
 
     def record(self, channels: list[int], sample_rate: float, num_samples: float = -1, range: float = 5):
         try:
-            self.enable_channels(channels)
-            self.set_input_ranges(channels, [range] * len(channels))
-            self.set_acquisition_mode(AiAcquisitionMode.Record)
-            self.set_sample_rate(sample_rate)
-            self.set_record_length(-1 if num_samples < 0 else sample_rate / num_samples)
-            self.start()
+            self.apply(self.get_record_config(channels, sample_rate, num_samples, range), start=True)
         except DwfException as e:
             raise e
 
-    def get_record_status(self) -> tuple[int, int, int]:
-        available_buffer = c_int()
-        lost_buffer = c_int()
-        corrupted_buffer = c_int()
-        self.dwf.FDwfAnalogInStatusRecord(
-            self.device_handle, byref(available_buffer), byref(lost_buffer), byref(corrupted_buffer)
+    def get_record_config(
+        self, channels: list[int], sample_rate: float, num_samples: float = -1, range: float = 5
+    ) -> AnalogInConfig:
+        config = AnalogInConfig(
+            acquisition_mode=AiAcquisitionMode.Record,
+            sample_rate=sample_rate,
+            record_length=-1 if num_samples < 0 else num_samples / sample_rate,
         )
+        # Channels left enabled by a previous configuration would share the device's throughput
+        self.get_channel_mask_config(channels, config)
+        for channel in channels:
+            config.set_channel(channel, range=range)
+        return config
+
+    def get_record_status(self) -> tuple[int, int, int]:
+        available_buffer, lost_buffer, corrupted_buffer = self._record_buffers
+        if not self._status_record(self.device_handle, *self._record_refs):
+            raise call_error(self.dwf, "FDwfAnalogInStatusRecord")
         return (available_buffer.value, lost_buffer.value, corrupted_buffer.value)
 
     # ---------- State & Status----------
     def get_state(self) -> InstrumentState:
-        status_buffer = c_byte()
-        self.dwf.FDwfAnalogInStatus(self.device_handle, c_int(1), byref(status_buffer))
-        return InstrumentState(status_buffer.value)
+        if not self._status(self.device_handle, self._read_data, self._state_ref):
+            raise call_error(self.dwf, "FDwfAnalogInStatus")
+        return InstrumentState(self._state_buffer.value)
 
     def set_acquisition_mode(self, mode: AiAcquisitionMode) -> None:
         self.dwf.FDwfAnalogInAcquisitionModeSet(self.device_handle, c_int(mode.value))
         self._ai_mode = mode
+        self._applied["acquisition_mode"] = mode
 
     def apply_config(self, reset_trigger: bool = True, start_acquisition: bool = False) -> None:
         self.dwf.FDwfAnalogInConfigure(self.device_handle, c_int(reset_trigger), c_int(start_acquisition))
         self._reset_soft_counters()
 
     def start(self, reset_trigger: bool = True) -> None:
-        self.dwf.FDwfAnalogInConfigure(self.device_handle, c_int(reset_trigger), c_int(1))
+        if self.buffer_tuner:
+            # Apply the tuned buffer size, including a deferred shrink, before starting
+            buffer_size = self.buffer_tuner.reset(self._applied.get("sample_rate", 0))
+            if self._applied.get("buffer_size") != buffer_size:
+                self.set_buffer_size(buffer_size)
+                reset_trigger = True
+
         self.dwf.FDwfAnalogInConfigure(self.device_handle, c_int(reset_trigger), c_int(1))
         self._reset_soft_counters()
+        self._start_time = time.perf_counter()
+
+        if self._actual_sample_rate_stale:
+            self.actual_sample_rate = self.get_sample_rate()
+            self._actual_sample_rate_stale = False
+            requested_rate = self._applied.get("sample_rate")
+            if requested_rate and self.actual_sample_rate != requested_rate:
+                Logger.debug("AI sample rate coerced from %s to %s S/s", requested_rate, self.actual_sample_rate)
+        self.sample_clock.reset(self.actual_sample_rate, self._start_time)
+
+    def stop(self) -> None:
+        self.dwf.FDwfAnalogInConfigure(self.device_handle, c_int(0), c_int(0))
+
+    def warm_restart(self) -> None:
+        # Re-arm the last applied configuration with a single configure call
+        self.start(reset_trigger=False)
+
+    # ---------- Declarative config ----------
+    def apply(self, config: AnalogInConfig, start: bool = False) -> int:
+        # Push only the settings that differ from the last applied state, then configure once.
+        # Returns the number of settings written to the device.
+        self._check_config_record_rate(config)
+        num_changes = 0
+        for channel, channel_config in config.channels.items():
+            channel_arg = self._get_channel_arg(channel)
+            for name, value in channel_config.items():
+                if self._is_channel_setting_applied(channel, name, value):
+                    continue
+                writer, to_arg = self._channel_setting_writers[name]
+                writer(self.device_handle, channel_arg, to_arg(value))
+                self._update_channel_shadow([channel], name, [value])
+                num_changes += 1
+
+        for name, value in config.items():
+            if name in self._applied and self._applied[name] == value:
+                continue
+            writer, to_arg = self._setting_writers[name]
+            writer(self.device_handle, to_arg(value))
+            self._applied[name] = value
+            num_changes += 1
+            if name == "sample_rate":
+                self._actual_sample_rate_stale = True
+
+        if config.acquisition_mode is not None:
+            self._ai_mode = config.acquisition_mode
+
+        if start:
+            self.start(reset_trigger=num_changes > 0)
+        elif num_changes > 0:
+            self.apply_config(reset_trigger=True, start_acquisition=False)
+
+        return num_changes
+
+    def get_applied_config(self) -> AnalogInConfig:
+        config = AnalogInConfig(**self._applied)
+        for channel, settings in self._applied_channels.items():
+            if settings:
+                config.set_channel(channel, **settings)
+        return config
+
+    def get_applied_setting(self, name: str, default: Any = None) -> Any:
+        # Last value applied of a device wide setting (an AnalogInConfig attribute), default if not applied
+        return self._applied.get(name, default)
+
+    def is_config_applied(self, config: AnalogInConfig) -> bool:
+        for channel, channel_config in config.channels.items():
+            for name, value in channel_config.items():
+                if not self._is_channel_setting_applied(channel, name, value):
+                    return False
+        for name, value in config.items():
+            if name not in self._applied or self._applied[name] != value:
+                return False
+        return True
+
+    def invalidate_config(self) -> None:
+        # Forget the shadow state so the next apply() pushes every setting (e.g. after a device reset)
+        self._applied = {}
+        self._applied_channels = {channel: {} for channel in range(0, self.channel_count)}
+        self._actual_sample_rate_stale = True
+
+    # ---------- Block stream ----------
+    def add_block_handler(self, handler: Callable[[AiBlock], None]) -> None:
+        # Handlers must not modify the block, it is also returned to the reader
+        self._block_handlers.append(handler)
+
+    def remove_block_handler(self, handler: Callable[[AiBlock], None]) -> None:
+        if handler in self._block_handlers:
+            self._block_handlers.remove(handler)
 
     # ---------- Read ----------
     def read_sample_buffer(self, channel: int, num_samples: int) -> list[float]:
         data_buffer = (c_double * num_samples)()
-        self.dwf.FDwfAnalogInStatusData(self.device_handle, c_int(channel), byref(data_buffer), num_samples)
+        if not self._status_data(self.device_handle, self._get_channel_arg(channel), byref(data_buffer), num_samples):
+            raise call_error(self.dwf, "FDwfAnalogInStatusData")
         dblPtr = cast(data_buffer, POINTER(c_double))
         floatList = [dblPtr[i] for i in range(num_samples)]
         return floatList
 
+    def read_sample_array(self, channel: int, num_samples: int) -> np.ndarray:
+        # Samples of the last status read, copied straight into a numpy array
+        data = np.empty(num_samples)
+        if not self._status_data(
+            self.device_handle, self._get_channel_arg(channel), data.ctypes.data_as(c_void_p), num_samples
+        ):
+            raise call_error(self.dwf, "FDwfAnalogInStatusData")
+        return data
+
     def read_available_samples(self, channels: list[int]) -> tuple[list[list[float]], int, int]:
+        try:
+            block = self.read_block(channels)
+            return (block.data, self._ai_lost_count, self._ai_corrupted_count)
+        except DwfException as e:
+            raise e
+
+    def read_block(self, channels: list[int]) -> AiBlock:
+        # Read all available samples as a block stamped with its absolute first sample index and host time
         try:
             # Initialize data container with correct dimensions
             data: list[list[float]] = self._get_data_container(channels)
-            mode = self.dwf_ai.get_acquisition_mode()
+            mode = self._applied.get("acquisition_mode") or self.dwf_ai.get_acquisition_mode()
 
             if mode == AiAcquisitionMode.Record:
-                ai_state = self.get_state()
-
-                if self._ai_sample_count == 0 and (
-                    ai_state in [InstrumentState.Config, InstrumentState.Prefill, InstrumentState.Armed]
-                ):
+                carry_over = self._take_carry_over(channels)
+                if carry_over is not None:
+                    # Samples read past the end of the last capture, in a block of their own so blocks stay contiguous
+                    first_sample_index, samples = carry_over
+                    block = self._make_block(samples.tolist(), channels, first_sample_index, 0, 0)
+                    for handler in self._block_handlers:
+                        handler(block)
+                    return block
+
+                status = self._poll_record()
+                if status is None:
                     # Acquisition has not yet started
-                    return (data, 0, 0)
-
-                samples_available, samples_lost, samples_corrupted = self.get_record_status()
-                self._ai_lost_count += samples_lost
-                self._ai_corrupted_count += samples_corrupted
+                    return self._make_block(data, channels, self.sample_index, 0, 0)
 
+                first_sample_index, samples_available, samples_lost, samples_corrupted = status
                 if samples_available == 0:
-                    return (data, self._ai_lost_count, self._ai_corrupted_count)
+                    return self._make_block(data, channels, first_sample_index, samples_lost, samples_corrupted)
 
                 for channel_index in range(0, len(channels)):
                     samples = self.read_sample_buffer(channels[channel_index], samples_available)
                     data[channel_index] += samples
 
-                return (data, self._ai_lost_count, self._ai_corrupted_count)
+                block = self._make_block(data, channels, first_sample_index, samples_lost, samples_corrupted)
+                if self.buffer_tuner:
+                    self._tune_buffer(samples_available, samples_lost, samples_corrupted)
+                for handler in self._block_handlers:
+                    handler(block)
+                return block
 
             else:
                 raise DwfException(message=f"The selected AI Mode ({self._ai_mode}) is not yet implemented")
         except DwfException as e:
+            self._trace.record(TraceEvent.AiError, e.code)
             raise e
 
     def read_samples_blocking(
         self, ai_channels: list[int], num_samples: int, timeout_ms: float = 5000
     ) -> tuple[list[list[float]], int, int]:
-        timeout_time = time.time() + timeout_ms / 1000
+        # Exactly num_samples samples per channel, and the samples lost / corrupted while reading them.  Converts the
+        # capture to lists, use capture() directly for large captures.
+        capture = self.capture(ai_channels, num_samples, timeout_ms)
+        return (capture.data.tolist(), capture.lost, capture.corrupted)
+
+    def capture(
+        self, channels: list[int], num_samples: int, timeout_ms: float = 5000, file_path: Optional[str] = None
+    ) -> AiCapture:
+        # Read exactly num_samples samples per channel of a running record mode acquisition straight into a
+        # preallocated (channels, num_samples) array.  With file_path the array is a memory mapped .npy file so
+        # captures larger than memory stay O(num_samples) on disk only.  Samples lost during the capture are
+        # recorded as gaps, the captured samples stay contiguous in the array.  Samples the last poll returns past
+        # the end of the capture are returned first by the next capture() or read_block().
+        for channel in channels:
+            self._get_channel_arg(channel)
+        if file_path is None:
+            data = np.empty((len(channels), num_samples))
+        else:
+            data = np.lib.format.open_memmap(
+                file_path, mode="w+", dtype=np.float64, shape=(len(channels), num_samples)
+            )
+
+        timeout_time = time.perf_counter() + timeout_ms / 1000
+        capture: Optional[AiCapture] = None
         sample_count = 0
-        lost_count = 0
-        corrupt_count = 0
-        sample_data = self._get_data_container(ai_channels)
+        carry_over = self._take_carry_over(channels, num_samples) if num_samples > 0 else None
+        if carry_over is not None:
+            # Samples the last capture read past its end come first
+            first_sample_index, samples = carry_over
+            sample_count = samples.shape[1]
+            data[:, 0:sample_count] = samples
+            host_time = self.sample_clock.host_time_of(first_sample_index)
+            capture = AiCapture(data, channels, first_sample_index, self.actual_sample_rate, host_time, file_path)
+            if self._block_handlers:
+                block = self._make_block(data[:, 0:sample_count], channels, first_sample_index, 0, 0)
+                for handler in self._block_handlers:
+                    handler(block)
+
         while sample_count < num_samples:
-            if time.time() > timeout_time:
+            status = self._poll_record()
+            if status is not None and capture is not None:
+                if status[2] > 0:
+                    capture.gaps.append((sample_count, status[2]))
+                    capture.lost += status[2]
+                capture.corrupted += status[3]
+
+            if status is not None and status[1] > 0:
+                first_sample_index, samples_available, samples_lost, samples_corrupted = status
+                if capture is None:
+                    # Samples lost before the first captured sample only move the capture's start
+                    host_time = self.sample_clock.host_time_of(first_sample_index)
+                    capture = AiCapture(
+                        data, channels, first_sample_index, self.actual_sample_rate, host_time, file_path
+                    )
+                    capture.corrupted += samples_corrupted
+
+                count = min(samples_available, num_samples - sample_count)
+                # Samples past the end of the capture are read into a separate array and kept for the next read
+                if count == samples_available:
+                    target = data[:, sample_count:]
+                else:
+                    target = np.empty((len(channels), samples_available))
+                for channel_index in range(0, len(channels)):
+                    if not self._status_data(
+                        self.device_handle,
+                        self._channel_args[channels[channel_index]],
+                        target[channel_index].ctypes.data_as(c_void_p),
+                        samples_available,
+                    ):
+                        raise call_error(self.dwf, "FDwfAnalogInStatusData")
+                if count < samples_available:
+                    data[:, sample_count : sample_count + count] = target[:, 0:count]
+                    self._carry_over = (list(channels), first_sample_index + count, target[:, count:])
+                if self._block_handlers:
+                    block = self._make_block(
+                        data[:, sample_count : sample_count + count],
+                        channels,
+                        first_sample_index,
+                        samples_lost,
+                        samples_corrupted,
+                    )
+                    for handler in self._block_handlers:
+                        handler(block)
+                sample_count += count
+                if self.buffer_tuner:
+                    self._tune_buffer(samples_available, samples_lost, samples_corrupted)
+                continue
+
+            if time.perf_counter() > timeout_time:
                 msg = f"Timeout waiting for AI sample data.  Read ({sample_count}) out of requested ({num_samples}) samples in ({timeout_ms / 1000}) seconds."
                 raise DwfException(AnalogInputErorr.TIMEOUT_WAITING_SAMPLES.value, msg, msg)
-
-            iteration_data, iteration_lost_count, iteration_corrupt_count = self.read_available_samples(ai_channels)
-            lost_count += iteration_lost_count
-            corrupt_count += iteration_corrupt_count
-
-            for channel_index in range(0, len(ai_channels)):
-                sample_data[channel_index] += iteration_data[channel_index]
-
-            sample_count += len(iteration_data[0])
-            time.sleep(0.1)
-
-        return (sample_data, lost_count, corrupt_count)
+            time.sleep(self.get_poll_interval())
+
+        if capture is None:
+            # Zero length capture
+            capture = AiCapture(
+                data,
+                channels,
+                self.sample_index,
+                self.actual_sample_rate,
+                self.sample_clock.host_time_of(self.sample_index),
+                file_path,
+            )
+        if file_path is not None:
+            data.flush()
+        return capture
 
     # ---------- Utilities ----------
     def _check_channels(self, channels: list[int], values: list, function_name: str, value_name: str) -> None:
@@ -218,7 +616,135 @@ class AnalogIn:
             Logger.error(msg)
             raise DwfException(AnalogInputErorr.INTPUT_LENGTH_MISMATCH.value, msg, msg)
 
+    def _get_channel_arg(self, channel: int) -> c_int:
+        if channel not in self._channel_args:
+            msg = f"The specified AI channel ({channel}) does not exist on the selected device."
+            raise DwfException(AnalogInputErorr.INVALID_CHANNEL.value, msg, msg)
+        return self._channel_args[channel]
+
+    def _get_channels(self, channel: int) -> list[int]:
+        # Channel -1 addresses all channels
+        return list(range(0, self.channel_count)) if channel == -1 else [channel]
+
+    def _is_channel_setting_applied(self, channel: int, name: str, value: Any) -> bool:
+        for target in self._get_channels(channel):
+            applied = self._applied_channels.get(target, {})
+            if name not in applied or applied[name] != value:
+                return False
+        return True
+
+    def _check_config_record_rate(self, config: AnalogInConfig) -> None:
+        # Check the record rate the configuration results in, before anything is written to the device
+        mode = (
+            config.acquisition_mode if config.acquisition_mode is not None else self._applied.get("acquisition_mode")
+        )
+        sample_rate = config.sample_rate if config.sample_rate is not None else self._applied.get("sample_rate")
+        if mode != AiAcquisitionMode.Record or not sample_rate:
+            return
+        if self.record_throughput is None and not self.record_rate_limits:
+            return
+
+        num_channels = 0
+        for channel in range(0, self.channel_count):
+            channel_config = config.channels.get(channel) or config.channels.get(-1)
+            if channel_config is not None and channel_config.enabled is not None:
+                num_channels += channel_config.enabled
+            else:
+                num_channels += self._applied_channels.get(channel, {}).get("enabled", False)
+
+        if self.check_record_rate(sample_rate, num_channels):
+            Logger.debug(
+                "Record rate %s S/s with %d channel(s) enabled, maximum lossless rate %s S/s",
+                sample_rate,
+                num_channels,
+                self.get_max_record_rate(num_channels),
+            )
+
+    def _update_channel_shadow(self, channels: list[int], name: str, values: list) -> None:
+        for i in range(0, len(channels)):
+            for target in self._get_channels(channels[i]):
+                self._applied_channels.setdefault(target, {})[name] = values[i]
+
+    def _poll_record(self) -> Optional[tuple[int, int, int, int]]:
+        # Record mode status poll: (first sample index, samples available, lost, corrupted), or None when the
+        # acquisition has not yet started.  The available samples are then read with FDwfAnalogInStatusData.
+        ai_state = self.get_state()
+        if self._ai_sample_count == 0 and ai_state in [
+            InstrumentState.Config,
+            InstrumentState.Prefill,
+            InstrumentState.Armed,
+        ]:
+            return None
+
+        samples_available, samples_lost, samples_corrupted = self.get_record_status()
+
+        # Lost samples were dropped before the samples now available
+        first_sample_index = self.sample_index + samples_lost
+        self.sample_index = first_sample_index + samples_available
+        if samples_available > 0:
+            # A poll without new samples carries no timing information, the samples may be just about to arrive
+            self.sample_clock.update(self.sample_index, time.perf_counter())
+
+        # Samples skipped while restarting to resize the buffer, sample_index already counts them
+        if self._pending_lost:
+            samples_lost += self._pending_lost
+            self._pending_lost = 0
+
+        self._ai_lost_count += samples_lost
+        self._ai_corrupted_count += samples_corrupted
+        self._trace.record(TraceEvent.AiStatus, samples_available, samples_lost, samples_corrupted)
+
+        if samples_available > 0:
+            if self._ai_sample_count == 0 and self._start_time is not None:
+                self.first_sample_latency = time.perf_counter() - self._start_time
+                Logger.debug("AI start to first sample latency: %.3f ms", self.first_sample_latency * 1000)
+            self._ai_sample_count += samples_available
+        return (first_sample_index, samples_available, samples_lost, samples_corrupted)
+
+    def _tune_buffer(self, available: int, lost: int, corrupted: int) -> None:
+        buffer_size = self.buffer_tuner.update(available, lost, corrupted)
+        if buffer_size is None:
+            return
+
+        # Resizing requires restarting the acquisition.  Keep the absolute sample counter running by estimating the
+        # number of samples missed during the restart from the sample clock, they are reported as lost.
+        expected_time = self.sample_clock.host_time_of(self.sample_index)
+        self.set_buffer_size(buffer_size)
+        self.dwf.FDwfAnalogInConfigure(self.device_handle, c_int(1), c_int(1))
+        gap = max(0, int(round((time.perf_counter() - expected_time) * self.actual_sample_rate)))
+        self.sample_index += gap
+        self._pending_lost += gap
+        self._trace.record(TraceEvent.AiBufferResize, buffer_size, gap)
+
+    def _make_block(
+        self, data: list[list[float]], channels: list[int], first_sample_index: int, lost: int, corrupted: int
+    ) -> AiBlock:
+        host_time = self.sample_clock.host_time_of(first_sample_index)
+        return AiBlock(data, channels, first_sample_index, lost, corrupted, self.actual_sample_rate, host_time)
+
+    def _take_carry_over(self, channels: list[int], max_samples: Optional[int] = None) -> Optional[tuple[int, Any]]:
+        # Up to max_samples carried over samples of the given channels and the sample index of the first one.  When
+        # the carried samples lack one of the channels they are dropped, and the next poll reports them as lost.
+        if self._carry_over is None:
+            return None
+        carry_channels, first_sample_index, data = self._carry_over
+        if any(channel not in carry_channels for channel in channels):
+            self._pending_lost += data.shape[1]
+            self._carry_over = None
+            return None
+
+        count = data.shape[1] if max_samples is None else min(max_samples, data.shape[1])
+        samples = data[[carry_channels.index(channel) for channel in channels], 0:count]
+        if count < data.shape[1]:
+            self._carry_over = (carry_channels, first_sample_index + count, data[:, count:])
+        else:
+            self._carry_over = None
+        return (first_sample_index, samples)
+
     def _reset_soft_counters(self) -> None:
+        self.sample_index = 0
+        self._pending_lost = 0
+        self._carry_over = None
         self._ai_sample_count = 0
         self._ai_lost_count = 0
         self._ai_corrupted_count = 0
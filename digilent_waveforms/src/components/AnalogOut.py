@@ -1,8 +1,14 @@
 from ctypes import *  # type: ignore
+from typing import Any
 
 # Digilent WaveForms Imports
 from digilent_waveforms.src.components.DwfException import DwfException
-from digilent_waveforms.src.constants.ao_types import OutputFunction, InstrumentStartMode
+from digilent_waveforms.src.constants.ao_types import (
+    ANALOG_OUT_SETTINGS,
+    AnalogOutConfig,
+    OutputFunction,
+    InstrumentStartMode,
+)
 from digilent_waveforms.src.constants.dwfconstants import *
 from digilent_waveforms.src.constants.error_codes import AnalogOutError
 
@@ -12,10 +18,25 @@ class AnalogOut:
     device_handle: c_int
     channel_count: int = 0
 
+    # Shadow of the last state pushed to the device, per channel and setting
+    _applied: dict[int, dict[str, Any]]
+
     def __init__(self, dwf: CDLL, device_handle: c_int, channel_count: int):
         self.device_handle = device_handle
         self.channel_count = channel_count
         self.dwf = dwf
+        self._applied = {channel: {} for channel in range(0, self.channel_count)}
+
+        # Setting name -> (FDwf setter, value to ctypes argument)
+        self._setting_writers = {
+            "enabled": (self.dwf.FDwfAnalogOutEnableSet, c_int),
+            "function": (self.dwf.FDwfAnalogOutFunctionSet, lambda function: function.value),
+            "frequency": (self.dwf.FDwfAnalogOutFrequencySet, c_double),
+            "amplitude": (self.dwf.FDwfAnalogOutAmplitudeSet, c_double),
+            "offset": (self.dwf.FDwfAnalogOutOffsetSet, c_double),
+            "limit": (self.dwf.FDwfAnalogOutLimitationSet, c_double),
+        }
+        self._channel_args = {channel: c_int(channel) for channel in range(-1, self.channel_count)}
 
     # ---------- Channel enable / disable ----------
     def set_channels_enabled(self, channels: list[int], enabled: list[bool]) -> None:
@@ -23,6 +44,7 @@ class AnalogOut:
             self._check_channels(channels, enabled)
             for i in range(0, len(channels)):
                 self.dwf.FDwfAnalogOutEnableSet(self.device_handle, c_int(channels[i]), c_int(enabled[i]))
+            self._update_shadow(channels, "enabled", enabled)
         except Exception as e:
             raise e
 
@@ -30,19 +52,19 @@ class AnalogOut:
         self.set_channels_enabled([channel], [True])
 
     def enable_channels(self, channels: list[int]) -> None:
-        self.set_channels_enabled(channels, [True])
+        self.set_channels_enabled(channels, [True] * len(channels))
 
     def enable_all_channels(self) -> None:
-        self.dwf.FDwfAnalogOutEnableSet(self.device_handle, c_int(-1), c_int(1))
+        self.set_channels_enabled([-1], [True])
 
     def disable_channel(self, channel: int) -> None:
         self.set_channels_enabled([channel], [False])
 
     def disable_channels(self, channels: list[int]) -> None:
-        self.set_channels_enabled(channels, [False])
+        self.set_channels_enabled(channels, [False] * len(channels))
 
     def disable_all_channels(self) -> None:
-        self.dwf.FDwfAnalogOutEnableSet(self.device_handle, c_int(-1), c_int(0))
+        self.set_channels_enabled([-1], [False])
 
     # ---------- Output function ----------
     def set_output_functions(self, channels: list[int], functions: list[OutputFunction]) -> None:
@@ -50,6 +72,7 @@ class AnalogOut:
             self._check_channels(channels, functions)
             for i in range(0, len(channels)):
                 self.dwf.FDwfAnalogOutFunctionSet(self.device_handle, c_int(channels[i]), functions[i].value)
+            self._update_shadow(channels, "function", functions)
         except Exception as e:
             raise e
 
@@ -65,6 +88,7 @@ class AnalogOut:
             self._check_channels(channels, offsets)
             for i in range(0, len(channels)):
                 self.dwf.FDwfAnalogOutOffsetSet(self.device_handle, c_int(channels[i]), c_double(offsets[i]))
+            self._update_shadow(channels, "offset", offsets)
         except Exception as e:
             raise e
 
@@ -80,6 +104,7 @@ class AnalogOut:
             self._check_channels(channels, limits)
             for i in range(0, len(channels)):
                 self.dwf.FDwfAnalogOutLimitationSet(self.device_handle, c_int(channels[i]), c_double(limits[i]))
+            self._update_shadow(channels, "limit", limits)
         except Exception as e:
             raise e
 
@@ -98,17 +123,44 @@ class AnalogOut:
         except Exception as e:
             raise e
 
-        # Ensure the number of channels matches the number of start modes
-        if len(channels) != len(start_mode):
-            msg = f"The specified number of channels ({len(channels)}) must match the specified number of start modes ({len(start_mode)})"
-            raise DwfException(AnalogOutError.INTPUT_LENGTH_MISMATCH.value, msg, msg)
-
     def configure_channel(self, channel: int, start_mode: InstrumentStartMode) -> None:
         return self.configure_channels([channel], [start_mode])
 
     def configure_all_channels(self, start_mode: InstrumentStartMode) -> None:
         return self.configure_channel(-1, start_mode)
 
+    # ---------- Declarative config ----------
+    def apply(self, config: AnalogOutConfig) -> int:
+        # Push only the settings that differ from the last applied state, then configure all channels once.
+        # Returns the number of settings written to the device.
+        num_changes = 0
+        for channel, channel_config in config.channels.items():
+            channel_arg = self._get_channel_arg(channel)
+            for name, value in channel_config.items():
+                if self._is_applied(channel, name, value):
+                    continue
+                writer, to_arg = self._setting_writers[name]
+                writer(self.device_handle, channel_arg, to_arg(value))
+                self._update_shadow([channel], name, [value])
+                num_changes += 1
+
+        # Nothing to apply to a running output, skip the configure call entirely
+        if num_changes > 0 or config.start_mode != InstrumentStartMode.APPLY:
+            self.dwf.FDwfAnalogOutConfigure(self.device_handle, self._channel_args[-1], c_int(config.start_mode.value))
+
+        return num_changes
+
+    def get_applied_config(self) -> AnalogOutConfig:
+        config = AnalogOutConfig()
+        for channel, settings in self._applied.items():
+            if settings:
+                config.set_channel(channel, **settings)
+        return config
+
+    def invalidate_config(self) -> None:
+        # Forget the shadow state so the next apply() pushes every setting (e.g. after a device reset)
+        self._applied = {channel: {} for channel in range(0, self.channel_count)}
+
     # ---------- Start ----------
     def start_channels(self, channels: list[int]) -> None:
         return self.configure_channels(channels, [InstrumentStartMode.START] * len(channels))
@@ -130,6 +182,28 @@ class AnalogOut:
         return self.stop_channel(-1)
 
     # ---------- Utilities ----------
+    def _get_channel_arg(self, channel: int) -> c_int:
+        if channel not in self._channel_args:
+            msg = f"The specified AO channel ({channel}) does not exist on the selected device."
+            raise DwfException(AnalogOutError.INVALID_CHANNEL.value, msg, msg)
+        return self._channel_args[channel]
+
+    def _get_channels(self, channel: int) -> list[int]:
+        # Channel -1 addresses all channels
+        return list(range(0, self.channel_count)) if channel == -1 else [channel]
+
+    def _is_applied(self, channel: int, name: str, value: Any) -> bool:
+        for target in self._get_channels(channel):
+            applied = self._applied.get(target, {})
+            if name not in applied or applied[name] != value:
+                return False
+        return True
+
+    def _update_shadow(self, channels: list[int], name: str, values: list) -> None:
+        for i in range(0, len(channels)):
+            for target in self._get_channels(channels[i]):
+                self._applied.setdefault(target, {})[name] = values[i]
+
     def _check_channels(self, channels: list[int], values: list) -> None:
         # Ensure the number of channels matches the number of values
         if len(channels) != len(values):
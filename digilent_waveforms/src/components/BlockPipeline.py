@@ -0,0 +1,222 @@
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Optional
+import multiprocessing
+import os
+import uuid
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.constants.ai_types import AiBlock
+
+# Runs in a worker process: function(data, first_sample_index, sample_rate) -> result, data is a read only
+# (channels, samples) view into shared memory that is only valid during the call.  Must be picklable (module level).
+BlockFunction = Callable[[np.ndarray, int, float], Any]
+
+# Shared memory segment mapped by this worker process
+_worker_segment: Optional[shared_memory.SharedMemory] = None
+
+
+def _run_block_function(
+    function: BlockFunction,
+    segment_name: str,
+    slot_shape: tuple[int, int],
+    slot: int,
+    num_channels: int,
+    num_samples: int,
+    first_sample_index: int,
+    sample_rate: float,
+) -> Any:
+    global _worker_segment
+    if _worker_segment is None or _worker_segment.name.lstrip("/") != segment_name.lstrip("/"):
+        if _worker_segment is not None:
+            try:
+                _worker_segment.close()
+            except BufferError:
+                pass  # A result still references the old segment, it is released with the process
+        _worker_segment = shared_memory.SharedMemory(name=segment_name, create=False)
+
+    offset = slot * slot_shape[0] * slot_shape[1] * 8
+    data = np.ndarray(slot_shape, dtype=np.float64, buffer=_worker_segment.buf, offset=offset)
+    data = data[0:num_channels, 0:num_samples]
+    data.setflags(write=False)
+    try:
+        return function(data, first_sample_index, sample_rate)
+    finally:
+        del data
+
+
+class PipelineResult:
+    sequence: int  # Submission order
+    first_sample_index: int
+    num_samples: int
+    value: Any  # Return value of the block function
+    error: Optional[BaseException]
+
+    def __init__(
+        self, sequence: int, first_sample_index: int, num_samples: int, value: Any, error: Optional[BaseException]
+    ):
+        self.sequence = sequence
+        self.first_sample_index = first_sample_index
+        self.num_samples = num_samples
+        self.value = value
+        self.error = error
+
+
+class BlockPipeline:
+    # Runs a block function on analog input blocks in a process pool.  Blocks are copied once into a shared memory
+    # slot, at most max_in_flight blocks are processed at a time and results are returned in submission order.
+    function: BlockFunction
+    max_workers: int
+    max_in_flight: int
+    drop_when_full: bool
+
+    def __init__(
+        self,
+        function: BlockFunction,
+        max_workers: Optional[int] = None,
+        max_in_flight: Optional[int] = None,
+        result_handler: Optional[Callable[[PipelineResult], None]] = None,
+        drop_when_full: bool = False,
+    ):
+        self.function = function
+        self.max_workers = max_workers if max_workers else max(1, (os.cpu_count() or 2) - 1)
+        self.max_in_flight = max_in_flight if max_in_flight else 2 * self.max_workers
+        self.result_handler = result_handler
+        self.drop_when_full = drop_when_full  # Drop blocks instead of waiting when max_in_flight are processing
+
+        self.num_submitted = 0
+        self.num_completed = 0
+        self.num_dropped = 0
+        self.num_errors = 0
+
+        self._executor = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._in_flight: deque[tuple[int, int, int, int, Future]] = deque()
+        self._results: list[PipelineResult] = []
+        self._free_slots: list[int] = []
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        self._slots = np.ndarray((0, 0, 0), dtype=np.float64)
+        self._analog_in: Any = None
+
+    # ---------- Stream ----------
+    def attach(self, analog_in: Any) -> None:
+        # Submit every block read by analog_in
+        self.detach()
+        self._analog_in = analog_in
+        analog_in.add_block_handler(self.submit)
+
+    def detach(self) -> None:
+        if self._analog_in:
+            self._analog_in.remove_block_handler(self.submit)
+            self._analog_in = None
+
+    def submit(self, block: AiBlock) -> bool:
+        # Queue a block for processing, returns False if it was dropped
+        self._collect(wait=False)
+        if not self._fits(block):
+            # Larger blocks need new slots, wait until the blocks in flight release the current ones
+            self._collect(wait=True)
+            self._allocate(len(block.data), block.num_samples)
+        elif not self._free_slots:
+            if self.drop_when_full:
+                self.num_dropped += 1
+                return False
+            # Back-pressure: wait for the oldest block
+            self._collect_one()
+
+        slot = self._free_slots.pop()
+        num_channels = len(block.data)
+        self._slots[slot, 0:num_channels, 0 : block.num_samples] = block.data
+
+        future = self._executor.submit(
+            _run_block_function,
+            self.function,
+            self._segment.name,  # type: ignore
+            self._slots.shape[1:],
+            slot,
+            num_channels,
+            block.num_samples,
+            block.first_sample_index,
+            block.sample_rate,
+        )
+        self._in_flight.append((self.num_submitted, slot, block.first_sample_index, block.num_samples, future))
+        self.num_submitted += 1
+        return True
+
+    # ---------- Results ----------
+    def get_results(self, wait: bool = False) -> list[PipelineResult]:
+        # Completed results in submission order.  With wait, block until every submitted block is processed.
+        self._collect(wait)
+        results = self._results
+        self._results = []
+        return results
+
+    def flush(self) -> list[PipelineResult]:
+        return self.get_results(wait=True)
+
+    def get_in_flight(self) -> int:
+        return len(self._in_flight)
+
+    def close(self) -> None:
+        self.detach()
+        self._collect(wait=True)
+        self._executor.shutdown(wait=True)
+        self._release_segment()
+
+    def _collect(self, wait: bool) -> None:
+        # Harvest results from the head of the queue only, so results stay in order
+        while self._in_flight and (wait or self._in_flight[0][4].done()):
+            self._collect_one()
+
+    def _collect_one(self) -> None:
+        sequence, slot, first_sample_index, num_samples, future = self._in_flight.popleft()
+        error: Optional[BaseException] = None
+        value = None
+        try:
+            value = future.result()
+        except Exception as e:
+            error = e
+            self.num_errors += 1
+            Logger.error("Block pipeline function failed on block %d: %s", sequence, e)
+        self._free_slots.append(slot)
+        self.num_completed += 1
+
+        result = PipelineResult(sequence, first_sample_index, num_samples, value, error)
+        if self.result_handler:
+            self.result_handler(result)
+        else:
+            self._results.append(result)
+
+    # ---------- Shared memory ----------
+    def _fits(self, block: AiBlock) -> bool:
+        return len(block.data) <= self._slots.shape[1] and block.num_samples <= self._slots.shape[2]
+
+    def _allocate(self, num_channels: int, num_samples: int) -> None:
+        # (Re)allocate the slots with headroom for larger blocks, only called with no blocks in flight
+        num_channels = max(num_channels, self._slots.shape[1])
+        num_samples = max(2 * num_samples, self._slots.shape[2])
+        self._release_segment()
+
+        self._segment = shared_memory.SharedMemory(
+            name=f"dwf_pipe_{uuid.uuid4().hex[0:16]}",
+            create=True,
+            size=self.max_in_flight * num_channels * num_samples * 8,
+        )
+        self._slots = np.ndarray(
+            (self.max_in_flight, num_channels, num_samples), dtype=np.float64, buffer=self._segment.buf
+        )
+        self._free_slots = list(range(0, self.max_in_flight))
+        Logger.debug(
+            "Block pipeline slots: %d x %d channels x %d samples", self.max_in_flight, num_channels, num_samples
+        )
+
+    def _release_segment(self) -> None:
+        self._slots = np.ndarray((0, 0, 0), dtype=np.float64)
+        self._free_slots = []
+        if self._segment:
+            self._segment.close()
+            self._segment.unlink()
+            self._segment = None
@@ -0,0 +1,103 @@
+from typing import Optional
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.utils.Logger import Logger
+
+
+class BufferTuner:
+    # Adapts the AI device buffer size and the host poll interval to the observed record status.
+    #  - Lost or corrupted samples: grow the buffer (applied immediately) and poll more often.
+    #  - Buffer filling up: poll more often.
+    #  - Sustained headroom: poll less often and shrink the buffer to reduce latency.  Shrinking is deferred to the
+    #    next acquisition start so it never causes a gap.
+    buffer_size_min: int
+    buffer_size_max: int
+    buffer_size: int
+    poll_interval: float
+
+    def __init__(
+        self,
+        buffer_size_min: int,
+        buffer_size_max: int,
+        poll_interval: float = 0.1,
+        poll_interval_min: float = 0.002,
+        poll_interval_max: float = 0.1,
+        low_water: float = 0.25,
+        high_water: float = 0.75,
+        headroom_polls: int = 100,
+    ):
+        self.buffer_size_min = max(1, buffer_size_min)
+        self.buffer_size_max = max(self.buffer_size_min, buffer_size_max)
+        self.buffer_size = self.buffer_size_max
+        self.poll_interval = poll_interval
+        self.poll_interval_min = poll_interval_min
+        self.poll_interval_max = poll_interval_max
+        self.low_water = low_water
+        self.high_water = high_water
+        self.headroom_polls = headroom_polls
+
+        self.num_adjustments = 0
+        self._headroom_count = 0
+        self._pending_buffer_size: Optional[int] = None
+
+    def reset(self, sample_rate: float) -> int:
+        # Pick the initial buffer size for an acquisition: enough for two poll intervals, within the device limits
+        target = int(sample_rate * self.poll_interval * 2)
+        self.buffer_size = self._clamp_buffer_size(self._pending_buffer_size or target)
+        self._pending_buffer_size = None
+        self._headroom_count = 0
+        return self.buffer_size
+
+    def update(self, available: int, lost: int, corrupted: int) -> Optional[int]:
+        # Process one record status.  Returns a new buffer size when it must be applied immediately, otherwise None.
+        if lost > 0 or corrupted > 0:
+            self._headroom_count = 0
+            self._pending_buffer_size = None
+            reason = f"{lost} samples lost, {corrupted} samples corrupted"
+            self._set_poll_interval(self.poll_interval / 2, reason)
+            if self.buffer_size < self.buffer_size_max:
+                return self._set_buffer_size(self.buffer_size * 2, reason)
+            return None
+
+        fill = available / self.buffer_size
+        if fill >= self.high_water:
+            self._headroom_count = 0
+            self._set_poll_interval(self.poll_interval / 2, f"buffer {fill:.0%} full")
+        elif fill <= self.low_water:
+            self._headroom_count += 1
+            if self._headroom_count >= self.headroom_polls:
+                self._headroom_count = 0
+                reason = f"buffer below {self.low_water:.0%} full for {self.headroom_polls} polls"
+                self._set_poll_interval(self.poll_interval * 1.5, reason)
+                smaller_size = self._clamp_buffer_size(self.buffer_size // 2)
+                if smaller_size < self.buffer_size and smaller_size != self._pending_buffer_size:
+                    self._pending_buffer_size = smaller_size
+                    self.num_adjustments += 1
+                    Logger.info("AI buffer size %d -> %d on next start (%s)", self.buffer_size, smaller_size, reason)
+        else:
+            self._headroom_count = 0
+
+        return None
+
+    def get_pending_buffer_size(self) -> Optional[int]:
+        return self._pending_buffer_size
+
+    def _set_buffer_size(self, buffer_size: int, reason: str) -> Optional[int]:
+        buffer_size = self._clamp_buffer_size(buffer_size)
+        if buffer_size == self.buffer_size:
+            return None
+        Logger.info("AI buffer size %d -> %d (%s)", self.buffer_size, buffer_size, reason)
+        self.buffer_size = buffer_size
+        self.num_adjustments += 1
+        return buffer_size
+
+    def _set_poll_interval(self, poll_interval: float, reason: str) -> None:
+        poll_interval = min(max(poll_interval, self.poll_interval_min), self.poll_interval_max)
+        if poll_interval == self.poll_interval:
+            return
+        Logger.info("AI poll interval %.1f -> %.1f ms (%s)", self.poll_interval * 1000, poll_interval * 1000, reason)
+        self.poll_interval = poll_interval
+        self.num_adjustments += 1
+
+    def _clamp_buffer_size(self, buffer_size: int) -> int:
+        return min(max(buffer_size, self.buffer_size_min), self.buffer_size_max)
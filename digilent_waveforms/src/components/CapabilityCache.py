@@ -0,0 +1,132 @@
+from typing import Any, Iterable, Optional
+import json
+import os
+import time
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.RateProber import RateProbeResult
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.constants.dwf_types import DeviceType
+
+CAPABILITY_CACHE_VERSION = 1
+
+
+def get_default_cache_path() -> str:
+    return os.path.join(os.path.expanduser("~"), ".digilent_waveforms", "capabilities.json")
+
+
+class DeviceCapabilities:
+    # Measured capabilities of a single device
+    serial_number: str
+    device_type: Optional[DeviceType]
+    record_rates: dict[int, float]  # Lossless record rate by enabled channel count, in S/s
+    dwell_time: float  # Dwell time of the record rate trials, in seconds
+    measured_time: float  # time.time() of the measurement
+
+    def __init__(
+        self,
+        serial_number: str,
+        device_type: Optional[DeviceType] = None,
+        record_rates: Optional[dict[int, float]] = None,
+        dwell_time: float = 0,
+        measured_time: float = 0,
+    ):
+        self.serial_number = serial_number
+        self.device_type = device_type
+        self.record_rates = record_rates if record_rates else {}
+        self.dwell_time = dwell_time
+        self.measured_time = measured_time
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "serial_number": self.serial_number,
+            "device_type": self.device_type.value if self.device_type else None,
+            "record_rates": {str(num_channels): rate for num_channels, rate in self.record_rates.items()},
+            "dwell_time": self.dwell_time,
+            "measured_time": self.measured_time,
+        }
+
+    @staticmethod
+    def from_dict(values: dict[str, Any]) -> "DeviceCapabilities":
+        device_type = values.get("device_type")
+        return DeviceCapabilities(
+            values["serial_number"],
+            DeviceType(device_type) if device_type is not None else None,
+            {int(num_channels): float(rate) for num_channels, rate in values.get("record_rates", {}).items()},
+            values.get("dwell_time", 0),
+            values.get("measured_time", 0),
+        )
+
+
+class CapabilityCache:
+    # Measured device capabilities (RateProber results) by serial number, persisted to a JSON file so they are
+    # measured once per device and host
+    file_path: str
+    devices: dict[str, DeviceCapabilities]
+
+    def __init__(self, file_path: Optional[str] = None):
+        self.file_path = file_path if file_path else get_default_cache_path()
+        self.devices = {}
+        self.load()
+
+    def load(self) -> None:
+        self.devices = {}
+        if not os.path.exists(self.file_path):
+            return
+        try:
+            with open(self.file_path, "r") as cache_file:
+                contents = json.load(cache_file)
+            if contents.get("version") != CAPABILITY_CACHE_VERSION:
+                Logger.warning("Ignoring capability cache (%s) of version %s", self.file_path, contents.get("version"))
+                return
+            for values in contents.get("devices", []):
+                capabilities = DeviceCapabilities.from_dict(values)
+                self.devices[capabilities.serial_number] = capabilities
+        except (OSError, ValueError, KeyError) as e:
+            Logger.warning("Failed to read capability cache (%s): %s", self.file_path, e)
+
+    def save(self) -> None:
+        # Write a temporary file and replace the cache, so a concurrent reader never sees a partial file
+        os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+        temp_path = f"{self.file_path}.tmp"
+        with open(temp_path, "w") as cache_file:
+            json.dump(
+                {
+                    "version": CAPABILITY_CACHE_VERSION,
+                    "devices": [capabilities.to_dict() for capabilities in self.devices.values()],
+                },
+                cache_file,
+                indent=2,
+            )
+        os.replace(temp_path, self.file_path)
+
+    def get(self, serial_number: str) -> Optional[DeviceCapabilities]:
+        return self.devices.get(serial_number)
+
+    def get_max_record_rate(self, serial_number: str, num_channels: int) -> Optional[float]:
+        # Measured lossless record rate, None if not measured
+        capabilities = self.get(serial_number)
+        return capabilities.record_rates.get(num_channels) if capabilities else None
+
+    def add_probe_results(
+        self, serial_number: str, device_type: Optional[DeviceType], results: Iterable[RateProbeResult]
+    ) -> DeviceCapabilities:
+        # Replace the record rates of the probed channel counts, channel counts without a lossless rate are removed
+        capabilities = self.devices.setdefault(serial_number, DeviceCapabilities(serial_number))
+        capabilities.device_type = device_type
+        capabilities.measured_time = time.time()
+        for result in results:
+            capabilities.dwell_time = result.dwell_time
+            if result.max_rate is None:
+                capabilities.record_rates.pop(result.num_channels, None)
+            else:
+                capabilities.record_rates[result.num_channels] = result.max_rate
+        return capabilities
+
+    def apply(self, device: Any) -> bool:
+        # Use the device's measured record rates as its AnalogInput record rate limits, returns whether any are known
+        capabilities = self.get(device.serial_number)
+        if capabilities is None or not capabilities.record_rates:
+            return False
+        device.AnalogInput.record_rate_limits.update(capabilities.record_rates)
+        return True
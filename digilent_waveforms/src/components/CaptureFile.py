@@ -0,0 +1,422 @@
+from typing import Any, Optional, Union
+import json
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.constants.ai_types import AiBlock, CaptureEncoding
+from digilent_waveforms.src.constants.error_codes import RecordingError
+
+# File layout:
+#   magic, header length (uint32), JSON header
+#   chunks: delta encoded (channels, samples) samples, byte shuffled into planes stored one by one
+#   chunk index: one INDEX_ENTRY per chunk
+#   footer: index offset (uint64), number of chunks (uint64), magic
+# A chunk holds up to chunk_samples contiguous samples, a gap in the sample indices starts a new chunk.  A chunk
+# starts with one PLANE_HEADER per byte plane, followed by the stored planes.  Version 1 chunks are a single zlib
+# stream of all planes.
+FILE_MAGIC = b"DWFCAP01"
+INDEX_MAGIC = b"DWFIDX01"
+CAPTURE_VERSION = 2
+SUPPORTED_VERSIONS = [1, 2]
+HEADER_PREFIX = struct.Struct("<8sI")
+FOOTER = struct.Struct("<QQ8s")
+INDEX_ENTRY = np.dtype(
+    [("offset", "<u8"), ("size", "<u4"), ("num_samples", "<u4"), ("first_sample_index", "<i8"), ("position", "<u8")]
+)
+PLANE_HEADER = struct.Struct("<BI")  # Storage, then the byte value of a constant plane or the stored size
+
+# Byte plane storage
+PLANE_CONSTANT = 0  # Every byte of the plane has the same value
+PLANE_RAW = 1
+PLANE_ZLIB = 2
+
+
+def _get_dtype(encoding: CaptureEncoding) -> np.dtype:
+    # Type of the encoded deltas
+    return np.dtype(np.int16 if encoding == CaptureEncoding.INT16 else np.uint64)
+
+
+def _encode(
+    samples: np.ndarray,
+    encoding: CaptureEncoding,
+    scale: float,
+    offset: float,
+    compression_level: int = 6,
+    raw_plane_ratio: float = 0.5,
+) -> bytes:
+    # samples: (channels, n) float64
+    if encoding == CaptureEncoding.INT16:
+        codes = np.clip(np.rint((samples - offset) / scale), -32768, 32767).astype(np.int16)
+        deltas = np.diff(codes, axis=1, prepend=np.int16(0))
+    else:
+        bits = np.ascontiguousarray(samples).view(np.uint64)
+        deltas = np.diff(bits, axis=1, prepend=np.uint64(0))
+
+    # Byte shuffle: plane n holds the n-th byte of every value, so the (mostly constant) high bytes compress well.
+    # Inflating is much slower than copying, planes that zlib does not shrink below raw_plane_ratio are stored raw.
+    planes = np.ascontiguousarray(deltas).view(np.uint8).reshape(-1, deltas.dtype.itemsize).T
+    headers: list[bytes] = []
+    stored: list[bytes] = []
+    for plane in planes:
+        if np.all(plane == plane[0]):
+            headers.append(PLANE_HEADER.pack(PLANE_CONSTANT, int(plane[0])))
+            continue
+        plane_bytes = np.ascontiguousarray(plane).tobytes()
+        compressed = zlib.compress(plane_bytes, compression_level)
+        if len(compressed) > raw_plane_ratio * len(plane_bytes):
+            headers.append(PLANE_HEADER.pack(PLANE_RAW, len(plane_bytes)))
+            stored.append(plane_bytes)
+        else:
+            headers.append(PLANE_HEADER.pack(PLANE_ZLIB, len(compressed)))
+            stored.append(compressed)
+    return b"".join(headers + stored)
+
+
+def _decode(
+    payload: bytes,
+    num_channels: int,
+    num_samples: int,
+    encoding: CaptureEncoding,
+    scale: float,
+    offset: float,
+    out: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    # (channels, num_samples) float64 samples of a chunk, written to out when given
+    dtype = _get_dtype(encoding)
+    deltas = np.empty((num_channels, num_samples), dtype=dtype)
+    value_bytes = deltas.reshape(-1).view(np.uint8).reshape(-1, dtype.itemsize)
+
+    # All constant planes are set with a single fill, the others are copied in
+    planes = [PLANE_HEADER.unpack_from(payload, plane * PLANE_HEADER.size) for plane in range(0, dtype.itemsize)]
+    constant = np.zeros(dtype.itemsize, dtype=np.uint8)
+    for plane, (storage, value) in enumerate(planes):
+        if storage == PLANE_CONSTANT:
+            constant[plane] = value
+    deltas.fill(constant.view(dtype)[0])
+
+    position = len(planes) * PLANE_HEADER.size
+    for plane, (storage, size) in enumerate(planes):
+        if storage == PLANE_CONSTANT:
+            continue
+        if storage == PLANE_ZLIB:
+            value_bytes[:, plane] = np.frombuffer(zlib.decompress(payload[position : position + size]), np.uint8)
+        else:
+            value_bytes[:, plane] = np.frombuffer(payload, np.uint8, size, position)
+        position += size
+    return _integrate(deltas, encoding, scale, offset, out)
+
+
+def _decode_version_1(
+    payload: bytes, num_channels: int, num_samples: int, encoding: CaptureEncoding, scale: float, offset: float
+) -> np.ndarray:
+    dtype = _get_dtype(encoding)
+    shuffled = np.frombuffer(zlib.decompress(payload), dtype=np.uint8).reshape(dtype.itemsize, -1)
+    deltas = np.ascontiguousarray(shuffled.T).view(dtype).reshape(num_channels, num_samples)
+    return _integrate(deltas, encoding, scale, offset)
+
+
+def _integrate(
+    deltas: np.ndarray, encoding: CaptureEncoding, scale: float, offset: float, out: Optional[np.ndarray] = None
+) -> np.ndarray:
+    # Sum the deltas, wrapping around like the encoder's differences
+    if encoding == CaptureEncoding.INT16:
+        out = np.multiply(np.cumsum(deltas, axis=1, dtype=np.int16), scale, out=out)
+        out += offset
+        return out
+    if out is None:
+        out = np.empty(deltas.shape)
+    np.cumsum(deltas, axis=1, out=out.view(np.uint64))
+    return out
+
+
+class CaptureWriter:
+    # Writes an analog input capture as fixed size, independently compressed chunks with a trailing index, so any
+    # range can be read back without decompressing the whole file
+    path: str
+    channels: list[int]
+    sample_rate: float
+    chunk_samples: int
+    encoding: CaptureEncoding
+    num_samples: int  # Samples written
+
+    def __init__(
+        self,
+        path: str,
+        channels: list[int],
+        sample_rate: float,
+        chunk_samples: int = 65536,
+        encoding: CaptureEncoding = CaptureEncoding.FLOAT64,
+        scale: float = 1.0,
+        offset: float = 0.0,
+        compression_level: int = 1,
+        raw_plane_ratio: float = 0.5,
+    ):
+        self.path = path
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.chunk_samples = chunk_samples
+        self.encoding = encoding
+        self.scale = scale  # INT16: volts per code, e.g. range / 65536
+        self.offset = offset  # INT16: volts at code 0
+        self.compression_level = compression_level
+        self.raw_plane_ratio = raw_plane_ratio  # Lower: faster reads, larger files
+        self.num_samples = 0
+        self._file = open(path, "wb")
+        self._index: list[tuple[int, int, int, int, int]] = []
+        self._buffer = np.zeros((len(channels), chunk_samples))
+        self._num_buffered = 0
+        self._buffer_first_sample_index = 0
+        self._next_sample_index: Optional[int] = None
+        self._analog_in: Any = None
+        self._queue: Optional[queue.Queue] = None
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_error: Optional[Exception] = None
+
+        header = {
+            "version": CAPTURE_VERSION,
+            "channels": channels,
+            "sample_rate": sample_rate,
+            "chunk_samples": chunk_samples,
+            "encoding": encoding.name,
+            "scale": scale,
+            "offset": offset,
+            "start_time": time.time(),
+        }
+        header_bytes = json.dumps(header).encode("utf-8")
+        self._file.write(HEADER_PREFIX.pack(FILE_MAGIC, len(header_bytes)))
+        self._file.write(header_bytes)
+
+    # ---------- Stream ----------
+    def attach(self, analog_in: Any, queue_blocks: int = 64) -> None:
+        # Write every block read by analog_in.  The blocks are handed to a writer thread through a bounded queue, so
+        # the compression does not run inside read_block.  A poll only waits when the writer is queue_blocks behind.
+        # Do not call write() while attached.
+        self.detach()
+        self._queue = queue.Queue(maxsize=queue_blocks)
+        self._writer_thread = threading.Thread(target=self._write_queued, name="CaptureWriter", daemon=True)
+        self._writer_thread.start()
+        self._analog_in = analog_in
+        analog_in.add_block_handler(self._queue_block)
+
+    def detach(self) -> None:
+        # Stop taking blocks from the attached analog input and wait until the queued blocks are written
+        if self._analog_in:
+            self._analog_in.remove_block_handler(self._queue_block)
+            self._analog_in = None
+        if self._writer_thread:
+            self._queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+            self._queue = None
+        self._raise_writer_error()
+
+    def write(self, data: Union[AiBlock, np.ndarray, list[list[float]]], first_sample_index: Optional[int] = None):
+        if isinstance(data, AiBlock):
+            first_sample_index = data.first_sample_index
+            data = data.data
+        samples = np.asarray(data, dtype=np.float64)
+        if samples.ndim != 2 or samples.shape[0] != len(self.channels):
+            msg = f"Captured data must have shape ({len(self.channels)}, n), got {samples.shape}"
+            raise DwfException(RecordingError.CHANNEL_MISMATCH.value, msg, msg)
+        if samples.shape[1] == 0:
+            return
+
+        if first_sample_index is None:
+            first_sample_index = self._next_sample_index if self._next_sample_index is not None else 0
+        if first_sample_index != self._next_sample_index:
+            # Gap: chunks are contiguous
+            self._flush_chunk()
+            self._buffer_first_sample_index = first_sample_index
+        self._next_sample_index = first_sample_index + samples.shape[1]
+
+        offset = 0
+        while offset < samples.shape[1]:
+            count = min(samples.shape[1] - offset, self.chunk_samples - self._num_buffered)
+            self._buffer[:, self._num_buffered : self._num_buffered + count] = samples[:, offset : offset + count]
+            self._num_buffered += count
+            offset += count
+            if self._num_buffered == self.chunk_samples:
+                self._flush_chunk()
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        try:
+            self.detach()
+        finally:
+            # The chunks written so far stay readable when the writer thread failed
+            self._flush_chunk()
+            index_offset = self._file.tell()
+            self._file.write(np.array(self._index, dtype=INDEX_ENTRY).tobytes())
+            self._file.write(FOOTER.pack(index_offset, len(self._index), INDEX_MAGIC))
+            self._file.close()
+
+    def _queue_block(self, block: AiBlock) -> None:
+        # Block handler of the attached analog input, runs on the poll thread
+        self._raise_writer_error()
+        if block.num_samples == 0:
+            return
+        # capture() blocks are views of the array it returns to the caller
+        data = block.data.copy() if isinstance(block.data, np.ndarray) else block.data
+        self._queue.put((data, block.first_sample_index))
+
+    def _write_queued(self) -> None:
+        # Writer thread: writes the queued blocks until detach() queues None.  After a failure the remaining blocks
+        # are dropped, so the poll never waits on a full queue, and the error is raised on the poll thread.
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._writer_error is None:
+                try:
+                    self.write(*item)
+                except Exception as e:
+                    Logger.error("Capture writer stopped: %s", e)
+                    self._writer_error = e
+
+    def _raise_writer_error(self) -> None:
+        if self._writer_error is not None:
+            raise self._writer_error
+
+    def _flush_chunk(self) -> None:
+        if self._num_buffered == 0:
+            return
+        payload = _encode(
+            self._buffer[:, 0 : self._num_buffered],
+            self.encoding,
+            self.scale,
+            self.offset,
+            self.compression_level,
+            self.raw_plane_ratio,
+        )
+        self._index.append(
+            (self._file.tell(), len(payload), self._num_buffered, self._buffer_first_sample_index, self.num_samples)
+        )
+        self._file.write(payload)
+        self.num_samples += self._num_buffered
+        self._buffer_first_sample_index += self._num_buffered
+        self._num_buffered = 0
+
+
+class CaptureReader:
+    # Random access to a capture written by CaptureWriter.  Only the chunks covering a requested range are read and
+    # decompressed, samples lost during the capture read as NaN.
+    path: str
+    channels: list[int]
+    sample_rate: float
+    encoding: CaptureEncoding
+    num_samples: int  # Captured samples
+    first_sample_index: int
+    end_sample_index: int  # Index following the last captured sample
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            magic, header_length = HEADER_PREFIX.unpack(self._file.read(HEADER_PREFIX.size))
+            if magic != FILE_MAGIC:
+                raise ValueError("not a capture file")
+            header = json.loads(self._file.read(header_length))
+
+            self._file.seek(-FOOTER.size, os.SEEK_END)
+            index_offset, num_chunks, index_magic = FOOTER.unpack(self._file.read(FOOTER.size))
+            if index_magic != INDEX_MAGIC:
+                raise ValueError("missing chunk index, the capture was not closed")
+            self._file.seek(index_offset)
+            self.index = np.frombuffer(self._file.read(num_chunks * INDEX_ENTRY.itemsize), dtype=INDEX_ENTRY)
+        except (ValueError, struct.error, json.JSONDecodeError) as e:
+            self._file.close()
+            msg = f"({path}) is not a readable capture: {e}"
+            raise DwfException(RecordingError.CORRUPT.value, msg, msg)
+
+        if header.get("version") not in SUPPORTED_VERSIONS:
+            self._file.close()
+            msg = f"Capture ({path}) version {header.get('version')} is not supported"
+            raise DwfException(RecordingError.INCOMPATIBLE.value, msg, msg)
+
+        self.version = header["version"]
+        self.channels = header["channels"]
+        self.sample_rate = header["sample_rate"]
+        self.encoding = CaptureEncoding[header["encoding"]]
+        self.scale = header["scale"]
+        self.offset = header["offset"]
+        self.start_time = header["start_time"]
+        self.num_samples = int(self.index["num_samples"].sum())
+        self.first_sample_index = int(self.index["first_sample_index"][0]) if num_chunks else 0
+        self.end_sample_index = (
+            int(self.index["first_sample_index"][-1] + self.index["num_samples"][-1]) if num_chunks else 0
+        )
+        self._chunk_starts = self.index["first_sample_index"].astype(np.int64)
+        self._chunk_ends = self._chunk_starts + self.index["num_samples"].astype(np.int64)
+        self._cached_chunk = -1
+        self._cached_samples = np.zeros((0, 0))
+
+    def read(self, start_index: int, count: int) -> np.ndarray:
+        # (channels, count) samples with absolute sample indices start_index ..., NaN where nothing was captured
+        samples = np.empty((len(self.channels), max(0, count)))
+        end_index = start_index + count
+        first_chunk = int(np.searchsorted(self._chunk_ends, start_index, side="right"))
+        last_chunk = int(np.searchsorted(self._chunk_starts, end_index, side="left"))
+
+        filled_index = start_index
+        for chunk in range(first_chunk, last_chunk):
+            chunk_start = int(self._chunk_starts[chunk])
+            chunk_end = int(self._chunk_ends[chunk])
+            copy_start = max(start_index, chunk_start)
+            copy_end = min(end_index, chunk_end)
+            if copy_end <= copy_start:
+                continue
+            samples[:, filled_index - start_index : copy_start - start_index] = np.nan
+            destination = samples[:, copy_start - start_index : copy_end - start_index]
+            if copy_start == chunk_start and copy_end == chunk_end and chunk != self._cached_chunk:
+                # Whole chunk: decode straight into the result
+                self._decode_chunk(chunk, destination)
+            else:
+                destination[:] = self._read_chunk(chunk)[:, copy_start - chunk_start : copy_end - chunk_start]
+            filled_index = copy_end
+        samples[:, filled_index - start_index :] = np.nan
+        return samples
+
+    def read_time(self, start_time: float, duration: float) -> np.ndarray:
+        # Samples from start_time seconds after the first sample (sample index 0), for duration seconds
+        start_index = int(round(start_time * self.sample_rate))
+        return self.read(start_index, int(round(duration * self.sample_rate)))
+
+    def get_duration(self) -> float:
+        return self.end_sample_index / self.sample_rate if self.sample_rate else 0
+
+    def get_lost_count(self) -> int:
+        return self.end_sample_index - self.first_sample_index - self.num_samples
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _read_chunk(self, chunk: int) -> np.ndarray:
+        # Sequential reads usually hit the same chunk again
+        if chunk != self._cached_chunk:
+            self._cached_samples = self._decode_chunk(chunk)
+            self._cached_chunk = chunk
+        return self._cached_samples
+
+    def _decode_chunk(self, chunk: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        entry = self.index[chunk]
+        self._file.seek(int(entry["offset"]))
+        payload = self._file.read(int(entry["size"]))
+        num_samples = int(entry["num_samples"])
+        if self.version == 1:
+            samples = _decode_version_1(
+                payload, len(self.channels), num_samples, self.encoding, self.scale, self.offset
+            )
+            if out is not None:
+                out[:] = samples
+            return samples
+        return _decode(payload, len(self.channels), num_samples, self.encoding, self.scale, self.offset, out)
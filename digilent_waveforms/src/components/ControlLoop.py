@@ -0,0 +1,208 @@
+from ctypes import *  # type: ignore
+from array import array
+from typing import Callable, Optional
+import logging
+import math
+import time
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.AnalogInput import AnalogIn
+from digilent_waveforms.src.components.AnalogOut import AnalogOut
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.DwfLibrary import call_error
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.constants.ai_types import AiAcquisitionMode, AnalogInConfig
+from digilent_waveforms.src.constants.ao_types import AnalogOutConfig, InstrumentStartMode, OutputFunction
+from digilent_waveforms.src.constants.error_codes import ControlLoopError
+
+# Callback receiving the latest sample of each AI channel and returning the new AO offset (None leaves AO unchanged)
+ControlCallback = Callable[[list[float]], Optional[float]]
+
+
+class ControlLoopStats:
+    iterations: int = 0
+    overruns: int = 0
+
+    # All times in seconds
+    period_mean: float = 0
+    period_jitter: float = 0  # Standard deviation of the loop period
+    period_min: float = 0
+    period_max: float = 0
+    latency_mean: float = 0  # Host time from sample poll to AO update
+    latency_p99: float = 0
+    latency_max: float = 0
+
+    def __init__(self, periods: list[float], latencies: list[float], overruns: int):
+        self.iterations = len(latencies)
+        self.overruns = overruns
+
+        if periods:
+            self.period_mean = sum(periods) / len(periods)
+            self.period_jitter = math.sqrt(sum((p - self.period_mean) ** 2 for p in periods) / len(periods))
+            self.period_min = min(periods)
+            self.period_max = max(periods)
+
+        if latencies:
+            sorted_latencies = sorted(latencies)
+            self.latency_mean = sum(latencies) / len(latencies)
+            self.latency_p99 = sorted_latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.latency_max = sorted_latencies[-1]
+
+    def to_str(self) -> str:
+        return (
+            f"Iterations: {self.iterations} (overruns {self.overruns})\r\n"
+            + f"Period: mean {self.period_mean * 1e3:.3f} ms, jitter {self.period_jitter * 1e6:.1f} us, "
+            + f"min {self.period_min * 1e3:.3f} ms, max {self.period_max * 1e3:.3f} ms\r\n"
+            + f"Latency: mean {self.latency_mean * 1e6:.1f} us, p99 {self.latency_p99 * 1e6:.1f} us, "
+            + f"max {self.latency_max * 1e6:.1f} us"
+        )
+
+
+class ControlLoop:
+    # Closed loop AI -> callback -> AO DC offset runner.  All ctypes arguments are built once in setup() so each
+    # iteration only performs the FDwf calls and the user callback.
+    dwf = any
+    device_handle: c_int
+    analog_in: AnalogIn
+    analog_out: AnalogOut
+
+    # Sleep until this long before the deadline, then spin for the remainder
+    SPIN_TIME = 0.002
+
+    def __init__(
+        self,
+        dwf: CDLL,
+        device_handle: c_int,
+        analog_in: AnalogIn,
+        analog_out: AnalogOut,
+        ai_channels: list[int],
+        ao_channel: int,
+        callback: ControlCallback,
+        period: float = 0.001,
+        sample_rate: float = 100000,
+        ai_range: float = 5,
+        initial_offset: float = 0,
+    ):
+        self.dwf = dwf
+        self.device_handle = device_handle
+        self.analog_in = analog_in
+        self.analog_out = analog_out
+        self.ai_channels = ai_channels
+        self.ao_channel = ao_channel
+        self.callback = callback
+        self.period = period
+        self.sample_rate = sample_rate
+        self.ai_range = ai_range
+        self.offset = initial_offset
+        self._is_setup = False
+
+    def setup(self) -> None:
+        # Analog output: DC function, the offset is the control output
+        ao_config = AnalogOutConfig(InstrumentStartMode.START)
+        ao_config.set_channel(self.ao_channel, enabled=True, function=OutputFunction.DC, offset=self.offset)
+        self.analog_out.apply(ao_config)
+
+        # Analog input: free running scan with a small buffer, only the latest sample of each channel is polled
+        ai_config = AnalogInConfig(acquisition_mode=AiAcquisitionMode.ScanShift, sample_rate=self.sample_rate)
+        for channel in self.ai_channels:
+            ai_config.set_channel(channel, enabled=True, range=self.ai_range)
+        self.analog_in.apply(ai_config, start=True)
+
+        # Prebuilt call path
+        self._status = self.dwf.FDwfAnalogInStatus
+        self._status_sample = self.dwf.FDwfAnalogInStatusSample
+        self._offset_set = self.dwf.FDwfAnalogOutOffsetSet
+        self._ao_configure = self.dwf.FDwfAnalogOutConfigure
+
+        self._read_data = c_int(1)
+        self._state = c_byte()
+        self._state_ref = byref(self._state)
+        self._ai_channel_args = [c_int(channel) for channel in self.ai_channels]
+        self._ai_values = [c_double() for _ in self.ai_channels]
+        self._ai_value_refs = [byref(value) for value in self._ai_values]
+        self._samples = [0.0] * len(self.ai_channels)
+        self._ao_channel_arg = c_int(self.ao_channel)
+        self._ao_offset = c_double(self.offset)
+        self._ao_apply = c_int(InstrumentStartMode.APPLY.value)
+
+        self._is_setup = True
+
+    def step(self) -> float:
+        # Run a single iteration and return its host latency in seconds
+        start = time.perf_counter()
+        handle = self.device_handle
+
+        if not self._status(handle, self._read_data, self._state_ref):
+            raise call_error(self.dwf, "FDwfAnalogInStatus")
+        samples = self._samples
+        for i in range(len(samples)):
+            if not self._status_sample(handle, self._ai_channel_args[i], self._ai_value_refs[i]):
+                raise call_error(self.dwf, "FDwfAnalogInStatusSample")
+            samples[i] = self._ai_values[i].value
+
+        offset = self.callback(samples)
+        if offset is not None and offset != self._ao_offset.value:
+            self._ao_offset.value = offset
+            self._offset_set(handle, self._ao_channel_arg, self._ao_offset)
+            self._ao_configure(handle, self._ao_channel_arg, self._ao_apply)
+
+        return time.perf_counter() - start
+
+    def run(self, iterations: int = 0, duration: float = 0) -> ControlLoopStats:
+        # Run for the specified number of iterations or duration (in seconds) and return the loop statistics
+        if iterations <= 0 and duration <= 0:
+            msg = "ControlLoop.run() requires a number of iterations or a duration"
+            raise DwfException(ControlLoopError.INVALID_RUN_LENGTH.value, msg, msg)
+
+        if not self._is_setup:
+            self.setup()
+
+        max_iterations = iterations if iterations > 0 else int(math.ceil(duration / self.period))
+        latencies = array("d", bytes(8 * max_iterations))
+        periods = array("d", bytes(8 * max_iterations))
+        overruns = 0
+
+        period = self.period
+        spin_time = self.SPIN_TIME
+        perf_counter = time.perf_counter
+        sleep = time.sleep
+
+        count = 0
+        previous_start = 0.0
+        deadline = perf_counter()
+        while count < max_iterations:
+            # Wait for the next period: coarse sleep, then spin for accuracy
+            remaining = deadline - perf_counter()
+            if remaining > spin_time:
+                sleep(remaining - spin_time)
+            while perf_counter() < deadline:
+                pass
+
+            iteration_start = perf_counter()
+            latencies[count] = self.step()
+            if count > 0:
+                periods[count - 1] = iteration_start - previous_start
+            previous_start = iteration_start
+            count += 1
+
+            deadline += period
+            if perf_counter() > deadline:
+                # Missed the next deadline, re-align instead of bursting to catch up
+                overruns += 1
+                deadline = perf_counter()
+
+        self._sync_ao_shadow()
+        stats = ControlLoopStats(periods[0 : max(0, count - 1)].tolist(), latencies[0:count].tolist(), overruns)
+        if Logger.isEnabledFor(logging.DEBUG):
+            Logger.debug("Control loop finished\r\n%s", stats.to_str())
+        return stats
+
+    def stop(self) -> None:
+        self.analog_in.stop()
+        self._sync_ao_shadow()
+        self._is_setup = False
+
+    def _sync_ao_shadow(self) -> None:
+        # The loop bypasses AnalogOut, record the last offset so later apply() calls diff correctly
+        if self._is_setup:
+            self.analog_out._update_shadow([self.ao_channel], "offset", [self._ao_offset.value])
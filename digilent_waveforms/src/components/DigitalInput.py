@@ -0,0 +1,267 @@
+from ctypes import *  # type: ignore
+from typing import Callable, Optional
+import time
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.DwfLibrary import call_error
+from digilent_waveforms.src.components.SampleClock import SampleClock
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.components.utils.Trace import Trace, get_trace
+from digilent_waveforms.src.constants.ai_types import AiAcquisitionMode, InstrumentState
+from digilent_waveforms.src.constants.di_types import DiBlock, DiClockSource, DiEdge, DiSampleFormat, DiSampleMode
+from digilent_waveforms.src.constants.error_codes import DigitalInputError
+from digilent_waveforms.src.constants.trace_types import TraceEvent
+
+SAMPLE_DTYPES = {DiSampleFormat.Bits8: np.uint8, DiSampleFormat.Bits16: np.uint16, DiSampleFormat.Bits32: np.uint32}
+
+
+# ---------- Line helpers ----------
+def get_sample_format(lines: list[int]) -> DiSampleFormat:
+    # Smallest sample format that holds the specified lines
+    highest_line = max(lines) if lines else 0
+    if highest_line < 8:
+        return DiSampleFormat.Bits8
+    if highest_line < 16:
+        return DiSampleFormat.Bits16
+    return DiSampleFormat.Bits32
+
+
+def extract_line(data: np.ndarray, line: int) -> np.ndarray:
+    # Level (0 / 1) of a single line of packed samples
+    return ((data >> data.dtype.type(line)) & 1).astype(np.uint8)
+
+
+def extract_lines(data: np.ndarray, lines: list[int]) -> np.ndarray:
+    # (lines, samples) levels of the specified lines of packed samples
+    shifts = np.asarray(lines, dtype=data.dtype)[:, np.newaxis]
+    return ((data[np.newaxis, :] >> shifts) & 1).astype(np.uint8)
+
+
+def find_edges(
+    data: np.ndarray, line: int, edge: DiEdge = DiEdge.Both, previous_sample: Optional[int] = None
+) -> np.ndarray:
+    # Indices of the first sample at the new level after each edge of a line.  Pass the last sample of the previous
+    # block as previous_sample to also detect an edge between the blocks (index 0).
+    levels = extract_line(data, line).astype(np.int8)
+    if previous_sample is None:
+        changes = np.diff(levels)
+        offset = 1
+    else:
+        changes = np.diff(levels, prepend=np.int8((int(previous_sample) >> line) & 1))
+        offset = 0
+
+    if edge == DiEdge.Rising:
+        return np.flatnonzero(changes > 0) + offset
+    if edge == DiEdge.Falling:
+        return np.flatnonzero(changes < 0) + offset
+    return np.flatnonzero(changes) + offset
+
+
+class DigitalIn:
+    # Digital input (logic analyzer) instrument.  Samples are kept packed, one uint8 / uint16 / uint32 per sample
+    # with line n in bit n, use extract_line() / find_edges() to get at single lines.
+    dwf = any
+    device_handle: c_int
+    line_count: int = 0
+    clock_frequency: float = 0  # Internal clock, the sample rate is this divided by an integer
+    divider_max: int = 1
+    buffer_size_max: int = 0
+    sample_format: DiSampleFormat = DiSampleFormat.Bits16
+
+    _di_sample_count = 0
+    _di_lost_count = 0
+    _di_corrupted_count = 0
+
+    # Absolute sample counter since acquisition start, lost samples included
+    sample_index: int = 0
+    actual_sample_rate: float = 0
+    sample_clock: SampleClock
+    _start_time: Optional[float] = None
+
+    # Consumers of the block stream, called with every block read in record mode
+    _block_handlers: list[Callable[[DiBlock], None]]
+
+    # Per-poll trace events
+    _trace: Trace
+
+    def __init__(self, dwf: CDLL, device_handle: c_int):
+        self._trace = get_trace()
+        self.dwf = dwf
+        self.device_handle = device_handle
+        self.sample_clock = SampleClock(0)
+        self._block_handlers = []
+
+        try:
+            self.line_count = self._get_int(self.dwf.FDwfDigitalInBitsInfo)
+            self.buffer_size_max = self._get_int(self.dwf.FDwfDigitalInBufferSizeInfo)
+            frequency = c_double()
+            self.dwf.FDwfDigitalInInternalClockInfo(self.device_handle, byref(frequency))
+            self.clock_frequency = frequency.value
+            divider_max = c_uint()
+            self.dwf.FDwfDigitalInDividerInfo(self.device_handle, byref(divider_max))
+            self.divider_max = max(1, divider_max.value)
+        except DwfException:
+            # Device without a digital input
+            self.line_count = 0
+
+        # Prebuilt arguments of the status calls made at every poll
+        self._read_data = c_int(1)
+        self._state_buffer = c_byte()
+        self._state_ref = byref(self._state_buffer)
+        self._record_buffers = (c_int(), c_int(), c_int())
+        self._record_refs = tuple(byref(buffer) for buffer in self._record_buffers)
+
+    # ---------- Configuration ----------
+    def set_sample_rate(self, sample_rate: float) -> float:
+        # The sample rate is the clock frequency divided by an integer, returns the actual sample rate
+        self._check_supported()
+        divider = int(min(max(1, round(self.clock_frequency / sample_rate)), self.divider_max))
+        self.dwf.FDwfDigitalInDividerSet(self.device_handle, c_uint(divider))
+        self.actual_sample_rate = self.clock_frequency / divider
+        if self.actual_sample_rate != sample_rate:
+            Logger.debug("DI sample rate coerced from %s to %s S/s", sample_rate, self.actual_sample_rate)
+        return self.actual_sample_rate
+
+    def get_sample_rate(self) -> float:
+        divider = c_uint()
+        self.dwf.FDwfDigitalInDividerGet(self.device_handle, byref(divider))
+        return self.clock_frequency / divider.value if divider.value else 0
+
+    def get_sample_rate_max(self) -> float:
+        return self.clock_frequency
+
+    def set_sample_format(self, sample_format: DiSampleFormat) -> None:
+        self.dwf.FDwfDigitalInSampleFormatSet(self.device_handle, c_int(sample_format.value))
+        self.sample_format = sample_format
+
+    def set_acquisition_mode(self, mode: AiAcquisitionMode) -> None:
+        # Digital and analog input share the acquisition modes
+        self.dwf.FDwfDigitalInAcquisitionModeSet(self.device_handle, c_int(mode.value))
+
+    def set_clock_source(self, source: DiClockSource) -> None:
+        self.dwf.FDwfDigitalInClockSourceSet(self.device_handle, c_int(source.value))
+
+    def set_sample_mode(self, mode: DiSampleMode) -> None:
+        self.dwf.FDwfDigitalInSampleModeSet(self.device_handle, c_int(mode.value))
+
+    def set_buffer_size(self, buffer_size: int) -> None:
+        self.dwf.FDwfDigitalInBufferSizeSet(self.device_handle, c_int(buffer_size))
+
+    def set_record_length(self, num_samples: int) -> None:
+        # Record mode: samples to acquire after the trigger, 0 to record until stopped
+        self.dwf.FDwfDigitalInTriggerPositionSet(self.device_handle, c_uint(max(0, num_samples)))
+
+    # ---------- Record Mode ----------
+    def record(
+        self, sample_rate: float, sample_format: DiSampleFormat = DiSampleFormat.Bits16, num_samples: int = -1
+    ) -> None:
+        self._check_supported()
+        self.set_acquisition_mode(AiAcquisitionMode.Record)
+        self.set_sample_format(sample_format)
+        self.set_sample_rate(sample_rate)
+        self.set_record_length(0 if num_samples < 0 else num_samples)
+        self.start()
+
+    def start(self) -> None:
+        self.dwf.FDwfDigitalInConfigure(self.device_handle, c_int(1), c_int(1))
+        self._reset_soft_counters()
+        self._start_time = time.perf_counter()
+        self.sample_clock.reset(self.actual_sample_rate, self._start_time)
+
+    def stop(self) -> None:
+        self.dwf.FDwfDigitalInConfigure(self.device_handle, c_int(0), c_int(0))
+
+    # ---------- State & Status ----------
+    def get_state(self) -> InstrumentState:
+        if not self.dwf.FDwfDigitalInStatus(self.device_handle, self._read_data, self._state_ref):
+            raise call_error(self.dwf, "FDwfDigitalInStatus")
+        return InstrumentState(self._state_buffer.value)
+
+    def get_record_status(self) -> tuple[int, int, int]:
+        available_buffer, lost_buffer, corrupted_buffer = self._record_buffers
+        if not self.dwf.FDwfDigitalInStatusRecord(self.device_handle, *self._record_refs):
+            raise call_error(self.dwf, "FDwfDigitalInStatusRecord")
+        return (available_buffer.value, lost_buffer.value, corrupted_buffer.value)
+
+    # ---------- Block stream ----------
+    def add_block_handler(self, handler: Callable[[DiBlock], None]) -> None:
+        # Handlers must not modify the block, it is also returned to the reader
+        self._block_handlers.append(handler)
+
+    def remove_block_handler(self, handler: Callable[[DiBlock], None]) -> None:
+        if handler in self._block_handlers:
+            self._block_handlers.remove(handler)
+
+    # ---------- Read ----------
+    def read_block(self) -> DiBlock:
+        # Read all available samples as a block stamped with its absolute first sample index and host time
+        state = self.get_state()
+        if self._di_sample_count == 0 and state in [
+            InstrumentState.Config,
+            InstrumentState.Prefill,
+            InstrumentState.Armed,
+        ]:
+            # Acquisition has not yet started
+            return self._make_block(self._empty(), self.sample_index, 0, 0)
+
+        samples_available, samples_lost, samples_corrupted = self.get_record_status()
+        self._di_lost_count += samples_lost
+        self._di_corrupted_count += samples_corrupted
+        self._trace.record(TraceEvent.DiStatus, samples_available, samples_lost, samples_corrupted)
+
+        # Lost samples were dropped before the samples now available
+        first_sample_index = self.sample_index + samples_lost
+        self.sample_index = first_sample_index + samples_available
+        if samples_available > 0:
+            # A poll without new samples carries no timing information, the samples may be just about to arrive
+            self.sample_clock.update(self.sample_index, time.perf_counter())
+
+        if samples_available == 0:
+            return self._make_block(self._empty(), first_sample_index, samples_lost, samples_corrupted)
+
+        self._di_sample_count += samples_available
+        data = self.read_samples(samples_available)
+        block = self._make_block(data, first_sample_index, samples_lost, samples_corrupted)
+        for handler in self._block_handlers:
+            handler(block)
+        return block
+
+    def read_samples(self, num_samples: int) -> np.ndarray:
+        # Copy the samples of the last status read straight into a packed array
+        data = np.empty(num_samples, dtype=SAMPLE_DTYPES[self.sample_format])
+        if not self.dwf.FDwfDigitalInStatusData(self.device_handle, data.ctypes.data_as(c_void_p), c_int(data.nbytes)):
+            raise call_error(self.dwf, "FDwfDigitalInStatusData")
+        return data
+
+    # ---------- Utilities ----------
+    def check_lines(self, lines: list[int]) -> None:
+        for line in lines:
+            if line not in range(0, self.line_count):
+                msg = f"The specified DIO line ({line}) does not exist on the selected device."
+                raise DwfException(DigitalInputError.INVALID_LINE.value, msg, msg)
+
+    def _check_supported(self) -> None:
+        if self.line_count == 0:
+            msg = "The selected device has no digital input."
+            raise DwfException(DigitalInputError.NOT_SUPPORTED.value, msg, msg)
+
+    def _get_int(self, function: Callable) -> int:
+        retval = c_int()
+        function(self.device_handle, byref(retval))
+        return retval.value
+
+    def _empty(self) -> np.ndarray:
+        return np.empty(0, dtype=SAMPLE_DTYPES[self.sample_format])
+
+    def _make_block(self, data: np.ndarray, first_sample_index: int, lost: int, corrupted: int) -> DiBlock:
+        host_time = self.sample_clock.host_time_of(first_sample_index)
+        return DiBlock(data, first_sample_index, lost, corrupted, self.actual_sample_rate, host_time)
+
+    def _reset_soft_counters(self) -> None:
+        self.sample_index = 0
+        self._di_sample_count = 0
+        self._di_lost_count = 0
+        self._di_corrupted_count = 0
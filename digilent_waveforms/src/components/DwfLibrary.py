@@ -0,0 +1,185 @@
+from ctypes import (
+    CDLL,
+    POINTER,
+    byref,
+    c_byte,
+    c_char_p,
+    c_double,
+    c_int,
+    c_ubyte,
+    c_uint,
+    c_void_p,
+    create_string_buffer,
+)
+from typing import Any, Callable, Optional
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.utils.Trace import get_trace
+from digilent_waveforms.src.constants.error_codes import LibraryError
+from digilent_waveforms.src.constants.trace_types import TraceEvent
+
+# Argument types of the FDwf functions used by Manager, Device and the subsystems, all return an int (0 on failure).
+# Sample and string buffers are declared as void / char pointers so both byref(buffer) and the buffer itself can be
+# passed.  Handles, channels and values may be passed as ctypes objects or plain Python values.
+_INT_P = POINTER(c_int)
+_DOUBLE_P = POINTER(c_double)
+_UINT_P = POINTER(c_uint)
+_STATE_P = POINTER(c_byte)
+
+PROTOTYPES: dict[str, list[Any]] = {
+    # Library & enumeration
+    "FDwfGetLastError": [_INT_P],
+    "FDwfGetVersion": [c_char_p],
+    "FDwfParamSet": [c_int, c_int],
+    "FDwfParamGet": [c_int, _INT_P],
+    "FDwfEnum": [c_int, _INT_P],
+    "FDwfEnumDeviceType": [c_int, _INT_P, _INT_P],
+    "FDwfEnumDeviceIsOpened": [c_int, _INT_P],
+    "FDwfEnumUserName": [c_int, c_char_p],
+    "FDwfEnumDeviceName": [c_int, c_char_p],
+    "FDwfEnumSN": [c_int, c_char_p],
+    # Device
+    "FDwfDeviceOpen": [c_int, _INT_P],
+    "FDwfDeviceClose": [c_int],
+    "FDwfDeviceCloseAll": [],
+    "FDwfDeviceAutoConfigureSet": [c_int, c_int],
+    "FDwfDeviceAutoConfigureGet": [c_int, _INT_P],
+    "FDwfDeviceReset": [c_int],
+    # Analog input
+    "FDwfAnalogInChannelCount": [c_int, _INT_P],
+    "FDwfAnalogInConfigure": [c_int, c_int, c_int],
+    "FDwfAnalogInStatus": [c_int, c_int, _STATE_P],
+    "FDwfAnalogInStatusSamplesLeft": [c_int, _INT_P],
+    "FDwfAnalogInStatusSamplesValid": [c_int, _INT_P],
+    "FDwfAnalogInStatusIndexWrite": [c_int, _INT_P],
+    "FDwfAnalogInStatusRecord": [c_int, _INT_P, _INT_P, _INT_P],
+    "FDwfAnalogInStatusData": [c_int, c_int, c_void_p, c_int],
+    "FDwfAnalogInStatusSample": [c_int, c_int, _DOUBLE_P],
+    "FDwfAnalogInFrequencyInfo": [c_int, _DOUBLE_P, _DOUBLE_P],
+    "FDwfAnalogInFrequencySet": [c_int, c_double],
+    "FDwfAnalogInFrequencyGet": [c_int, _DOUBLE_P],
+    "FDwfAnalogInBufferSizeInfo": [c_int, _INT_P, _INT_P],
+    "FDwfAnalogInBufferSizeSet": [c_int, c_int],
+    "FDwfAnalogInBufferSizeGet": [c_int, _INT_P],
+    "FDwfAnalogInAcquisitionModeSet": [c_int, c_int],
+    "FDwfAnalogInAcquisitionModeGet": [c_int, _INT_P],
+    "FDwfAnalogInRecordLengthSet": [c_int, c_double],
+    "FDwfAnalogInRecordLengthGet": [c_int, _DOUBLE_P],
+    "FDwfAnalogInChannelEnableSet": [c_int, c_int, c_int],
+    "FDwfAnalogInChannelEnableGet": [c_int, c_int, _INT_P],
+    "FDwfAnalogInChannelRangeInfo": [c_int, _DOUBLE_P, _DOUBLE_P, _DOUBLE_P],
+    "FDwfAnalogInChannelRangeSteps": [c_int, c_void_p, _INT_P],
+    "FDwfAnalogInChannelRangeSet": [c_int, c_int, c_double],
+    "FDwfAnalogInChannelRangeGet": [c_int, c_int, _DOUBLE_P],
+    "FDwfAnalogInTriggerSourceSet": [c_int, c_ubyte],
+    "FDwfAnalogInTriggerPositionSet": [c_int, c_double],
+    "FDwfAnalogInTriggerAutoTimeoutSet": [c_int, c_double],
+    # Digital input
+    "FDwfDigitalInReset": [c_int],
+    "FDwfDigitalInConfigure": [c_int, c_int, c_int],
+    "FDwfDigitalInStatus": [c_int, c_int, _STATE_P],
+    "FDwfDigitalInStatusRecord": [c_int, _INT_P, _INT_P, _INT_P],
+    "FDwfDigitalInStatusData": [c_int, c_void_p, c_int],
+    "FDwfDigitalInInternalClockInfo": [c_int, _DOUBLE_P],
+    "FDwfDigitalInClockSourceSet": [c_int, c_int],
+    "FDwfDigitalInDividerInfo": [c_int, _UINT_P],
+    "FDwfDigitalInDividerSet": [c_int, c_uint],
+    "FDwfDigitalInDividerGet": [c_int, _UINT_P],
+    "FDwfDigitalInBitsInfo": [c_int, _INT_P],
+    "FDwfDigitalInSampleFormatSet": [c_int, c_int],
+    "FDwfDigitalInBufferSizeInfo": [c_int, _INT_P],
+    "FDwfDigitalInBufferSizeSet": [c_int, c_int],
+    "FDwfDigitalInSampleModeSet": [c_int, c_int],
+    "FDwfDigitalInAcquisitionModeSet": [c_int, c_int],
+    "FDwfDigitalInTriggerPositionSet": [c_int, c_uint],
+    # Analog output
+    "FDwfAnalogOutCount": [c_int, _INT_P],
+    "FDwfAnalogOutConfigure": [c_int, c_int, c_int],
+    "FDwfAnalogOutStatus": [c_int, c_int, _STATE_P],
+    "FDwfAnalogOutEnableSet": [c_int, c_int, c_int],
+    "FDwfAnalogOutFunctionSet": [c_int, c_int, c_ubyte],
+    "FDwfAnalogOutFrequencySet": [c_int, c_int, c_double],
+    "FDwfAnalogOutAmplitudeSet": [c_int, c_int, c_double],
+    "FDwfAnalogOutOffsetSet": [c_int, c_int, c_double],
+    "FDwfAnalogOutLimitationSet": [c_int, c_int, c_double],
+}
+
+# Function numbers recorded in CallFailed trace events
+PROTOTYPE_INDICES = {name: index for index, name in enumerate(PROTOTYPES)}
+
+# Functions that report a failure through their return value without it being an error of the call
+UNCHECKED = {"FDwfGetLastError", "FDwfGetLastErrorMsg"}
+
+# Status functions called at every poll are bound without the errcheck callback, which costs about as much as the
+# argument types save.  Their callers test the returned int inline and raise call_error() only when a call fails.
+HOT_PATH = {
+    "FDwfAnalogInStatus",
+    "FDwfAnalogInStatusRecord",
+    "FDwfAnalogInStatusData",
+    "FDwfAnalogInStatusSample",
+    "FDwfDigitalInStatus",
+    "FDwfDigitalInStatusRecord",
+    "FDwfDigitalInStatusData",
+}
+
+
+def bind(
+    library: CDLL, name: str, argtypes: list[Any], restype: Any = c_int, errcheck: Optional[Callable] = None
+) -> Callable[..., Any]:
+    # Look up and prototype a single library function
+    function = getattr(library, name)
+    function.argtypes = argtypes
+    function.restype = restype
+    if errcheck is not None:
+        function.errcheck = errcheck
+    return function
+
+
+def call_error(dwf: Any, name: str) -> DwfException:
+    # Exception for a failed call of the named function, with the SDK's last error.  Works with any WaveForms SDK
+    # implementation (DwfLibrary, a CDLL or an emulated backend).
+    error_code = c_int()
+    message = create_string_buffer(512)
+    dwf.FDwfGetLastError(byref(error_code))
+    dwf.FDwfGetLastErrorMsg(message)
+    get_trace().record(TraceEvent.CallFailed, PROTOTYPE_INDICES.get(name, -1), error_code.value)
+    msg = f"{name} failed: {message.value.decode('utf-8', 'replace').strip()}"
+    return DwfException(LibraryError.CALL_FAILED.value, msg, msg)
+
+
+class DwfLibrary:
+    # Prototyped view of the WaveForms SDK library.  The functions in PROTOTYPES are bound once with their argument
+    # types and, except for the HOT_PATH status functions, a return code check that raises DwfException (with
+    # FDwfGetLastErrorMsg) when a call fails.  Other FDwf functions are forwarded to the library untyped.
+    library: CDLL
+    check_errors: bool
+
+    def __init__(self, library: CDLL, check_errors: bool = True):
+        self.library = library
+        self.check_errors = check_errors
+        self.FDwfGetLastErrorMsg = bind(library, "FDwfGetLastErrorMsg", [c_char_p])
+
+        errcheck = self._check_result if check_errors else None
+        for name, argtypes in PROTOTYPES.items():
+            try:
+                checked = name not in UNCHECKED and name not in HOT_PATH
+                function = bind(library, name, argtypes, errcheck=errcheck if checked else None)
+            except AttributeError:
+                # Not exported by this WaveForms version
+                continue
+            setattr(self, name, function)
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names that were not bound above
+        return getattr(self.library, name)
+
+    def get_last_error_message(self) -> str:
+        message = create_string_buffer(512)
+        self.FDwfGetLastErrorMsg(message)
+        return message.value.decode("utf-8", "replace").strip()
+
+    def _check_result(self, result: int, function: Any, args: tuple) -> int:
+        if result == 0:
+            raise call_error(self, function.__name__)
+        return result
@@ -0,0 +1,295 @@
+from ctypes import *  # type: ignore
+from typing import Optional
+import math
+import time
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.AnalogInput import AnalogIn
+from digilent_waveforms.src.components.AnalogOut import AnalogOut
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.DwfLibrary import call_error
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.constants.ai_types import AiAcquisitionMode, AnalogInConfig, InstrumentState
+from digilent_waveforms.src.constants.ao_types import AnalogOutConfig, InstrumentStartMode, OutputFunction
+from digilent_waveforms.src.constants.dwfconstants import trigsrcAnalogOut1
+from digilent_waveforms.src.constants.error_codes import FrequencySweepError
+
+
+def get_log_frequencies(start: float, stop: float, num_points: int) -> np.ndarray:
+    # Logarithmically spaced sweep frequencies, in Hz
+    return np.geomspace(start, stop, num_points)
+
+
+def demodulate(data: np.ndarray, frequency: float, sample_rate: float, start_time: float = 0) -> np.ndarray:
+    # Single bin (lock-in) demodulation of each row of data: complex amplitude c of the frequency component, so that
+    # the row is ~ |c| cos(2 pi f t + angle(c)) with t = start_time + sample index / sample_rate.  A Hann window
+    # keeps the leakage of DC and the negative frequency image negligible when the capture is not exactly an
+    # integer number of periods (coerced sample rates).
+    num_samples = data.shape[-1]
+    window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(0, num_samples) / num_samples)
+    times = start_time + np.arange(0, num_samples) / sample_rate
+    phasor = window * np.exp(-2j * np.pi * frequency * times)
+    return 2 * (data @ phasor) / window.sum()
+
+
+class SweepPoint:
+    # Acquisition plan of a single frequency
+    frequency: float
+    sample_rate: float  # Actual (coerced) AI sample rate
+    num_samples: int
+    settle_time: float  # Time from the stimulus start to the first captured sample, in seconds
+
+    def __init__(self, frequency: float, sample_rate: float, num_samples: int, settle_time: float):
+        self.frequency = frequency
+        self.sample_rate = sample_rate
+        self.num_samples = num_samples
+        self.settle_time = settle_time
+
+    def get_duration(self) -> float:
+        return self.settle_time + self.num_samples / self.sample_rate
+
+
+class BodeData:
+    # Frequency response of a sweep, one entry per frequency
+    frequencies: np.ndarray  # Hz
+    response: np.ndarray  # Complex transfer function, response / reference
+    response_amplitude: np.ndarray  # Peak volts at the response channel
+    reference_amplitude: np.ndarray  # Peak volts at the reference channel (or the AO amplitude)
+    sample_rates: np.ndarray
+    num_samples: np.ndarray
+    settle_times: np.ndarray
+    duration: float  # Sweep time in seconds
+    acquisition_time: float  # Sum of the settle and capture times, the lower bound of the sweep time
+
+    def __init__(
+        self,
+        points: list[SweepPoint],
+        response_amplitudes: np.ndarray,
+        reference_amplitudes: np.ndarray,
+        duration: float,
+    ):
+        self.frequencies = np.array([point.frequency for point in points])
+        self.sample_rates = np.array([point.sample_rate for point in points])
+        self.num_samples = np.array([point.num_samples for point in points])
+        self.settle_times = np.array([point.settle_time for point in points])
+        self.response_amplitude = np.asarray(response_amplitudes)
+        self.reference_amplitude = np.asarray(reference_amplitudes)
+        self.response = self.response_amplitude / self.reference_amplitude
+        self.duration = duration
+        self.acquisition_time = float(sum(point.get_duration() for point in points))
+
+    def get_magnitude(self) -> np.ndarray:
+        return np.abs(self.response)
+
+    def get_magnitude_db(self) -> np.ndarray:
+        return 20 * np.log10(np.maximum(np.abs(self.response), 1e-15))
+
+    def get_phase(self, unwrap: bool = True) -> np.ndarray:
+        # Phase in degrees, unwrapped across the sweep by default
+        phase = np.angle(self.response)
+        return np.degrees(np.unwrap(phase) if unwrap else phase)
+
+    def to_str(self) -> str:
+        lines = [f"{'Frequency Hz':>14} {'Magnitude dB':>13} {'Phase deg':>10}"]
+        for frequency, magnitude, phase in zip(self.frequencies, self.get_magnitude_db(), self.get_phase()):
+            lines.append(f"{frequency:>14.6g} {magnitude:>13.3f} {phase:>10.2f}")
+        lines.append(
+            f"Sweep time {self.duration:.3f} s, settle + capture time {self.acquisition_time:.3f} s "
+            + f"({len(self.frequencies)} points)"
+        )
+        return "\r\n".join(lines)
+
+
+class FrequencySweep:
+    # Frequency response analyzer: an analog output channel generates a sine at each sweep frequency, the analog input
+    # is triggered by the output start and captures the response after the settle time.  Each point uses the shortest
+    # settle and capture that meet the configured minimums (periods and samples) at the sample rate the buffer
+    # allows, and magnitude / phase come from single bin demodulation of the captured channels.  With overlap the
+    # next point is captured while the previous one is analyzed, so the sweep time approaches the acquisition time.
+    dwf = any
+    device_handle: c_int
+    analog_in: AnalogIn
+    analog_out: AnalogOut
+
+    # Timeout margin per point on top of its settle and capture time, in seconds
+    POINT_TIMEOUT = 1.0
+
+    def __init__(
+        self,
+        dwf: CDLL,
+        device_handle: c_int,
+        analog_in: AnalogIn,
+        analog_out: AnalogOut,
+        ao_channel: int = 0,
+        response_channel: int = 1,
+        reference_channel: Optional[int] = 0,
+        amplitude: float = 1.0,
+        offset: float = 0,
+        ai_range: float = 5,
+        settle_cycles: float = 2,
+        settle_time: float = 0,
+        min_cycles: int = 8,
+        min_samples: int = 256,
+        samples_per_cycle: int = 32,
+        overlap: bool = True,
+    ):
+        self.dwf = dwf
+        self.device_handle = device_handle
+        self.analog_in = analog_in
+        self.analog_out = analog_out
+        self.ao_channel = ao_channel
+        self.response_channel = response_channel
+        self.reference_channel = reference_channel  # None: phase relative to the stimulus start
+        self.amplitude = amplitude
+        self.offset = offset
+        self.ai_range = ai_range
+        self.settle_cycles = settle_cycles
+        self.settle_time = settle_time  # Minimum, e.g. a few time constants of the device under test
+        self.min_cycles = min_cycles
+        self.min_samples = min_samples
+        self.samples_per_cycle = samples_per_cycle
+        self.overlap = overlap
+        self._is_setup = False
+
+    def setup(self) -> None:
+        # Analog input: single acquisition of the enabled channels, started by the analog output
+        self.channels = [self.response_channel]
+        if self.reference_channel is not None:
+            self.channels.insert(0, self.reference_channel)
+        ai_config = AnalogInConfig(acquisition_mode=AiAcquisitionMode.Single)
+        for channel in self.channels:
+            ai_config.set_channel(channel, enabled=True, range=self.ai_range)
+        self.analog_in.apply(ai_config)
+        self.analog_in.set_trigger_source(c_ubyte(trigsrcAnalogOut1.value + self.ao_channel))
+        self.analog_in.set_trigger_auto_timeout(0)
+
+        self.sample_rate_min, self.sample_rate_max = self.analog_in.get_sample_rate_min_max()
+        _, self.buffer_size_max = self.analog_in.get_buffer_size_min_max()
+        self._is_setup = True
+
+    def plan_point(self, frequency: float) -> SweepPoint:
+        # Shortest capture of at least min_cycles periods and min_samples samples at samples_per_cycle, at the
+        # sample rate the device accepts.  Lower frequencies need longer captures, the sample rate is reduced so the
+        # capture fits in the buffer.
+        if frequency <= 0:
+            msg = f"Sweep frequency ({frequency}) must be greater than 0 Hz"
+            raise DwfException(FrequencySweepError.INVALID_FREQUENCY.value, msg, msg)
+
+        sample_rate = min(max(frequency * self.samples_per_cycle, self.sample_rate_min), self.sample_rate_max)
+        cycles = max(self.min_cycles, math.ceil(self.min_samples * frequency / sample_rate))
+        if cycles * sample_rate / frequency > self.buffer_size_max:
+            sample_rate = max(self.buffer_size_max * frequency / cycles, self.sample_rate_min)
+        sample_rate = self._set_sample_rate(sample_rate)
+
+        if sample_rate < 2.5 * frequency:
+            msg = f"Sweep frequency ({frequency} Hz) is too high for the maximum sample rate ({sample_rate} S/s)"
+            raise DwfException(FrequencySweepError.INVALID_FREQUENCY.value, msg, msg)
+
+        # Whole samples of settling and an even capture length, so the first sample is exactly settle_time after the
+        # trigger (the reference-less phase is relative to it) and the trigger position falls on a sample
+        num_samples = min(int(round(cycles * sample_rate / frequency)), self.buffer_size_max) // 2 * 2
+        settle_time = math.ceil(max(self.settle_cycles / frequency, self.settle_time) * sample_rate) / sample_rate
+        return SweepPoint(frequency, sample_rate, num_samples, settle_time)
+
+    def run(self, frequencies: list[float]) -> BodeData:
+        if not self._is_setup:
+            self.setup()
+
+        start_time = time.perf_counter()
+        num_points = len(frequencies)
+        points: list[SweepPoint] = []
+        response_amplitudes = np.zeros(num_points, dtype=complex)
+        reference_amplitudes = np.zeros(num_points, dtype=complex)
+
+        # With overlap, point n is analyzed while the device captures point n + 1
+        pending: Optional[tuple[int, SweepPoint, np.ndarray]] = None
+        for index in range(0, num_points):
+            point = self.plan_point(frequencies[index])
+            points.append(point)
+            self._start_capture(point)
+
+            if pending:
+                response_amplitudes[pending[0]], reference_amplitudes[pending[0]] = self._analyze(*pending[1:])
+                pending = None
+
+            data = self._read_capture(point)
+            if self.overlap:
+                pending = (index, point, data)
+            else:
+                response_amplitudes[index], reference_amplitudes[index] = self._analyze(point, data)
+
+        if pending:
+            response_amplitudes[pending[0]], reference_amplitudes[pending[0]] = self._analyze(*pending[1:])
+
+        bode_data = BodeData(points, response_amplitudes, reference_amplitudes, time.perf_counter() - start_time)
+        Logger.debug(
+            "Frequency sweep of %d points in %.3f s (settle + capture %.3f s)",
+            num_points,
+            bode_data.duration,
+            bode_data.acquisition_time,
+        )
+        return bode_data
+
+    def stop(self) -> None:
+        self.analog_in.stop()
+        self.analog_out.stop_channel(self.ao_channel)
+        self._is_setup = False
+
+    # ---------- Point ----------
+    def _set_sample_rate(self, sample_rate: float) -> float:
+        # Returns the rate the device coerced the requested rate to
+        if self.analog_in.get_applied_setting("sample_rate") != sample_rate:
+            self.analog_in.set_sample_rate(sample_rate)
+        return self.analog_in.get_sample_rate()
+
+    def _start_capture(self, point: SweepPoint) -> None:
+        # Arm the analog input with the capture placed settle_time after the trigger, then (re)start the output
+        self.analog_in.apply(AnalogInConfig(buffer_size=point.num_samples))
+        self.analog_in.set_trigger_position(point.settle_time + point.num_samples / point.sample_rate / 2)
+        self.analog_in.start()
+        self._wait_for_state([InstrumentState.Armed], self.POINT_TIMEOUT, point, read_data=False)
+
+        ao_config = AnalogOutConfig(InstrumentStartMode.START)
+        ao_config.set_channel(
+            self.ao_channel,
+            enabled=True,
+            function=OutputFunction.SINE,
+            frequency=point.frequency,
+            amplitude=self.amplitude,
+            offset=self.offset,
+        )
+        self.analog_out.apply(ao_config)
+
+    def _read_capture(self, point: SweepPoint) -> np.ndarray:
+        self._wait_for_state([InstrumentState.Done], point.get_duration() + self.POINT_TIMEOUT, point)
+        return np.array([self.analog_in.read_sample_array(channel, point.num_samples) for channel in self.channels])
+
+    def _analyze(self, point: SweepPoint, data: np.ndarray) -> tuple[complex, complex]:
+        # (response, reference) complex amplitudes
+        amplitudes = demodulate(data, point.frequency, point.sample_rate, point.settle_time)
+        if self.reference_channel is not None:
+            return (amplitudes[1], amplitudes[0])
+        # The stimulus is amplitude * sin(2 pi f t) from the trigger
+        return (amplitudes[0], self.amplitude * np.exp(-0.5j * np.pi))
+
+    def _wait_for_state(
+        self, states: list[InstrumentState], timeout: float, point: SweepPoint, read_data: bool = True
+    ) -> None:
+        read_data_arg = c_int(1 if read_data else 0)
+        state = c_byte()
+        timeout_time = time.perf_counter() + timeout
+        while True:
+            if not self.dwf.FDwfAnalogInStatus(self.device_handle, read_data_arg, byref(state)):
+                raise call_error(self.dwf, "FDwfAnalogInStatus")
+            if InstrumentState(state.value) in states:
+                return
+            if time.perf_counter() > timeout_time:
+                msg = (
+                    f"Timeout waiting for the {point.frequency} Hz sweep point, analog input state "
+                    + f"({InstrumentState(state.value).name})"
+                )
+                raise DwfException(FrequencySweepError.TIMEOUT.value, msg, msg)
+            # Sleep for half of the remaining expected time, then poll closely once it has passed
+            time.sleep(max(0.0001, (timeout_time - self.POINT_TIMEOUT - time.perf_counter()) / 2))
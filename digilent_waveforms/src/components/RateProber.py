@@ -0,0 +1,182 @@
+from typing import Optional
+import math
+import time
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.AnalogInput import AnalogIn
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.constants.ai_types import RecordRatePolicy
+from digilent_waveforms.src.constants.error_codes import AnalogInputErorr
+
+
+class RateTrial:
+    # Record at a single rate for the dwell time
+    sample_rate: float  # Requested
+    actual_sample_rate: float  # After coercion by the device
+    num_channels: int
+    num_samples: int  # Per channel
+    lost: int
+    corrupted: int
+    duration: float  # Seconds recorded, shorter than the dwell time if samples were lost
+
+    def __init__(
+        self,
+        sample_rate: float,
+        actual_sample_rate: float,
+        num_channels: int,
+        num_samples: int,
+        lost: int,
+        corrupted: int,
+        duration: float,
+    ):
+        self.sample_rate = sample_rate
+        self.actual_sample_rate = actual_sample_rate
+        self.num_channels = num_channels
+        self.num_samples = num_samples
+        self.lost = lost
+        self.corrupted = corrupted
+        self.duration = duration
+
+    def is_lossless(self) -> bool:
+        return self.num_samples > 0 and self.lost == 0 and self.corrupted == 0
+
+    def to_str(self) -> str:
+        result = "lossless" if self.is_lossless() else f"lost {self.lost}, corrupted {self.corrupted}"
+        return f"{self.actual_sample_rate:>14.6g} S/s x {self.num_channels}  {self.duration:>6.2f} s  {result}"
+
+
+class RateProbeResult:
+    # Highest lossless record rate found for a channel count, and the trials of the search
+    num_channels: int
+    max_rate: Optional[float]  # Actual (coerced) rate, None if even the lowest probed rate lost samples
+    dwell_time: float
+    trials: list[RateTrial]
+
+    def __init__(self, num_channels: int, max_rate: Optional[float], dwell_time: float, trials: list[RateTrial]):
+        self.num_channels = num_channels
+        self.max_rate = max_rate
+        self.dwell_time = dwell_time
+        self.trials = trials
+
+    def to_str(self) -> str:
+        lines = [trial.to_str() for trial in self.trials]
+        max_rate = "none" if self.max_rate is None else f"{self.max_rate:.6g} S/s"
+        lines.append(f"{self.num_channels} channel(s): maximum lossless record rate {max_rate}")
+        return "\r\n".join(lines)
+
+
+class RateProber:
+    # Measures the highest record rate the device, USB host controller and host sustain without lost or corrupted
+    # samples.  For each channel count a binary search (on a log scale) records at the midpoint of the highest
+    # lossless and lowest lossy rate for the dwell time, reading every block like a streaming consumer, until the two
+    # are within resolution of each other.  A trial ends at the first loss.
+    analog_in: AnalogIn
+    dwell_time: float
+    resolution: float
+    min_rate: float
+    max_rate: Optional[float]
+    poll_interval: float
+
+    def __init__(
+        self,
+        analog_in: AnalogIn,
+        dwell_time: float = 2.0,
+        resolution: float = 0.02,
+        min_rate: float = 1000,
+        max_rate: Optional[float] = None,
+        range: float = 5,
+        poll_interval: float = 0.01,
+    ):
+        self.analog_in = analog_in
+        self.dwell_time = dwell_time
+        self.resolution = resolution  # Relative width of the final search interval
+        self.min_rate = min_rate
+        self.max_rate = max_rate  # The device's maximum sample rate by default
+        self.range = range
+        self.poll_interval = poll_interval
+
+    def probe(self, num_channels: int) -> RateProbeResult:
+        channels = self.get_channels(num_channels)
+        max_rate = self.max_rate if self.max_rate else self.analog_in.get_sample_rate_max()
+        trials: list[RateTrial] = []
+
+        # Rates above the nominal limit are recorded on purpose
+        record_rate_policy = self.analog_in.record_rate_policy
+        self.analog_in.record_rate_policy = RecordRatePolicy.Ignore
+        try:
+            lossless: Optional[RateTrial] = None
+            lossy_rate = max_rate
+            for sample_rate in [self.min_rate, max_rate]:
+                trial = self.run_trial(channels, sample_rate)
+                trials.append(trial)
+                if not trial.is_lossless():
+                    break
+                lossless = trial
+
+            if lossless is not None and lossless.sample_rate < max_rate:
+                lossless_rate = lossless.sample_rate
+                while lossy_rate / lossless_rate > 1 + self.resolution:
+                    trial = self.run_trial(channels, math.sqrt(lossless_rate * lossy_rate))
+                    trials.append(trial)
+                    if trial.is_lossless():
+                        lossless = trial
+                        lossless_rate = trial.sample_rate
+                    else:
+                        lossy_rate = trial.sample_rate
+        finally:
+            self.analog_in.record_rate_policy = record_rate_policy
+
+        result = RateProbeResult(
+            num_channels, lossless.actual_sample_rate if lossless else None, self.dwell_time, trials
+        )
+        Logger.info(
+            "Maximum lossless record rate with %d channel(s): %s S/s (%d trials)",
+            num_channels,
+            result.max_rate,
+            len(trials),
+        )
+        return result
+
+    def probe_all(self, channel_counts: Optional[list[int]] = None) -> dict[int, RateProbeResult]:
+        # Every channel count from 1 to the device's channel count by default
+        if channel_counts is None:
+            channel_counts = list(range(1, self.analog_in.channel_count + 1))
+        return {num_channels: self.probe(num_channels) for num_channels in channel_counts}
+
+    def run_trial(self, channels: list[int], sample_rate: float) -> RateTrial:
+        self.analog_in.record(channels, sample_rate, range=self.range)
+        num_samples = 0
+        lost = 0
+        corrupted = 0
+        start_time = time.perf_counter()
+        end_time = start_time + self.dwell_time
+        try:
+            while time.perf_counter() < end_time:
+                block = self.analog_in.read_block(channels)
+                num_samples += block.num_samples
+                lost += block.lost
+                corrupted += block.corrupted
+                if lost or corrupted:
+                    break
+                time.sleep(max(0, min(self.poll_interval, end_time - time.perf_counter())))
+        finally:
+            self.analog_in.stop()
+
+        trial = RateTrial(
+            sample_rate,
+            self.analog_in.actual_sample_rate,
+            len(channels),
+            num_samples,
+            lost,
+            corrupted,
+            time.perf_counter() - start_time,
+        )
+        Logger.debug("Rate probe trial %s", trial.to_str())
+        return trial
+
+    def get_channels(self, num_channels: int) -> list[int]:
+        if num_channels < 1 or num_channels > self.analog_in.channel_count:
+            msg = f"Cannot probe {num_channels} channel(s), the device has {self.analog_in.channel_count} AI channels."
+            raise DwfException(AnalogInputErorr.INVALID_CHANNEL.value, msg, msg)
+        return list(range(0, num_channels))
@@ -0,0 +1,134 @@
+from fractions import Fraction
+from typing import Union
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.constants.ai_types import AiBlock
+
+
+class Resampler:
+    # Streaming polyphase resampler from the device's (coerced) sample rate to an exact output rate.  Output sample k
+    # is interpolated at input position k * input_rate / output_rate with a Kaiser windowed sinc filter bank of
+    # num_phases fractional delays, coefficients are linearly interpolated between neighbouring phases.  Positions
+    # are computed from absolute sample indices rather than accumulated, so the output stays sample-accurate over
+    # long runs.  Only the filter's history is kept between blocks, and every input block produces all the output
+    # samples it completes.
+    num_channels: int
+    input_rate: float
+    output_rate: float
+    half_taps: int
+    num_phases: int
+
+    def __init__(
+        self,
+        num_channels: int,
+        input_rate: float,
+        output_rate: float,
+        half_taps: int = 16,
+        num_phases: int = 256,
+        cutoff: float = 0.9,
+        beta: float = 8.0,
+    ):
+        self.num_channels = num_channels
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        self.half_taps = half_taps
+        self.num_phases = num_phases
+        self.step = input_rate / output_rate  # Input samples per output sample
+
+        # Pass band up to cutoff * the lower Nyquist frequency of the two rates, in cycles per input sample
+        bandwidth = cutoff * 0.5 * min(1.0, 1 / self.step)
+
+        # Row p holds the taps for a fractional delay of p / num_phases, plus a last row (delay 1) to interpolate to
+        offsets = np.arange(1 - half_taps, half_taps + 1)[np.newaxis, :] - (
+            np.arange(0, num_phases + 1)[:, np.newaxis] / num_phases
+        )
+        window = np.i0(beta * np.sqrt(np.clip(1 - (offsets / half_taps) ** 2, 0, None))) / np.i0(beta)
+        kernel = np.sinc(2 * bandwidth * offsets) * window
+        self._phases = kernel / np.sum(kernel, axis=1, keepdims=True)  # Unity DC gain for every phase
+        self._phase_steps = np.diff(self._phases, axis=0)
+        self._taps = np.arange(1 - half_taps, half_taps + 1)
+        self.reset()
+
+    # ---------- Stream ----------
+    def reset(self) -> None:
+        self._buffer = np.zeros((self.num_channels, 0))
+        self._buffer_start = 0  # Absolute input index of _buffer[:, 0]
+        self.next_output_index = 0  # Absolute output index of the next output sample
+
+    def process(self, data: Union[np.ndarray, list[list[float]]], first_sample_index: int) -> tuple[np.ndarray, int]:
+        # Add a (channels, samples) block starting at absolute input index first_sample_index, returns the output
+        # samples it completes and the absolute output index of the first one.  A block that does not follow the
+        # previous one (lost samples) restarts the output at the first position the new samples cover.
+        samples = np.asarray(data, dtype=np.float64)
+        if samples.ndim != 2 or samples.shape[1] == 0:
+            return np.zeros((self.num_channels, 0)), self.next_output_index
+
+        buffer_end = self._buffer_start + self._buffer.shape[1]
+        if self._buffer.shape[1] == 0 or first_sample_index != buffer_end:
+            self._buffer = samples
+            self._buffer_start = first_sample_index
+            # First output position with a full filter history
+            self.next_output_index = int(np.ceil((first_sample_index + self.half_taps - 1) / self.step))
+            while self.next_output_index * self.step < first_sample_index + self.half_taps - 1:
+                self.next_output_index += 1
+        else:
+            self._buffer = np.concatenate((self._buffer, samples), axis=1)
+        buffer_end = self._buffer_start + self._buffer.shape[1]
+
+        # Output positions whose filter taps are all buffered
+        first_output_index = self.next_output_index
+        last_output_index = int(np.ceil((buffer_end - self.half_taps) / self.step))
+        output_indices = np.arange(first_output_index, last_output_index + 1)
+        positions = output_indices * self.step - self._buffer_start
+        positions = positions[positions < buffer_end - self._buffer_start - self.half_taps]
+        num_output = len(positions)
+
+        if num_output > 0:
+            whole = np.floor(positions)
+            phase = (positions - whole) * self.num_phases
+            phase_index = np.minimum(phase.astype(np.int64), self.num_phases - 1)
+            coefficients = (
+                self._phases[phase_index] + (phase - phase_index)[:, np.newaxis] * self._phase_steps[phase_index]
+            )
+            indices = whole.astype(np.int64)[:, np.newaxis] + self._taps[np.newaxis, :]
+            output = np.einsum("ckt,kt->ck", self._buffer[:, indices], coefficients)
+            self.next_output_index = first_output_index + num_output
+        else:
+            output = np.zeros((self.num_channels, 0))
+
+        # Keep the history the next output position needs
+        next_position = int(np.floor(self.next_output_index * self.step)) - self._buffer_start
+        keep_from = max(0, min(self._buffer.shape[1], next_position - self.half_taps))
+        self._buffer = self._buffer[:, keep_from:]
+        self._buffer_start += keep_from
+        return output, first_output_index
+
+    def process_block(self, block: AiBlock) -> AiBlock:
+        # Resampled copy of an analog input block, sample indices and rate of the output stream
+        output, first_output_index = self.process(block.data, block.first_sample_index)
+        host_time = block.host_time + (first_output_index * self.step - block.first_sample_index) / self.input_rate
+        return AiBlock(
+            output.tolist(),
+            block.channels,
+            first_output_index,
+            max(1, int(round(block.lost / self.step))) if block.lost else 0,
+            block.corrupted,
+            self.output_rate,
+            host_time,
+        )
+
+    # ---------- Accuracy ----------
+    def get_rate_error(self) -> float:
+        # Relative difference of the input (device) rate from the output rate, the error corrected by resampling
+        return self.input_rate / self.output_rate - 1
+
+    def get_residual_error(self) -> float:
+        # Relative error of the rate ratio used for the output positions (float rounding), left after resampling
+        exact = Fraction(self.input_rate) / Fraction(self.output_rate)
+        return float(abs(Fraction(self.step) - exact) / exact)
+
+    def get_delay(self) -> float:
+        # Samples held back by the filter, in seconds
+        return self.half_taps / self.input_rate
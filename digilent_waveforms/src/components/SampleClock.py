@@ -0,0 +1,87 @@
+import time
+from typing import Optional
+
+
+class SampleClock:
+    # Maps absolute sample indices to host time.  Each poll provides an observation (number of samples acquired,
+    # host time) and the clock fits host time against sample count with an exponentially weighted least squares
+    # estimate, so slow drift between the device sample clock and the host clock is tracked.
+    sample_rate: float
+    time_constant: float
+
+    # Limit the fitted period to +/- this deviation from nominal so noisy early observations can't run away
+    MAX_DRIFT_PPM = 1000
+
+    def __init__(self, sample_rate: float, time_constant: float = 30.0):
+        self.time_constant = time_constant
+        self.reset(sample_rate)
+
+    def reset(self, sample_rate: float, start_time: Optional[float] = None) -> None:
+        self.sample_rate = sample_rate
+        self.start_time = time.perf_counter() if start_time is None else start_time
+        self._period = 1 / sample_rate if sample_rate > 0 else 0
+        self._offset = self.start_time
+        self._num_observations = 0
+        self._x_ref = 0.0
+        self._y_ref = 0.0
+        self._last_x = 0.0
+
+        # Exponentially weighted sums for the least squares fit
+        self._sw = 0.0
+        self._sx = 0.0
+        self._sy = 0.0
+        self._sxx = 0.0
+        self._sxy = 0.0
+
+    def update(self, sample_count: int, host_time: Optional[float] = None) -> None:
+        # sample_count samples (including lost samples) have been acquired by host_time
+        if self.sample_rate <= 0:
+            return
+        host_time = time.perf_counter() if host_time is None else host_time
+
+        if self._num_observations == 0:
+            # Reference point keeps the sums small enough for double precision
+            self._x_ref = float(sample_count)
+            self._y_ref = host_time
+        x = sample_count - self._x_ref
+        y = host_time - self._y_ref
+
+        # Forget old observations over roughly time_constant seconds of acquisition
+        decay = 1.0
+        if self._num_observations > 0 and self.time_constant > 0:
+            elapsed = max(0.0, (x - self._last_x) / self.sample_rate)
+            decay = 2.0 ** (-elapsed / self.time_constant)
+        self._last_x = x
+        self._num_observations += 1
+
+        self._sw = self._sw * decay + 1
+        self._sx = self._sx * decay + x
+        self._sy = self._sy * decay + y
+        self._sxx = self._sxx * decay + x * x
+        self._sxy = self._sxy * decay + x * y
+
+        nominal_period = 1 / self.sample_rate
+        variance = self._sw * self._sxx - self._sx * self._sx
+        if self._num_observations >= 3 and variance > 0:
+            period = (self._sw * self._sxy - self._sx * self._sy) / variance
+            max_deviation = nominal_period * self.MAX_DRIFT_PPM * 1e-6
+            self._period = min(max(period, nominal_period - max_deviation), nominal_period + max_deviation)
+        else:
+            self._period = nominal_period
+
+        # Host time of sample index 0
+        self._offset = self._y_ref + (self._sy - self._period * self._sx) / self._sw - self._period * self._x_ref
+
+    def host_time_of(self, sample_index: int) -> float:
+        # Estimated host time (time.perf_counter() base) at which the sample with the specified index was acquired
+        return self._offset + sample_index * self._period
+
+    def get_drift_ppm(self) -> float:
+        # Device clock drift relative to the host clock, positive when the device runs slow
+        if self.sample_rate <= 0:
+            return 0
+        return (self._period * self.sample_rate - 1) * 1e6
+
+    def get_effective_sample_rate(self) -> float:
+        # Sample rate measured against the host clock
+        return 1 / self._period if self._period > 0 else 0
@@ -0,0 +1,143 @@
+from typing import Any, Optional, Union
+import math
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.constants.ai_types import AiBlock
+
+
+def get_segment_length(sample_rate: float, resolution: float) -> int:
+    # Smallest power of two segment length with a frequency resolution of at least resolution Hz
+    return 2 ** max(1, math.ceil(math.log2(sample_rate / resolution)))
+
+
+class SpectrumEstimator:
+    # Streaming Welch power spectral density estimate of an analog input stream.  Incoming samples are cut into
+    # overlapping, Hann windowed segments whose one sided periodograms are averaged.  Memory is constant: only the
+    # partial segment and the averaged spectrum are kept.
+    #  - averages = 0: linear average of every segment since the start (or the last reset)
+    #  - averages > 0: linear average of the first averages segments, then exponential averaging with the same
+    #    time constant so the estimate tracks changes
+    num_channels: int
+    sample_rate: float
+    segment_length: int
+    overlap: float
+    averages: int
+    density: bool
+
+    def __init__(
+        self,
+        num_channels: int,
+        sample_rate: float,
+        segment_length: int = 4096,
+        overlap: float = 0.5,
+        averages: int = 0,
+        density: bool = True,
+        detrend: bool = True,
+    ):
+        self.num_channels = num_channels
+        self.sample_rate = sample_rate
+        self.segment_length = segment_length
+        self.overlap = overlap
+        self.averages = averages
+        self.density = density  # PSD in V^2/Hz, otherwise power spectrum in V^2
+        self.detrend = detrend  # Remove each segment's mean
+        self.hop = max(1, int(round(segment_length * (1 - overlap))))
+
+        # Window, scale and frequencies are computed once
+        self._window = 0.5 - 0.5 * np.cos(2 * np.pi * np.arange(0, segment_length) / segment_length)  # Periodic Hann
+        if density:
+            scale = 1 / (sample_rate * np.sum(self._window * self._window))
+        else:
+            scale = 1 / np.sum(self._window) ** 2
+        num_bins = segment_length // 2 + 1
+        self._scale = np.full(num_bins, 2 * scale)  # One sided: double all bins but DC and Nyquist
+        self._scale[0] = scale
+        if segment_length % 2 == 0:
+            self._scale[-1] = scale
+        self.frequencies = np.fft.rfftfreq(segment_length, 1 / sample_rate)
+
+        self._pending = np.zeros((num_channels, segment_length))
+        self._analog_in: Any = None
+        self.reset()
+
+    # ---------- Stream ----------
+    def attach(self, analog_in: Any) -> None:
+        # Update with every block read by analog_in
+        self.detach()
+        self._analog_in = analog_in
+        analog_in.add_block_handler(self.update)
+
+    def detach(self) -> None:
+        if self._analog_in:
+            self._analog_in.remove_block_handler(self.update)
+            self._analog_in = None
+
+    def reset(self) -> None:
+        self.num_segments = 0
+        self.end_sample_index = 0  # Absolute index following the last sample of the last averaged segment
+        self._spectrum = np.zeros((self.num_channels, self.segment_length // 2 + 1))
+        self._num_pending = 0
+        self._next_sample_index: Optional[int] = None
+
+    def update(
+        self, data: Union[AiBlock, np.ndarray, list[list[float]]], first_sample_index: Optional[int] = None
+    ) -> int:
+        # Add a (channels, samples) block, returns the number of segments it completed
+        if isinstance(data, AiBlock):
+            first_sample_index = data.first_sample_index
+            data = data.data
+        samples = np.asarray(data, dtype=np.float64)
+        if samples.ndim != 2 or samples.shape[1] == 0:
+            return 0
+
+        # Segments never span a gap
+        if first_sample_index is None:
+            first_sample_index = self._next_sample_index if self._next_sample_index is not None else 0
+        if self._next_sample_index is not None and first_sample_index != self._next_sample_index:
+            self._num_pending = 0
+        self._next_sample_index = first_sample_index + samples.shape[1]
+
+        if self._num_pending:
+            samples = np.concatenate((self._pending[:, 0 : self._num_pending], samples), axis=1)
+        num_segments = 0
+        if samples.shape[1] >= self.segment_length:
+            num_segments = (samples.shape[1] - self.segment_length) // self.hop + 1
+            segments = np.lib.stride_tricks.sliding_window_view(samples, self.segment_length, axis=1)[
+                :, 0 : (num_segments - 1) * self.hop + 1 : self.hop
+            ]
+            self._average(segments)
+            consumed = num_segments * self.hop
+            self.end_sample_index = self._next_sample_index - (
+                samples.shape[1] - (consumed - self.hop) - self.segment_length
+            )
+        else:
+            consumed = 0
+
+        # Keep the samples of the next, partial segment
+        remaining = samples.shape[1] - consumed
+        self._pending[:, 0:remaining] = samples[:, consumed:]
+        self._num_pending = remaining
+        return num_segments
+
+    # ---------- Results ----------
+    def get_spectrum(self) -> tuple[np.ndarray, np.ndarray]:
+        # Frequencies (Hz) and the (channels, bins) averaged spectrum
+        return (self.frequencies, self._spectrum.copy())
+
+    def get_resolution(self) -> float:
+        return self.sample_rate / self.segment_length
+
+    def _average(self, segments: np.ndarray) -> None:
+        # segments: (channels, segments, segment_length)
+        if self.detrend:
+            segments = segments - segments.mean(axis=2, keepdims=True)
+        periodograms = np.abs(np.fft.rfft(segments * self._window, axis=2)) ** 2 * self._scale
+
+        for segment_index in range(0, periodograms.shape[1]):
+            self.num_segments += 1
+            weight = 1 / self.num_segments
+            if self.averages > 0:
+                weight = max(weight, 1 / self.averages)
+            self._spectrum += (periodograms[:, segment_index] - self._spectrum) * weight
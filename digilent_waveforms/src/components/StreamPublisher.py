@@ -0,0 +1,281 @@
+from multiprocessing import shared_memory
+from typing import Optional, Union
+import sys
+import time
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.components.utils.Logger import Logger
+from digilent_waveforms.src.constants.ai_types import AiBlock
+from digilent_waveforms.src.constants.error_codes import StreamError
+
+# Shared memory layout: a header of 16 uint64 fields, a block table of (write count, sample index) uint64 pairs for
+# the most recent blocks, then a (channels, capacity) float64 ring.
+RING_MAGIC = 0x31474E4952465744  # "DWFRING1"
+RING_VERSION = 1
+HEADER_FIELDS = 16
+BLOCK_TABLE_SIZE = 1024
+HEADER_SIZE = (HEADER_FIELDS + 2 * BLOCK_TABLE_SIZE) * 8
+
+# Header field indices
+H_MAGIC = 0
+H_VERSION = 1
+H_NUM_CHANNELS = 2
+H_CAPACITY = 3
+H_SAMPLE_RATE = 4  # float64 bits
+H_SEQUENCE = 5  # Odd while a block is being written
+H_WRITE_COUNT = 6  # Total samples written to the ring
+H_STREAM_INDEX = 7  # Absolute sample index following the last written sample
+H_BLOCK_COUNT = 8
+H_LOST = 9  # Total samples lost by the acquisition
+H_HOST_TIME = 10  # float64 bits, host time of the last written sample
+H_CLOSED = 11
+H_ERROR = 12  # Error code of the failure that stopped the publisher, 0 while publishing
+
+
+def _float_to_bits(value: float) -> int:
+    return int(np.array(value, dtype=np.float64).view(np.uint64))
+
+
+def _bits_to_float(value: int) -> float:
+    return float(np.array(value, dtype=np.uint64).view(np.float64))
+
+
+class StreamView:
+    # Zero copy, read only view of published samples
+    data: np.ndarray  # (channels, samples), valid until the publisher overwrites it, see StreamSubscriber.is_valid()
+    first_sample_index: int  # Absolute sample index of data[:, 0]
+    write_count_start: int
+    overrun: int  # Samples this subscriber missed because it fell behind the publisher
+
+    def __init__(self, data: np.ndarray, first_sample_index: int, write_count_start: int, overrun: int):
+        self.data = data
+        self.first_sample_index = first_sample_index
+        self.write_count_start = write_count_start
+        self.overrun = overrun
+
+
+class StreamPublisher:
+    # Publishes analog input blocks into a shared memory ring that any number of local processes can map
+    name: str
+    num_channels: int
+    capacity: int
+
+    def __init__(self, name: str, num_channels: int, capacity: int, sample_rate: float = 0):
+        try:
+            self._shm = shared_memory.SharedMemory(
+                name=name, create=True, size=HEADER_SIZE + num_channels * capacity * 8
+            )
+        except FileExistsError:
+            msg = f"A stream named ({name}) is already published"
+            raise DwfException(StreamError.NAME_IN_USE.value, msg, msg)
+
+        self.name = name
+        self.num_channels = num_channels
+        self.capacity = capacity
+        self._header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=self._shm.buf)
+        self._block_table = np.ndarray(
+            (2, BLOCK_TABLE_SIZE), dtype=np.uint64, buffer=self._shm.buf, offset=HEADER_FIELDS * 8
+        )
+        self._ring = np.ndarray((num_channels, capacity), dtype=np.float64, buffer=self._shm.buf, offset=HEADER_SIZE)
+
+        self._header[:] = 0
+        self._header[H_VERSION] = RING_VERSION
+        self._header[H_NUM_CHANNELS] = num_channels
+        self._header[H_CAPACITY] = capacity
+        self._header[H_SAMPLE_RATE] = _float_to_bits(sample_rate)
+        self._header[H_MAGIC] = RING_MAGIC  # Written last, marks the ring as initialized
+        self._write_count = 0
+        self._stream_index: Optional[int] = None
+
+    def publish(self, block: Union[AiBlock, np.ndarray], first_sample_index: Optional[int] = None) -> None:
+        if isinstance(block, AiBlock):
+            data = np.asarray(block.data, dtype=np.float64)
+            first_sample_index = block.first_sample_index
+            host_time = block.host_time + (block.num_samples - 1) / block.sample_rate if block.sample_rate else 0
+            if block.sample_rate:
+                self._header[H_SAMPLE_RATE] = _float_to_bits(block.sample_rate)
+        else:
+            data = np.asarray(block, dtype=np.float64)
+            host_time = time.perf_counter()
+        if data.ndim != 2 or data.shape[0] != self.num_channels:
+            msg = f"Published data must have shape ({self.num_channels}, n), got {data.shape}"
+            raise DwfException(StreamError.SHAPE_MISMATCH.value, msg, msg)
+
+        num_samples = data.shape[1]
+        if first_sample_index is None:
+            first_sample_index = self._stream_index if self._stream_index is not None else 0
+        lost = first_sample_index - self._stream_index if self._stream_index is not None else 0
+        if num_samples == 0 and lost <= 0:
+            return
+
+        header = self._header
+        header[H_SEQUENCE] += 1  # Odd: write in progress
+
+        # Only the newest capacity samples fit in the ring
+        if num_samples > self.capacity:
+            data = data[:, num_samples - self.capacity :]
+        count = data.shape[1]
+        start = (self._write_count + num_samples - count) % self.capacity
+        first_part = min(count, self.capacity - start)
+        self._ring[:, start : start + first_part] = data[:, 0:first_part]
+        if first_part < count:
+            self._ring[:, 0 : count - first_part] = data[:, first_part:]
+
+        # Record where the block starts so subscribers can recover sample indices across gaps
+        block_slot = int(header[H_BLOCK_COUNT]) % BLOCK_TABLE_SIZE
+        self._block_table[0, block_slot] = self._write_count
+        self._block_table[1, block_slot] = first_sample_index
+
+        self._write_count += num_samples
+        self._stream_index = first_sample_index + num_samples
+        header[H_WRITE_COUNT] = self._write_count
+        header[H_STREAM_INDEX] = self._stream_index
+        header[H_LOST] += max(0, lost)
+        header[H_HOST_TIME] = _float_to_bits(host_time)
+        header[H_BLOCK_COUNT] += 1
+        header[H_SEQUENCE] += 1  # Even: consistent
+
+    def set_error(self, code: int) -> None:
+        # Tell subscribers publishing stopped because of an error
+        self._header[H_ERROR] = code if code > 0 else StreamError.UNKNOWN.value
+
+    def close(self, unlink: bool = True) -> None:
+        self._header[H_CLOSED] = 1
+        del self._header
+        del self._block_table
+        del self._ring
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+class StreamSubscriber:
+    # Maps a published ring and returns zero copy, read only views of new samples
+    name: str
+    num_channels: int
+    capacity: int
+
+    def __init__(self, name: str, from_oldest: bool = False, track: bool = False):
+        # Subscribers don't own the segment, don't let this process' resource tracker unlink it on exit.  Set track
+        # when the publisher is a child process sharing this process' resource tracker.
+        try:
+            if sys.version_info >= (3, 13):
+                self._shm = shared_memory.SharedMemory(name=name, create=False, track=track)  # type: ignore
+            else:
+                self._shm = shared_memory.SharedMemory(name=name, create=False)
+                if sys.platform != "win32" and not track:
+                    from multiprocessing import resource_tracker
+
+                    resource_tracker.unregister(self._shm._name, "shared_memory")  # type: ignore
+        except FileNotFoundError:
+            msg = f"No stream named ({name}) is published"
+            raise DwfException(StreamError.NOT_FOUND.value, msg, msg)
+
+        self.name = name
+        self._header = np.ndarray((HEADER_FIELDS,), dtype=np.uint64, buffer=self._shm.buf)
+        if int(self._header[H_MAGIC]) != RING_MAGIC or int(self._header[H_VERSION]) != RING_VERSION:
+            del self._header
+            self._shm.close()
+            msg = f"Shared memory ({name}) is not a compatible Digilent WaveForms stream"
+            raise DwfException(StreamError.INCOMPATIBLE.value, msg, msg)
+
+        self.num_channels = int(self._header[H_NUM_CHANNELS])
+        self.capacity = int(self._header[H_CAPACITY])
+        self._block_table = np.ndarray(
+            (2, BLOCK_TABLE_SIZE), dtype=np.uint64, buffer=self._shm.buf, offset=HEADER_FIELDS * 8
+        )
+        ring = np.ndarray(
+            (self.num_channels, self.capacity), dtype=np.float64, buffer=self._shm.buf, offset=HEADER_SIZE
+        )
+        ring.setflags(write=False)
+        self._ring = ring
+
+        write_count, _ = self._read_positions()
+        self._cursor = max(0, write_count - self.capacity) if from_oldest else write_count
+        self.overrun_count = 0
+
+    def get_sample_rate(self) -> float:
+        return _bits_to_float(int(self._header[H_SAMPLE_RATE]))
+
+    def get_lost_count(self) -> int:
+        # Samples lost by the acquisition itself (as opposed to subscriber overruns)
+        return int(self._header[H_LOST])
+
+    def get_error_code(self) -> int:
+        # Error code of the failure that stopped the publisher, 0 if none
+        return int(self._header[H_ERROR])
+
+    def is_closed(self) -> bool:
+        return bool(self._header[H_CLOSED])
+
+    def get_available(self) -> int:
+        write_count, _ = self._read_positions()
+        return write_count - self._cursor
+
+    def read(self, max_samples: int = 0) -> Optional[StreamView]:
+        # Return a view of the next contiguous run of new samples, or None if there are none.  A run ends at the end
+        # of the ring, the remainder is returned by the next call.
+        write_count, stream_index = self._read_positions()
+
+        overrun = 0
+        if write_count - self._cursor > self.capacity:
+            overrun = write_count - self.capacity - self._cursor
+            self._cursor = write_count - self.capacity
+            self.overrun_count += overrun
+            Logger.warning("Stream (%s) subscriber overrun, %d samples skipped", self.name, overrun)
+
+        available = write_count - self._cursor
+        if available <= 0:
+            return None
+        if max_samples > 0:
+            available = min(available, max_samples)
+
+        start = self._cursor % self.capacity
+        count = min(available, self.capacity - start)
+        first_sample_index, run_length = self._get_sample_index(self._cursor, write_count, stream_index)
+        count = min(count, run_length)
+        view = StreamView(self._ring[:, start : start + count], first_sample_index, self._cursor, overrun)
+        self._cursor += count
+        return view
+
+    def is_valid(self, view: StreamView) -> bool:
+        # True if the publisher has not overwritten the view's samples, check after processing a view
+        write_count, _ = self._read_positions()
+        return write_count - view.write_count_start <= self.capacity
+
+    def close(self) -> None:
+        del self._header
+        del self._block_table
+        del self._ring
+        self._shm.close()
+
+    def _get_sample_index(self, cursor: int, write_count: int, stream_index: int) -> tuple[int, int]:
+        # Absolute sample index at the cursor and the number of following samples without a gap
+        num_blocks = min(int(self._header[H_BLOCK_COUNT]), BLOCK_TABLE_SIZE)
+        block_starts = self._block_table[0, 0:num_blocks].astype(np.int64)
+        index_offsets = self._block_table[1, 0:num_blocks].astype(np.int64) - block_starts
+
+        previous = block_starts <= cursor
+        if not previous.any():
+            # The block table no longer covers the cursor, assume no gaps since
+            return (stream_index - (write_count - cursor), write_count - cursor)
+
+        index_offset = index_offsets[previous][np.argmax(block_starts[previous])]
+        gaps = (block_starts > cursor) & (index_offsets != index_offset)
+        run_end = int(block_starts[gaps].min()) if gaps.any() else write_count
+        return (cursor + int(index_offset), run_end - cursor)
+
+    def _read_positions(self) -> tuple[int, int]:
+        # Seqlock read of the write position
+        header = self._header
+        while True:
+            sequence = int(header[H_SEQUENCE])
+            if sequence & 1:
+                continue
+            write_count = int(header[H_WRITE_COUNT])
+            stream_index = int(header[H_STREAM_INDEX])
+            if int(header[H_SEQUENCE]) == sequence:
+                return (write_count, stream_index)
@@ -0,0 +1,125 @@
+from typing import Any, Optional, Union
+import json
+import os
+import time
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.components.DwfException import DwfException
+from digilent_waveforms.src.constants.ai_types import AiBlock
+from digilent_waveforms.src.constants.error_codes import RecordingError
+
+# A recording is a raw file of interleaved float64 samples, (samples, channels) in row major order, and a JSON sidecar
+# (<path>.json) with the stream metadata and the positions of gaps where the acquisition lost samples.
+RECORDING_VERSION = 1
+
+
+def get_metadata_path(path: str) -> str:
+    return f"{path}.json"
+
+
+class StreamRecorder:
+    # Records the raw analog input block stream exactly as acquired, including lost sample gaps
+    path: str
+    channels: list[int]
+    sample_rate: float
+    num_samples: int  # Samples written
+
+    def __init__(self, path: str, channels: list[int], sample_rate: float):
+        self.path = path
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.num_samples = 0
+        self.start_time = time.time()
+        self._file = open(path, "wb")
+        self._first_sample_index: Optional[int] = None
+        self._next_sample_index = 0
+        self._gaps: list[tuple[int, int]] = []  # (recorded sample position, samples lost before it)
+        self._analog_in: Any = None
+
+    # ---------- Stream ----------
+    def attach(self, analog_in: Any) -> None:
+        # Record every block read by analog_in
+        self.detach()
+        self._analog_in = analog_in
+        analog_in.add_block_handler(self.write)
+
+    def detach(self) -> None:
+        if self._analog_in:
+            self._analog_in.remove_block_handler(self.write)
+            self._analog_in = None
+
+    def write(self, block: AiBlock) -> None:
+        if block.channels != self.channels:
+            msg = f"Block channels {block.channels} don't match the recorded channels {self.channels}"
+            raise DwfException(RecordingError.CHANNEL_MISMATCH.value, msg, msg)
+        if block.num_samples == 0:
+            return
+
+        if self._first_sample_index is None:
+            self._first_sample_index = block.first_sample_index
+        elif block.first_sample_index != self._next_sample_index:
+            self._gaps.append((self.num_samples, block.first_sample_index - self._next_sample_index))
+
+        np.asarray(block.data, dtype=np.float64).T.tofile(self._file)
+        self.num_samples += block.num_samples
+        self._next_sample_index = block.first_sample_index + block.num_samples
+
+    def close(self) -> None:
+        if self._file.closed:
+            return
+        self.detach()
+        self._file.close()
+        metadata = {
+            "version": RECORDING_VERSION,
+            "channels": self.channels,
+            "sample_rate": self.sample_rate,
+            "num_samples": self.num_samples,
+            "first_sample_index": self._first_sample_index or 0,
+            "start_time": self.start_time,
+            "gaps": self._gaps,
+        }
+        with open(get_metadata_path(self.path), "w") as metadata_file:
+            json.dump(metadata, metadata_file)
+
+
+class StreamRecording:
+    # Read access to a recording made by StreamRecorder, samples are memory mapped
+    path: str
+    channels: list[int]
+    sample_rate: float
+    num_samples: int
+    first_sample_index: int
+    gaps: list[tuple[int, int]]
+
+    def __init__(self, path: str):
+        try:
+            with open(get_metadata_path(path), "r") as metadata_file:
+                metadata = json.load(metadata_file)
+        except FileNotFoundError:
+            msg = f"Recording metadata ({get_metadata_path(path)}) not found"
+            raise DwfException(RecordingError.NOT_FOUND.value, msg, msg)
+        if metadata.get("version") != RECORDING_VERSION:
+            msg = f"Recording ({path}) version {metadata.get('version')} is not supported"
+            raise DwfException(RecordingError.INCOMPATIBLE.value, msg, msg)
+
+        self.path = path
+        self.channels = metadata["channels"]
+        self.sample_rate = metadata["sample_rate"]
+        self.num_samples = metadata["num_samples"]
+        self.first_sample_index = metadata["first_sample_index"]
+        self.start_time = metadata["start_time"]
+        self.gaps = [(position, lost) for position, lost in metadata["gaps"]]
+        self._samples: Union[np.ndarray, None] = None
+        if self.num_samples > 0 and os.path.getsize(path) > 0:
+            self._samples = np.memmap(path, dtype=np.float64, mode="r", shape=(self.num_samples, len(self.channels)))
+
+    def read(self, start: int, count: int) -> np.ndarray:
+        # (channels, count) samples starting at recorded position start
+        if self._samples is None:
+            return np.zeros((len(self.channels), 0))
+        return self._samples[start : start + count].T
+
+    def get_lost_count(self) -> int:
+        return sum(lost for _, lost in self.gaps)
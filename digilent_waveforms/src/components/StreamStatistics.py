@@ -0,0 +1,195 @@
+from typing import Any, Optional, Union
+
+import numpy as np
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.constants.ai_types import AiBlock
+
+
+class StatisticsResult:
+    # Per channel statistics of num_samples samples starting at first_sample_index, every array has one entry per
+    # channel (histogram has one row per channel)
+    first_sample_index: int
+    num_samples: int
+    mean: np.ndarray
+    variance: np.ndarray  # Population variance
+    minimum: np.ndarray
+    maximum: np.ndarray
+    histogram: Optional[np.ndarray]  # (channels, bins) counts of in range samples
+    underflow: Optional[np.ndarray]  # Samples below the histogram range
+    overflow: Optional[np.ndarray]  # Samples at or above the histogram range
+    bin_edges: Optional[np.ndarray]
+
+    def __init__(
+        self,
+        first_sample_index: int,
+        num_samples: int,
+        mean: np.ndarray,
+        variance: np.ndarray,
+        minimum: np.ndarray,
+        maximum: np.ndarray,
+        histogram: Optional[np.ndarray] = None,
+        underflow: Optional[np.ndarray] = None,
+        overflow: Optional[np.ndarray] = None,
+        bin_edges: Optional[np.ndarray] = None,
+    ):
+        self.first_sample_index = first_sample_index
+        self.num_samples = num_samples
+        self.mean = mean
+        self.variance = variance
+        self.minimum = minimum
+        self.maximum = maximum
+        self.histogram = histogram
+        self.underflow = underflow
+        self.overflow = overflow
+        self.bin_edges = bin_edges
+
+    def get_std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+    def get_rms(self) -> np.ndarray:
+        # Mean of squares = variance + mean^2
+        return np.sqrt(self.variance + self.mean * self.mean)
+
+    def get_peak_to_peak(self) -> np.ndarray:
+        return self.maximum - self.minimum
+
+
+class StreamStatistics:
+    # Incremental per channel statistics of an analog input stream.  Blocks are reduced with vectorized NumPy
+    # operations and merged into running totals (Chan et al. parallel variance), no samples are retained.
+    #  - window = 0: statistics since the start (or the last reset)
+    #  - window > 0: statistics of consecutive, non overlapping windows of window samples, update() returns every
+    #    window completed by a block
+    num_channels: int
+    window: int
+    histogram_bins: int
+    histogram_range: tuple[float, float]
+
+    def __init__(
+        self,
+        num_channels: int,
+        window: int = 0,
+        histogram_bins: int = 0,
+        histogram_range: tuple[float, float] = (-5.0, 5.0),
+    ):
+        self.num_channels = num_channels
+        self.window = window
+        self.histogram_bins = histogram_bins
+        self.histogram_range = histogram_range
+        self.last_window: Optional[StatisticsResult] = None
+        self._analog_in: Any = None
+
+        if histogram_bins > 0:
+            self._bin_edges = np.linspace(histogram_range[0], histogram_range[1], histogram_bins + 1)
+            self._bin_scale = histogram_bins / (histogram_range[1] - histogram_range[0])
+            self._bin_offsets = (np.arange(0, num_channels) * histogram_bins)[:, np.newaxis]
+        self._next_sample_index = 0
+        self.reset()
+
+    # ---------- Stream ----------
+    def attach(self, analog_in: Any) -> None:
+        # Update with every block read by analog_in
+        self.detach()
+        self._analog_in = analog_in
+        analog_in.add_block_handler(self.update)
+
+    def detach(self) -> None:
+        if self._analog_in:
+            self._analog_in.remove_block_handler(self.update)
+            self._analog_in = None
+
+    def reset(self) -> None:
+        self.last_window = None
+        self._reset_accumulators(self._next_sample_index)
+
+    def update(
+        self, data: Union[AiBlock, np.ndarray, list[list[float]]], first_sample_index: Optional[int] = None
+    ) -> list[StatisticsResult]:
+        # Add a (channels, samples) block, returns the windows it completed
+        if isinstance(data, AiBlock):
+            first_sample_index = data.first_sample_index
+            data = data.data
+        samples = np.asarray(data, dtype=np.float64)
+        if samples.ndim != 2 or samples.shape[1] == 0:
+            return []
+        if first_sample_index is None:
+            first_sample_index = self._next_sample_index
+        if self._count == 0:
+            self._first_sample_index = first_sample_index
+        self._next_sample_index = first_sample_index + samples.shape[1]
+
+        if self.window <= 0:
+            self._accumulate(samples)
+            return []
+
+        # Split the block at window boundaries
+        windows: list[StatisticsResult] = []
+        offset = 0
+        while offset < samples.shape[1]:
+            count = min(samples.shape[1] - offset, self.window - self._count)
+            self._accumulate(samples[:, offset : offset + count])
+            offset += count
+            if self._count == self.window:
+                windows.append(self.get_result())
+                self._reset_accumulators(self._first_sample_index + self.window)
+        if windows:
+            self.last_window = windows[-1]
+        return windows
+
+    # ---------- Results ----------
+    def get_result(self) -> StatisticsResult:
+        # Statistics since the start, or of the current (incomplete) window
+        count = max(self._count, 1)
+        histogram = None if self.histogram_bins <= 0 else self._histogram.copy()
+        return StatisticsResult(
+            self._first_sample_index,
+            self._count,
+            self._mean.copy(),
+            self._m2 / count,
+            self._minimum.copy(),
+            self._maximum.copy(),
+            histogram,
+            None if histogram is None else self._underflow.copy(),
+            None if histogram is None else self._overflow.copy(),
+            None if histogram is None else self._bin_edges,
+        )
+
+    def _accumulate(self, samples: np.ndarray) -> None:
+        count = samples.shape[1]
+        block_mean = samples.mean(axis=1)
+        deviations = samples - block_mean[:, np.newaxis]
+        block_m2 = np.einsum("ij,ij->i", deviations, deviations)
+
+        # Merge the block into the running totals
+        total = self._count + count
+        delta = block_mean - self._mean
+        self._mean += delta * (count / total)
+        self._m2 += block_m2 + delta * delta * (self._count * count / total)
+        self._count = total
+        np.minimum(self._minimum, samples.min(axis=1), out=self._minimum)
+        np.maximum(self._maximum, samples.max(axis=1), out=self._maximum)
+
+        if self.histogram_bins > 0:
+            bins = np.floor((samples - self.histogram_range[0]) * self._bin_scale).astype(np.int64)
+            below = bins < 0
+            above = bins >= self.histogram_bins
+            self._underflow += below.sum(axis=1)
+            self._overflow += above.sum(axis=1)
+            in_range = ~(below | above)
+            flat_bins = (bins + self._bin_offsets)[in_range]
+            self._histogram += np.bincount(flat_bins, minlength=self.num_channels * self.histogram_bins).reshape(
+                self.num_channels, self.histogram_bins
+            )
+
+    def _reset_accumulators(self, first_sample_index: int) -> None:
+        self._first_sample_index = first_sample_index
+        self._count = 0
+        self._mean = np.zeros(self.num_channels)
+        self._m2 = np.zeros(self.num_channels)
+        self._minimum = np.full(self.num_channels, np.inf)
+        self._maximum = np.full(self.num_channels, -np.inf)
+        if self.histogram_bins > 0:
+            self._histogram = np.zeros((self.num_channels, self.histogram_bins), dtype=np.int64)
+            self._underflow = np.zeros(self.num_channels, dtype=np.int64)
+            self._overflow = np.zeros(self.num_channels, dtype=np.int64)
@@ -1,15 +1,7 @@
 import logging
-from datetime import datetime
 
-now = datetime.now().strftime("%Y-%m-%d %H-%M-%S")
-
-Logger = logging
-logging_format = "[%(filename)s:%(lineno)s::%(funcName)s()] %(message)s"
-Logger.basicConfig(
-    level=logging.DEBUG,
-    format=logging_format,
-    handlers=[
-        # logging.FileHandler(f"logs/digilent_waveforms-{now}.log"),
-        logging.StreamHandler(),
-    ],
-)
+# Library logger.  Only a NullHandler is attached: the application configures logging (handlers, format, level), e.g.
+# logging.basicConfig(level=logging.DEBUG) to see the library's debug messages.  Messages use lazy %-style arguments
+# so disabled levels cost no string formatting.
+Logger = logging.getLogger("digilent_waveforms")
+Logger.addHandler(logging.NullHandler())
@@ -0,0 +1,95 @@
+from typing import Optional
+import os
+import struct
+import tempfile
+import time
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.constants.trace_types import TraceRecord
+
+TRACE_FILE_MAGIC = b"DWFTRACE"
+TRACE_FILE_VERSION = 1
+
+# File header: magic, version, record size, number of records
+_HEADER = struct.Struct("<8sHHQ")
+
+
+class Trace:
+    # In-memory binary ring buffer of per-poll trace events.  Recording packs a fixed size record (host time, event
+    # code and three integers) into a preallocated bytearray, no objects or strings are created, so tracing can stay
+    # enabled in production.  The most recent capacity events are kept and can be dumped when an error occurs.
+    RECORD = struct.Struct("<dIqqq")
+    capacity: int
+    enabled: bool
+
+    def __init__(self, capacity: int = 8192, enabled: bool = True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self._record_size = self.RECORD.size
+        self._pack = self.RECORD.pack_into
+        self._buffer = bytearray(capacity * self._record_size)
+        self._count = 0  # Events recorded since the last clear, the oldest are overwritten
+
+    def record(self, event: int, a: int = 0, b: int = 0, c: int = 0) -> None:
+        if self.enabled:
+            self._pack(
+                self._buffer, (self._count % self.capacity) * self._record_size, time.perf_counter(), event, a, b, c
+            )
+            self._count += 1
+
+    def clear(self) -> None:
+        self._count = 0
+
+    def get_num_records(self) -> int:
+        return min(self._count, self.capacity)
+
+    def get_records(self) -> list[TraceRecord]:
+        # Kept events, oldest first
+        return _decode(self._get_ordered_bytes(), self._record_size)
+
+    def to_str(self, num_records: Optional[int] = None) -> str:
+        records = self.get_records()
+        if num_records is not None:
+            records = records[-num_records:]
+        return "\r\n".join([record.to_str() for record in records])
+
+    def dump(self, file_path: Optional[str] = None) -> str:
+        # Write the kept events to a binary trace file (a temporary file by default), returns its path.  Read it back
+        # with read_trace_file().
+        if file_path is None:
+            file_descriptor, file_path = tempfile.mkstemp(prefix="digilent_waveforms_trace_", suffix=".bin")
+            os.close(file_descriptor)
+        with open(file_path, "wb") as trace_file:
+            trace_file.write(
+                _HEADER.pack(TRACE_FILE_MAGIC, TRACE_FILE_VERSION, self._record_size, self.get_num_records())
+            )
+            trace_file.write(self._get_ordered_bytes())
+        return file_path
+
+    def _get_ordered_bytes(self) -> bytes:
+        if self._count <= self.capacity:
+            return bytes(self._buffer[0 : self._count * self._record_size])
+        split = (self._count % self.capacity) * self._record_size
+        return bytes(self._buffer[split:] + self._buffer[0:split])
+
+
+def read_trace_file(file_path: str) -> list[TraceRecord]:
+    with open(file_path, "rb") as trace_file:
+        magic, version, record_size, num_records = _HEADER.unpack(trace_file.read(_HEADER.size))
+        if magic != TRACE_FILE_MAGIC or record_size != Trace.RECORD.size:
+            raise ValueError(f"({file_path}) is not a version {TRACE_FILE_VERSION} trace file")
+        return _decode(trace_file.read(num_records * record_size), record_size)
+
+
+def _decode(data: bytes, record_size: int) -> list[TraceRecord]:
+    return [
+        TraceRecord(*values) for values in Trace.RECORD.iter_unpack(data[0 : len(data) // record_size * record_size])
+    ]
+
+
+# Process wide trace shared by the library's subsystems
+_trace = Trace()
+
+
+def get_trace() -> Trace:
+    return _trace
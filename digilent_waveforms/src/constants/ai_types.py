@@ -1,4 +1,8 @@
 from enum import Enum
+from typing import Any, Optional
+
+# Digilent WaveForms Imports
+from digilent_waveforms.src.constants.dwf_types import DeviceType
 
 
 class AiAcquisitionMode(Enum):
@@ -10,6 +14,17 @@ class AiAcquisitionMode(Enum):
     Single1 = 5
 
 
+class CaptureEncoding(Enum):
+    FLOAT64 = 0  # Lossless, delta of the IEEE 754 bit patterns
+    INT16 = 1  # Quantized to int16 codes with a scale and offset, delta of the codes
+
+
+class RecordRatePolicy(Enum):
+    Ignore = 0
+    Warn = 1  # Log a warning when the record rate exceeds the lossless maximum of the enabled channels
+    Reject = 2  # Raise an exception instead of applying the configuration
+
+
 class InstrumentState(Enum):
     Ready = 0
     Config = 4
@@ -20,3 +35,146 @@ class InstrumentState(Enum):
     Running = 3
     NotDone = 6
     Done = 2
+
+
+class AnalogInChannelConfig:
+    # Desired state of a single analog input channel.  Settings left as None are not managed by the config.
+    enabled: Optional[bool]
+    range: Optional[float]
+
+    def __init__(self, enabled: Optional[bool] = None, range: Optional[float] = None):
+        self.enabled = enabled
+        self.range = range
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(name, getattr(self, name)) for name in ANALOG_IN_CHANNEL_SETTINGS if getattr(self, name) is not None]
+
+
+class AnalogInConfig:
+    # Declarative analog input configuration.  Applied with AnalogIn.apply(), which only pushes settings that
+    # differ from the last applied state.
+    channels: dict[int, AnalogInChannelConfig]
+    acquisition_mode: Optional[AiAcquisitionMode]
+    sample_rate: Optional[float]
+    record_length: Optional[float]
+    buffer_size: Optional[int]
+
+    def __init__(
+        self,
+        acquisition_mode: Optional[AiAcquisitionMode] = None,
+        sample_rate: Optional[float] = None,
+        record_length: Optional[float] = None,
+        buffer_size: Optional[int] = None,
+    ):
+        self.channels = {}
+        self.acquisition_mode = acquisition_mode
+        self.sample_rate = sample_rate
+        self.record_length = record_length
+        self.buffer_size = buffer_size
+
+    def channel(self, channel: int) -> AnalogInChannelConfig:
+        if channel not in self.channels:
+            self.channels[channel] = AnalogInChannelConfig()
+        return self.channels[channel]
+
+    def set_channel(self, channel: int, **settings) -> "AnalogInConfig":
+        channel_config = self.channel(channel)
+        for name, value in settings.items():
+            if name not in ANALOG_IN_CHANNEL_SETTINGS:
+                raise AttributeError(f"Unknown analog input channel setting ({name})")
+            setattr(channel_config, name, value)
+        return self
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(name, getattr(self, name)) for name in ANALOG_IN_SETTINGS if getattr(self, name) is not None]
+
+
+# Order in which settings are pushed to the device
+ANALOG_IN_SETTINGS = ("acquisition_mode", "sample_rate", "record_length", "buffer_size")
+ANALOG_IN_CHANNEL_SETTINGS = ("enabled", "range")
+
+# Nominal record mode streaming throughput, in samples per second summed over the enabled channels.  The enabled
+# channels share it, so each one can be recorded without loss at up to throughput / enabled channels.  Devices not
+# listed have no known limit.  The actual limit also depends on the USB host controller and the host load, measure it
+# with RateProber.
+RECORD_THROUGHPUT: dict[DeviceType, float] = {
+    DeviceType.ELECTRONICS_EXPLORER: 2e6,
+    DeviceType.ANALOG_DISCOVERY: 2e6,
+    DeviceType.ANALOG_DISCOVERY_2: 2e6,
+    DeviceType.ANALOG_DISCOVERY_3: 4e6,
+    DeviceType.ADP3X50: 8e6,
+    DeviceType.ADP2230: 4e6,
+}
+
+
+class AiBlock:
+    # A block of analog input samples read in a single poll
+    data: list[list[float]]  # [channel][sample]
+    channels: list[int]
+    first_sample_index: int  # Absolute index of data[x][0] since acquisition start, lost samples included
+    num_samples: int
+    lost: int  # Samples lost immediately before this block
+    corrupted: int
+    sample_rate: float  # Actual (coerced) device sample rate
+    host_time: float  # Estimated host time (time.perf_counter() base) of the first sample, drift corrected
+
+    def __init__(
+        self,
+        data: list[list[float]],
+        channels: list[int],
+        first_sample_index: int,
+        lost: int,
+        corrupted: int,
+        sample_rate: float,
+        host_time: float,
+    ):
+        self.data = data
+        self.channels = channels
+        self.first_sample_index = first_sample_index
+        self.num_samples = len(data[0]) if len(data) else 0
+        self.lost = lost
+        self.corrupted = corrupted
+        self.sample_rate = sample_rate
+        self.host_time = host_time
+
+    def get_end_sample_index(self) -> int:
+        # Absolute index of the sample following this block
+        return self.first_sample_index + self.num_samples
+
+
+class AiCapture:
+    # A fixed length analog input capture, read straight into a preallocated (optionally memory mapped) array
+    data: Any  # numpy array [channel][sample] of exactly num_samples acquired samples per channel
+    channels: list[int]
+    first_sample_index: int  # Absolute index of data[x][0] since acquisition start, lost samples included
+    num_samples: int
+    lost: int  # Samples lost during the capture
+    corrupted: int
+    gaps: list[tuple[int, int]]  # (index in data, samples lost immediately before it) of every loss
+    sample_rate: float
+    host_time: float  # Estimated host time (time.perf_counter() base) of the first sample, drift corrected
+    file_path: Optional[str]  # .npy file the data is mapped to, None in memory
+
+    def __init__(
+        self,
+        data: Any,
+        channels: list[int],
+        first_sample_index: int,
+        sample_rate: float,
+        host_time: float,
+        file_path: Optional[str] = None,
+    ):
+        self.data = data
+        self.channels = channels
+        self.first_sample_index = first_sample_index
+        self.num_samples = data.shape[1]
+        self.lost = 0
+        self.corrupted = 0
+        self.gaps = []
+        self.sample_rate = sample_rate
+        self.host_time = host_time
+        self.file_path = file_path
+
+    def get_end_sample_index(self) -> int:
+        # Absolute index of the sample following the capture
+        return self.first_sample_index + self.num_samples + self.lost
@@ -1,4 +1,5 @@
 from enum import Enum
+from typing import Any, Optional
 from .dwfconstants import *
 
 
@@ -23,3 +24,60 @@ class InstrumentStartMode(Enum):
     STOP = 0
     START = 1
     APPLY = 3
+
+
+class AnalogOutChannelConfig:
+    # Desired state of a single analog output channel.  Settings left as None are not managed by the config.
+    enabled: Optional[bool]
+    function: Optional[OutputFunction]
+    frequency: Optional[float]
+    amplitude: Optional[float]
+    offset: Optional[float]
+    limit: Optional[float]
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        function: Optional[OutputFunction] = None,
+        frequency: Optional[float] = None,
+        amplitude: Optional[float] = None,
+        offset: Optional[float] = None,
+        limit: Optional[float] = None,
+    ):
+        self.enabled = enabled
+        self.function = function
+        self.frequency = frequency
+        self.amplitude = amplitude
+        self.offset = offset
+        self.limit = limit
+
+    def items(self) -> list[tuple[str, Any]]:
+        return [(name, getattr(self, name)) for name in ANALOG_OUT_SETTINGS if getattr(self, name) is not None]
+
+
+class AnalogOutConfig:
+    # Declarative analog output configuration.  Applied with AnalogOut.apply(), which only pushes settings that
+    # differ from the last applied state.
+    channels: dict[int, AnalogOutChannelConfig]
+    start_mode: InstrumentStartMode
+
+    def __init__(self, start_mode: InstrumentStartMode = InstrumentStartMode.APPLY):
+        self.channels = {}
+        self.start_mode = start_mode
+
+    def channel(self, channel: int) -> AnalogOutChannelConfig:
+        if channel not in self.channels:
+            self.channels[channel] = AnalogOutChannelConfig()
+        return self.channels[channel]
+
+    def set_channel(self, channel: int, **settings) -> "AnalogOutConfig":
+        channel_config = self.channel(channel)
+        for name, value in settings.items():
+            if name not in ANALOG_OUT_SETTINGS:
+                raise AttributeError(f"Unknown analog output setting ({name})")
+            setattr(channel_config, name, value)
+        return self
+
+
+# Order in which settings are pushed to the device
+ANALOG_OUT_SETTINGS = ("enabled", "function", "frequency", "amplitude", "offset", "limit")
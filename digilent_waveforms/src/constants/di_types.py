@@ -0,0 +1,51 @@
+from enum import Enum
+from typing import Any
+
+
+class DiSampleFormat(Enum):
+    # Bits per sample, line n is bit n of each sample
+    Bits8 = 8
+    Bits16 = 16
+    Bits32 = 32
+
+
+class DiClockSource(Enum):
+    Internal = 0
+    External = 1
+
+
+class DiSampleMode(Enum):
+    Simple = 0
+    Noise = 1  # Alternate samples hold a flag for lines that glitched between samples
+
+
+class DiEdge(Enum):
+    Rising = 0
+    Falling = 1
+    Both = 2
+
+
+class DiBlock:
+    # A block of digital input samples read in a single poll, stored packed: one integer per sample
+    data: Any  # numpy array of uint8 / uint16 / uint32 (sample format)
+    first_sample_index: int  # Absolute index of data[0] since acquisition start, lost samples included
+    num_samples: int
+    lost: int  # Samples lost immediately before this block
+    corrupted: int
+    sample_rate: float
+    host_time: float  # Estimated host time (time.perf_counter() base) of the first sample, drift corrected
+
+    def __init__(
+        self, data: Any, first_sample_index: int, lost: int, corrupted: int, sample_rate: float, host_time: float
+    ):
+        self.data = data
+        self.first_sample_index = first_sample_index
+        self.num_samples = len(data)
+        self.lost = lost
+        self.corrupted = corrupted
+        self.sample_rate = sample_rate
+        self.host_time = host_time
+
+    def get_end_sample_index(self) -> int:
+        # Absolute index of the sample following this block
+        return self.first_sample_index + self.num_samples
@@ -18,9 +18,73 @@ class AnalogInputErorr(Enum):
     UNKNOWN = 20000
     INTPUT_LENGTH_MISMATCH = 20001
     TIMEOUT_WAITING_SAMPLES = 20002
+    INVALID_CHANNEL = 20003
+    RECORD_RATE_EXCEEDED = 20004
 
 
 # Analog output subsystem - 03xxxx
 class AnalogOutError(Enum):
     UNKNOWN = 30000
     INTPUT_LENGTH_MISMATCH = 30001
+    INVALID_CHANNEL = 30002
+
+
+# Control loop - 04xxxx
+class ControlLoopError(Enum):
+    UNKNOWN = 40000
+    INVALID_RUN_LENGTH = 40001
+
+
+# Device registry - 05xxxx
+class RegistryError(Enum):
+    UNKNOWN = 50000
+    DEVICE_NOT_FOUND = 50001
+    DEVICE_NOT_ACQUIRED = 50002
+    SAMPLE_RATE_MISMATCH = 50003
+    RANGE_MISMATCH = 50004
+
+
+# Shared memory stream - 06xxxx
+class StreamError(Enum):
+    UNKNOWN = 60000
+    NAME_IN_USE = 60001
+    NOT_FOUND = 60002
+    INCOMPATIBLE = 60003
+    SHAPE_MISMATCH = 60004
+
+
+# Acquisition process - 07xxxx
+class RemoteError(Enum):
+    UNKNOWN = 70000
+    PROCESS_NOT_RUNNING = 70001
+    REMOTE_EXCEPTION = 70002
+    STREAM_FAILED = 70003
+
+
+# Stream recordings - 08xxxx
+class RecordingError(Enum):
+    UNKNOWN = 80000
+    NOT_FOUND = 80001
+    INCOMPATIBLE = 80002
+    CHANNEL_MISMATCH = 80003
+    CORRUPT = 80004
+
+
+# WaveForms SDK library calls - 09xxxx
+class LibraryError(Enum):
+    UNKNOWN = 90000
+    CALL_FAILED = 90001
+
+
+# Digital input subsystem - 10xxxx
+class DigitalInputError(Enum):
+    UNKNOWN = 100000
+    INVALID_LINE = 100001
+    NOT_SUPPORTED = 100002
+
+
+# Frequency sweep - 11xxxx
+class FrequencySweepError(Enum):
+    UNKNOWN = 110000
+    INVALID_FREQUENCY = 110001
+    TIMEOUT = 110002
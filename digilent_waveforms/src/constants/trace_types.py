@@ -0,0 +1,37 @@
+from enum import IntEnum
+
+
+class TraceEvent(IntEnum):
+    # Event codes of the trace ring buffer, with the meaning of the a / b / c values
+    AiStatus = 1  # Samples available, lost, corrupted
+    AiBufferResize = 2  # New buffer size, samples skipped by the restart
+    AiError = 3  # DwfException code
+    DiStatus = 4  # Samples available, lost, corrupted
+    CallFailed = 5  # Index of the function in DwfLibrary.PROTOTYPES (-1 if not prototyped), SDK error code
+    OutputBlocks = 6  # Blocks output, samples left in the backlog, first output channel
+    BacklogOverflow = 7  # Samples dropped (0 when stopping), backlog samples
+
+
+class TraceRecord:
+    # A decoded trace event
+    time: float  # time.perf_counter() of the event
+    event: int
+    a: int
+    b: int
+    c: int
+
+    def __init__(self, time: float, event: int, a: int, b: int, c: int):
+        self.time = time
+        self.event = event
+        self.a = a
+        self.b = b
+        self.c = c
+
+    def get_event_name(self) -> str:
+        try:
+            return TraceEvent(self.event).name
+        except ValueError:
+            return str(self.event)
+
+    def to_str(self) -> str:
+        return f"{self.time:.6f} {self.get_event_name():<16} {self.a} {self.b} {self.c}"
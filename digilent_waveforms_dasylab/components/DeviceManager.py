@@ -1,23 +1,26 @@
-from digilent_waveforms import Manager
+from digilent_waveforms import Device, DeviceRegistry
 from .Logger import Logger
 
 class DeviceManager:
 
-    def __init__(self, wf_manager: Manager):
-        self.wf_manager = wf_manager
+    def __init__(self, registry: DeviceRegistry):
+        self.registry = registry
+        self.wf_manager = registry.manager
         self.names = []
         self.serial_numbers = []
         self.device_details = []
-        self.enumerate_devices()
+        self.enumerate_devices(refresh=False)
 
-        Logger.debug(f"Device names: {self.names}")
-        Logger.debug(f"serial_numbers: {self.serial_numbers}")
+        Logger.debug("Device names: %s", self.names)
+        Logger.debug("serial_numbers: %s", self.serial_numbers)
         # Logger.debug(f"device_details: {self.device_details}")
 
-    def enumerate_devices(self) -> None:
-        self.device_details = self.wf_manager.get_devices_info()
+    def enumerate_devices(self, refresh: bool = True) -> None:
+        # Without refresh, reuse the registry's device list (possibly enumerated by another module)
+        self.device_details = self.registry.get_devices_info(refresh)
 
         self.names = []
+        self.serial_numbers = []
         for device_info in self.device_details:
             self.names.append(f"{device_info.name} ({device_info.serial_number})")
             self.serial_numbers.append(device_info.serial_number)
@@ -59,23 +62,9 @@ class DeviceManager:
             msg = f"A device with the specified name ({device_name}) is not available - {e}"
             raise Exception(msg)
 
-    def open_device_by_serial_number(self, serial_number: str):
-        try:
-            # Close any existing device handles and re-enumerate device devices
-            self.wf_manager.close_all_devices()            
-            self.enumerate_devices()
-
-            # Find device index by serial number
-            index = self.get_index_by_sn(serial_number)
+    def open_device_by_serial_number(self, serial_number: str) -> Device:
+        # Devices are shared through the process wide registry, other modules may be using the same device
+        return self.registry.acquire(serial_number)
 
-            # If a device with the specified serial number does not exist, bail
-            if index <= -1:
-                msg = f"A device with the specified serial number ({serial_number}) is not available"
-                raise Exception(msg)
-
-            # Open the device and return it
-            device = self.wf_manager.open_device(index)
-            return device
-        except Exception as e:
-            self.wf_manager.close_all_devices()         
-            raise e
+    def release_device(self, device: Device) -> None:
+        self.registry.release(device)
@@ -0,0 +1,64 @@
+from enum import Enum
+from typing import Any
+
+import numpy as np
+
+from .Logger import Logger
+
+
+class FillMode(Enum):
+    Unknown = "Unknown"
+    Buffer = "Buffer"  # numpy view of the block's buffer, one memcpy / conversion per block
+    Slice = "Slice"  # Slice assignment of a list
+    Loop = "Loop"  # One item assignment per sample
+
+
+class OutputBlockWriter:
+    """
+    Copy samples into DASYLab output blocks through the fastest path the output block supports.  The path is detected
+    on the first block and reused for every block after it, all output blocks of a module are of the same type.
+    """
+
+    def __init__(self):
+        self.mode = FillMode.Unknown
+
+    def write(self, OutBuff: Any, values: Any) -> None:
+        """
+        Copy values (a list or numpy array) to the start of the output block
+        """
+        if self.mode == FillMode.Buffer:
+            np.asarray(memoryview(OutBuff))[0 : len(values)] = values
+        elif self.mode == FillMode.Slice:
+            OutBuff[0 : len(values)] = self._to_list(values)
+        elif self.mode == FillMode.Loop:
+            self._write_loop(OutBuff, values)
+        else:
+            self._detect_mode(OutBuff, values)
+
+    def _detect_mode(self, OutBuff: Any, values: Any) -> None:
+        try:
+            target = np.asarray(memoryview(OutBuff))
+            if target.ndim == 1 and target.dtype.kind == "f" and target.flags.writeable and len(target) >= len(values):
+                target[0 : len(values)] = values
+                self.mode = FillMode.Buffer
+        except (TypeError, ValueError, BufferError):
+            pass
+
+        if self.mode == FillMode.Unknown:
+            try:
+                OutBuff[0 : len(values)] = self._to_list(values)
+                self.mode = FillMode.Slice
+            except (TypeError, ValueError, IndexError, AttributeError):
+                self._write_loop(OutBuff, values)
+                self.mode = FillMode.Loop
+        Logger.debug("Output block fill mode: %s", self.mode.value)
+
+    def _write_loop(self, OutBuff: Any, values: Any) -> None:
+        for sample_index, value in enumerate(self._to_list(values)):
+            OutBuff[sample_index] = value
+
+    def _to_list(self, values: Any) -> list[float]:
+        # Python floats, as item by item output block assignment expects
+        if isinstance(values, np.ndarray):
+            return values.astype(np.float64, copy=False).tolist()
+        return values
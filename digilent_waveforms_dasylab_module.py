@@ -1,15 +1,28 @@
 import Ly  # type: ignore
 from digilent_waveforms import DwfException
-from typing import Union
+from typing import Optional
 import lys  # type: ignore
+import numpy as np
 from enum import Enum
 import logging
+import time
 
 from digilent_waveforms_dasylab._version import __version__
 from ctypes import *  # type: ignore
-from digilent_waveforms import Manager, Device, DeviceInfo
+from digilent_waveforms import Manager, Device, DeviceInfo, DeviceRegistry, get_registry
+from digilent_waveforms.src.DeviceRegistry import AcquisitionSubscription
+from digilent_waveforms.src.components.StreamPublisher import StreamPublisher
+from digilent_waveforms.src.components.SpectrumEstimator import SpectrumEstimator
+from digilent_waveforms.src.components.StreamStatistics import StatisticsResult, StreamStatistics
+from digilent_waveforms.src.components.Resampler import Resampler
+from digilent_waveforms.src.components.CapabilityCache import CapabilityCache
+from digilent_waveforms.src.components.DigitalInput import SAMPLE_DTYPES, extract_lines, get_sample_format
+from digilent_waveforms.src.components.utils.Trace import get_trace
+from digilent_waveforms.src.constants.error_codes import StreamError
+from digilent_waveforms.src.constants.trace_types import TraceEvent
 from digilent_waveforms_dasylab.components.Logger import Logger
 from digilent_waveforms_dasylab.components.DeviceManager import DeviceManager
+from digilent_waveforms_dasylab.components.OutputBlockWriter import OutputBlockWriter
 
 # Config logging level
 DEBUG = True
@@ -23,11 +36,83 @@ if DEBUG:
 
 module_name = "AI Rec"
 
+# Length of the published shared memory stream
+STREAM_SECONDS = 10
+
+# Number of segments (exponentially) averaged by the spectrum outputs
+SPECTRUM_AVERAGES = 10
+
+# DASYLab timebases the module can follow, and the default
+TIMEBASES = [0, 1, 2, 3, 4]
+DEFAULT_TIMEBASE = 2
+
+# Largest relative difference of the device's (coerced) sample rate from the timebase's rate output without resampling
+RESAMPLE_TOLERANCE = 1e-12
+
+# Digital line output sample rates, as multiples of the module's sample rate
+DIGITAL_RATE_MULTIPLES = [1, 2, 4, 8, 16, 32, 64, 128]
+
+# Output blocks emitted per channel in a single ProcessData call when a backlog has accumulated
+BLOCKS_PER_CALL_OPTIONS = [1, 2, 4, 8, 16, 32, 64]
+
+# Longest backlog of buffered, not yet output samples before the backlog policy applies
+BACKLOG_SECONDS_MAX = 10
+
 
 class SettingName(Enum):
     SelectedDevice = "Device"
+    Timebase = "Timebase"
     SampleRate = "Sample rate"
     Range = "Input range"
+    StayConnected = "Stay connected"
+    PublishStream = "Publish stream"
+    StatisticOutputs = "Statistic outputs"
+    SpectrumOutputs = "Spectrum outputs"
+    DigitalLines = "Digital lines"
+    DigitalRate = "Digital rate"
+    BlocksPerCall = "Blocks per call"
+    BacklogPolicy = "Backlog policy"
+
+
+class YesNo(Enum):
+    No = "No"
+    Yes = "Yes"
+
+
+class OutputGroup(Enum):
+    Data = "Data"
+    Statistic = "Statistic"
+    Spectrum = "Spectrum"
+    Digital = "Digital"  # One output per digital line, after the analog output groups
+
+
+class DigitalLines(Enum):
+    Off = "Off"
+    Lines4 = "DIO 0-3"
+    Lines8 = "DIO 0-7"
+    Lines16 = "DIO 0-15"
+    Lines32 = "DIO 0-31"
+
+    def get_lines(self) -> list[int]:
+        if self == DigitalLines.Off:
+            return []
+        return list(range(0, int(self.value.split("-")[1]) + 1))
+
+
+class BacklogPolicy(Enum):
+    DropOldest = "Drop oldest"
+    StopExperiment = "Stop experiment"
+
+
+class StatisticOutput(Enum):
+    Off = "Off"
+    Mean = "Mean"
+    RMS = "RMS"
+    Minimum = "Minimum"
+    Maximum = "Maximum"
+    PeakToPeak = "Peak-to-peak"
+    StdDev = "Standard deviation"
+
 
 class info(object):
     """
@@ -38,10 +123,34 @@ class info(object):
         self.selected_device_serial_number: str = ""
         # NOTE: Remove Sample Rate self.sample_rate: float = 1000
 
+        # DASYLab timebase setting the sample rate and block size
+        self.timebase: int = DEFAULT_TIMEBASE
+
         self.range_names: list[str] = []
         self.range_values: list[float] = []
         self.selected_range_index: int = 0
 
+        # Keep the device open and configured between Stop() and Start()
+        self.stay_connected: bool = False
+
+        # Publish the acquired samples to shared memory for external tools
+        self.publish_stream: bool = False
+
+        # Statistic of each output block, output on one extra low rate channel per analog input channel
+        self.statistic_output: str = StatisticOutput.Off.value
+
+        # Averaged power spectral density, output on one extra channel per analog input channel
+        self.spectrum_output: bool = False
+
+        # Digital input lines, output after the analog outputs (one channel per line) at a multiple of the sample rate
+        self.digital_lines: str = DigitalLines.Off.value
+        self.digital_rate_multiple: int = 1
+
+        # Most output blocks per channel emitted in one ProcessData call, and what to do with a backlog that reaches
+        # BACKLOG_SECONDS_MAX
+        self.max_blocks_per_call: int = 8
+        self.backlog_policy: str = BacklogPolicy.DropOldest.value
+
 
 class pvar(object):
     """
@@ -53,6 +162,7 @@ class pvar(object):
         self.m_outputs_done: list[int] = [0] * 16  # Initialize for up to 16 outputs
 
         self.wf_manager: Manager
+        self.registry: DeviceRegistry
 
         self.device_manager: DeviceManager
         self.selected_device_serial_number: str = ""
@@ -60,6 +170,13 @@ class pvar(object):
         self.devices_info: list[DeviceInfo] = []
 
         self.wf_device: Device = None
+        self.ai_subscription: AcquisitionSubscription = None
+        self.stream_publisher: StreamPublisher = None
+        self.statistics: StreamStatistics = None
+        self.spectrum: SpectrumEstimator = None
+        self.num_digital_lines: int = 0
+        self.digital_rate_max: float = 0  # In S/s
+        self.is_running: bool = False
         self.num_channels: int
         # NOTE: Remove Sample Rate self.sample_rate_min: float  # In S/s
         # NOTE: Remove Sample Rate self.sample_rate_max: float  # In S/s
@@ -68,6 +185,25 @@ class pvar(object):
         self.range_steps: float
 
         self.ai_data_buffer: list[list[float]]
+        self.ai_buffer_start_index: list[int] = []  # Absolute sample index of each channel's first buffered sample
+        self.resampler: Resampler = None  # Device to timebase rate, when the device coerced the sample rate
+        self.di_data_buffer: np.ndarray = None  # Packed digital samples
+        self.di_buffer_start_index: int = 0
+
+        # Backlog gauge, buffered samples not yet output in seconds
+        self.ai_backlog_seconds: float = 0
+        self.di_backlog_seconds: float = 0
+        self.backlog_peak_seconds: float = 0
+        self.backlog_overflow: bool = False  # Backlog reached BACKLOG_SECONDS_MAX
+
+        # Bulk copy of samples into the output blocks
+        self.output_writer: OutputBlockWriter = OutputBlockWriter()
+
+        # The library's trace of the latest per-poll events is dumped to a file on the first error of a run
+        self.trace_dumped: bool = False
+
+        # Record rates measured by the rate prober (digilent_waveforms/benchmarks/RateProber.py), by serial number
+        self.capability_cache: CapabilityCache = CapabilityCache()
         # self.logger: logging.Logger
 
         import math
@@ -84,9 +220,10 @@ class pscript(lys.mclass):
         # Print this package's version number
         print(f"Digilent WaveForms DASYLab Module version {__version__}")
 
-        # Initialize the Digilent WaveForms Manager
-        self.pvar.wf_manager = Manager()
-        self.pvar.device_manager = DeviceManager(self.pvar.wf_manager)
+        # Use the process wide device registry so multiple modules can share the Digilent WaveForms Manager and devices
+        self.pvar.registry = get_registry()
+        self.pvar.wf_manager = self.pvar.registry.manager
+        self.pvar.device_manager = DeviceManager(self.pvar.registry)
 
         # Print WaveForms python module and WaveForms SDK version information
         print(f"Digilent WaveForms Python Module version {self.pvar.wf_manager.module_version}")
@@ -105,7 +242,8 @@ class pscript(lys.mclass):
         Called when the module is removed from the worksheet.
         Perform clean up operations such as closing files or disconnecting hardware.
         """
-        pass
+        Logger.debug("Delete()")
+        self.release_device()
 
     def DlgInit(self, dlg):
         """
@@ -127,7 +265,7 @@ class pscript(lys.mclass):
 
         # If the worksheet is running, no need to enumerate devices, just display the active device params
         worksheet_is_running = False
-        if self.pvar.wf_device:
+        if self.pvar.is_running:
             Logger.debug("Worksheet is running - will not enumerate devices")
             worksheet_is_running = True
             selected_device_name = self.pvar.device_manager.get_device_name_by_sn(
@@ -149,7 +287,7 @@ class pscript(lys.mclass):
             # Update device parameter options
             if self.pvar.selected_device_serial_number:
                 try:
-                    Logger.debug(f"Using device ({self.pvar.selected_device_serial_number})")
+                    Logger.debug("Using device (%s)", self.pvar.selected_device_serial_number)
                     self.refresh_device_parameter_options()
                     selected_device_name = self.pvar.device_manager.get_device_name_by_sn(
                         self.pvar.selected_device_serial_number
@@ -170,6 +308,14 @@ class pscript(lys.mclass):
             "Choose Digilent WaveForms device.",
         )
        
+        # Timebase
+        dlg.AppendEnum(
+            SettingName.Timebase.value,
+            "\n".join([str(timebase) for timebase in TIMEBASES]),
+            str(self.info.timebase),
+            "DASYLab timebase setting the sample rate and block size of the outputs.",
+        )
+
         # Range
         # Logger.debug(f"self.info.range_names = {self.info.range_names}")
         dlg.AppendEnum(
@@ -179,6 +325,75 @@ class pscript(lys.mclass):
             "Analog input range in volts.",
         )
 
+        # Stay connected
+        dlg.AppendEnum(
+            SettingName.StayConnected.value,
+            "\n".join([option.value for option in YesNo]),
+            YesNo.Yes.value if self.info.stay_connected else YesNo.No.value,
+            "Keep the device open and configured when the worksheet stops for faster restarts.",
+        )
+
+        # Publish stream
+        dlg.AppendEnum(
+            SettingName.PublishStream.value,
+            "\n".join([option.value for option in YesNo]),
+            YesNo.Yes.value if self.info.publish_stream else YesNo.No.value,
+            "Publish the acquired samples to shared memory so other processes can read them.",
+        )
+
+        # Statistic outputs
+        dlg.AppendEnum(
+            SettingName.StatisticOutputs.value,
+            "\n".join([option.value for option in StatisticOutput]),
+            self.info.statistic_output,
+            "Output the selected statistic of every data block on one extra channel per input channel.",
+        )
+
+        # Spectrum outputs
+        dlg.AppendEnum(
+            SettingName.SpectrumOutputs.value,
+            "\n".join([option.value for option in YesNo]),
+            YesNo.Yes.value if self.info.spectrum_output else YesNo.No.value,
+            "Output the averaged power spectral density (V²/Hz) on one extra channel per input channel.",
+        )
+
+        # Digital lines
+        digital_line_options = [
+            option.value
+            for option in DigitalLines
+            if option.get_lines() == [] or option.get_lines()[-1] < self.pvar.num_digital_lines
+        ]
+        dlg.AppendEnum(
+            SettingName.DigitalLines.value,
+            "\n".join(digital_line_options),
+            self.info.digital_lines if self.info.digital_lines in digital_line_options else DigitalLines.Off.value,
+            "Output the selected digital input lines, one extra channel per line.",
+        )
+
+        # Digital rate
+        dlg.AppendEnum(
+            SettingName.DigitalRate.value,
+            "\n".join([f"{multiple} x" for multiple in self.get_digital_rate_multiples()]),
+            f"{self.get_digital_rate_multiple()} x",
+            "Sample rate of the digital line outputs as a multiple of the module's sample rate, up to the device's digital input clock.",
+        )
+
+        # Blocks per call
+        dlg.AppendEnum(
+            SettingName.BlocksPerCall.value,
+            "\n".join([str(option) for option in BLOCKS_PER_CALL_OPTIONS]),
+            str(self.info.max_blocks_per_call),
+            "Most blocks output per channel at a time when DASYLab falls behind the acquisition.",
+        )
+
+        # Backlog policy
+        dlg.AppendEnum(
+            SettingName.BacklogPolicy.value,
+            "\n".join([option.value for option in BacklogPolicy]),
+            self.info.backlog_policy,
+            f"Drop the oldest samples or stop the measurement once more than {BACKLOG_SECONDS_MAX} s of samples wait to be output.",
+        )
+
         # If worksheet is running disable all properties
         if worksheet_is_running:
             dlg.EnableAll(False)
@@ -195,26 +410,58 @@ class pscript(lys.mclass):
         # selected_device_name = dom.GetValue(SettingName.SelectedDevice.value)
         # self.info.selected_device_serial_number = self.pvar.device_manager.get_device_sn_by_name(selected_device_name)
         self.info.selected_device_serial_number = self.pvar.selected_device_serial_number
-        Logger.debug(f"Saved selected device serial number ({self.info.selected_device_serial_number})")
+        Logger.debug("Saved selected device serial number (%s)", self.info.selected_device_serial_number)
 
         # Save selected sample rate
         # NOTE: Remove Sample Rate self.info.sample_rate = float(dom.GetValue(SettingName.SampleRate.value))
 
+        # Save selected timebase
+        timebase = dom.GetValue(SettingName.Timebase.value)
+        if timebase:
+            self.info.timebase = int(timebase)
+
         # Save selected range
         selected_range_name = dom.GetValue(SettingName.Range.value)
         if selected_range_name:
             selected_range_index = self.info.range_names.index(selected_range_name)
             self.info.selected_range_index = selected_range_index
-            Logger.debug(f"Range [{selected_range_index}] selected = {selected_range_name}")
+            Logger.debug("Range [%s] selected = %s", selected_range_index, selected_range_name)
+
+        # Save stay connected, release a device held open by a previous run if it is no longer wanted
+        self.info.stay_connected = dom.GetValue(SettingName.StayConnected.value) == YesNo.Yes.value
+        if not self.info.stay_connected and not self.pvar.is_running:
+            self.release_device()
+
+        # Save publish stream
+        self.info.publish_stream = dom.GetValue(SettingName.PublishStream.value) == YesNo.Yes.value
+
+        # Save statistic outputs
+        self.info.statistic_output = dom.GetValue(SettingName.StatisticOutputs.value) or StatisticOutput.Off.value
+
+        # Save spectrum outputs
+        self.info.spectrum_output = dom.GetValue(SettingName.SpectrumOutputs.value) == YesNo.Yes.value
+
+        # Save digital lines and rate
+        self.info.digital_lines = dom.GetValue(SettingName.DigitalLines.value) or DigitalLines.Off.value
+        digital_rate = dom.GetValue(SettingName.DigitalRate.value)
+        if digital_rate:
+            self.info.digital_rate_multiple = int(digital_rate.split(" ")[0])
+
+        # Save backlog handling
+        blocks_per_call = dom.GetValue(SettingName.BlocksPerCall.value)
+        if blocks_per_call:
+            self.info.max_blocks_per_call = int(blocks_per_call)
+        self.info.backlog_policy = dom.GetValue(SettingName.BacklogPolicy.value) or BacklogPolicy.DropOldest.value
 
         dom.SelectChannelPage()
+        self.warn_record_rate(self.info.timebase, self.DlgNumChannels)
 
         # Configure Inputs and Outputs
         # (Covers moduls which have only outputs and at least one of them.
         # You need to adjust this section if you have chosen another relation
         # setting. You can find more information how to do this in the help)
-        Logger.debug(f"self.DlgNumChannels : {self.DlgNumChannels }")
-        self.SetConnectors(0, self.DlgNumChannels)
+        Logger.debug("self.DlgNumChannels : %s", self.DlgNumChannels)
+        self.SetConnectors(0, self.DlgNumChannels * len(self.get_output_groups()) + len(self.get_digital_lines()))
 
     def DlgCancel(self, dlg):
         # (oo)
@@ -223,7 +470,7 @@ class pscript(lys.mclass):
         pass
 
     def DlgEvent(self, dlg, label, value):
-        Logger.debug(f"DlgEvent({label}, {value})")
+        Logger.debug("DlgEvent(%s, %s)", label, value)
 
         if label == SettingName.SelectedDevice.value:
             self.selected_device_change_handler(dlg)
@@ -234,6 +481,9 @@ class pscript(lys.mclass):
         if label == SettingName.Range.value:
             self.update_range_options(dlg)
 
+        if label == SettingName.Timebase.value and value:
+            self.warn_record_rate(int(value), self.get_num_ai_channels())
+
     def Save(self):
         # (oo)
         # Prepare data before worksheet will be saved (if needed)
@@ -252,12 +502,20 @@ class pscript(lys.mclass):
         One time setup on start of measurement
         """
         Logger.debug("Start()")
+        start_time = time.perf_counter()
         try:
             if not self.pvar.selected_device_serial_number:
                 Logger.warn(f"Module {module_name} - No device selected.  Aborting.")
                 return False  # Return false to abort worksheet execution
 
-            device = self.pvar.device_manager.open_device_by_serial_number(self.pvar.selected_device_serial_number)
+            device = self.get_held_device()
+            if device:
+                Logger.debug("Reusing open device (%s)", device.serial_number)
+            else:
+                self.release_device()
+                device = self.pvar.device_manager.open_device_by_serial_number(
+                    self.pvar.selected_device_serial_number
+                )
 
             if not device:
                 Logger.warn(
@@ -266,25 +524,62 @@ class pscript(lys.mclass):
                 return False  # Return false to abort worksheet execution
 
             self.pvar.wf_device = device
+            self.pvar.wf_device.load_capabilities(self.pvar.capability_cache)
 
             # Configure and start analog input record
             range_index = self.info.selected_range_index
             range_value = self.info.range_values[range_index]
-            Logger.debug(f"self.NumOutChannel = {self.NumOutChannel }")
-            enabled_channels = list(range(0, self.NumOutChannel))
+            Logger.debug("self.NumOutChannel = %s", self.NumOutChannel)
+            enabled_channels = list(range(0, self.get_num_ai_channels()))
 
-            Logger.debug(f"Range index [{range_index}] = {range_value}")
-            Logger.debug(f"Enabled channels {enabled_channels}")
+            Logger.debug("Range index [%s] = %s", range_index, range_value)
+            Logger.debug("Enabled channels %s", enabled_channels)
 
-            sample_rate = 1 / Ly.GetTimeBaseSampleDistance(2)
+            sample_rate = 1 / self.get_sample_distance()
 
-            self.pvar.wf_device.AnalogInput.record(enabled_channels, sample_rate, range=range_value)
+            # Join the device's shared acquisition.  Only settings that differ from the device's configuration are
+            # pushed, an unchanged configuration is re-armed with a single configure call
+            acquisition = self.pvar.registry.get_acquisition(self.pvar.wf_device)
+            self.pvar.ai_subscription = acquisition.subscribe(enabled_channels, sample_rate, range=range_value)
+            self.pvar.ai_subscription.start()
+            self.start_resampler(len(enabled_channels), sample_rate)
+            self.pvar.is_running = True
+            Logger.debug("Module %s - Started in %.1f ms", module_name, (time.perf_counter() - start_time) * 1000)
 
             self.pvar.m_outputs_done = [0] * 16  # Initialize for up to 16 outputs
             self.pvar.ai_data_buffer = self.pvar.wf_device.AnalogInput._get_data_container(enabled_channels)
+            self.pvar.ai_buffer_start_index = [0] * len(enabled_channels)
+            self.pvar.ai_backlog_seconds = 0
+            self.pvar.di_backlog_seconds = 0
+            self.pvar.backlog_peak_seconds = 0
+            self.pvar.backlog_overflow = False
+            self.pvar.output_writer = OutputBlockWriter()
+            self.pvar.trace_dumped = False
+
+            if self.info.publish_stream:
+                self.open_stream_publisher(len(enabled_channels), sample_rate)
+
+            self.pvar.statistics = None
+            if self.is_statistic_output_enabled():
+                self.pvar.statistics = StreamStatistics(len(enabled_channels), window=self.get_block_size())
+
+            # Spectrum blocks hold the bins below Nyquist of segments of two data blocks
+            self.pvar.spectrum = None
+            if self.info.spectrum_output:
+                self.pvar.spectrum = SpectrumEstimator(
+                    len(enabled_channels),
+                    sample_rate,
+                    segment_length=2 * self.get_block_size(),
+                    averages=SPECTRUM_AVERAGES,
+                )
+
+            digital_lines = self.get_digital_lines()
+            if digital_lines:
+                self.start_digital_input(digital_lines, sample_rate * self.get_digital_rate_multiple())
 
         except DwfException as e:
             Logger.error(e)
+            self.dump_trace()
             return False  # Return false to abort worksheet execution
 
         return True
@@ -292,8 +587,28 @@ class pscript(lys.mclass):
     def Stop(self):
         # One time clean up at end of measurement
         try:
-            self.pvar.wf_manager.close_all_devices()
-            self.pvar.wf_device = None
+            self.pvar.is_running = False
+
+            if self.pvar.backlog_peak_seconds > self.get_block_size() * self.get_sample_distance():
+                Logger.warn(
+                    f"Module {module_name} - Output fell behind the acquisition by up to {self.pvar.backlog_peak_seconds:.3f} s"
+                )
+
+            # The shared acquisition stops when its last subscriber leaves
+            if self.pvar.ai_subscription:
+                self.pvar.ai_subscription.unsubscribe()
+                self.pvar.ai_subscription = None
+
+            if self.pvar.wf_device and self.pvar.di_data_buffer is not None:
+                self.pvar.wf_device.DigitalInput.stop()
+                self.pvar.di_data_buffer = None
+
+            if self.pvar.stream_publisher:
+                self.pvar.stream_publisher.close()
+                self.pvar.stream_publisher = None
+
+            if not self.info.stay_connected:
+                self.release_device()
         except Exception as e:
             Logger.error(e)
             Ly.StopExperiment()
@@ -305,9 +620,32 @@ class pscript(lys.mclass):
         # Comment out the lines below if you want to overwrite the settings
         # of the channel property dialog.
 
-        self.SetSampleDistance(channel, Ly.GetTimeBaseSampleDistance(2))
-        self.SetMaxBlockSize(channel, Ly.GetTimeBaseBlockSize(2))
-        self.SetChannelType(channel, Ly.CT_NORMAL)
+        num_ai_outputs = self.get_num_ai_channels() * len(self.get_output_groups())
+        output_group = (
+            OutputGroup.Digital
+            if channel >= num_ai_outputs
+            else self.get_output_groups()[channel // max(1, self.get_num_ai_channels())]
+        )
+        if output_group == OutputGroup.Digital:
+            # Digital lines at a multiple of the sample rate, blocks of the same duration as the data blocks
+            multiple = self.get_digital_rate_multiple()
+            self.SetSampleDistance(channel, self.get_sample_distance() / multiple)
+            self.SetMaxBlockSize(channel, self.get_block_size() * multiple)
+            self.SetChannelType(channel, Ly.CT_NORMAL)
+        elif output_group == OutputGroup.Statistic:
+            # One value per data block
+            self.SetSampleDistance(channel, self.get_sample_distance() * self.get_block_size())
+            self.SetMaxBlockSize(channel, 1)
+            self.SetChannelType(channel, Ly.CT_NORMAL)
+        elif output_group == OutputGroup.Spectrum:
+            # Frequency resolution of a two data block segment
+            self.SetSampleDistance(channel, 1 / (self.get_sample_distance() * 2 * self.get_block_size()))
+            self.SetMaxBlockSize(channel, self.get_block_size())
+            self.SetChannelType(channel, getattr(Ly, "CT_FFT", Ly.CT_NORMAL))
+        else:
+            self.SetSampleDistance(channel, self.get_sample_distance())
+            self.SetMaxBlockSize(channel, self.get_block_size())
+            self.SetChannelType(channel, Ly.CT_NORMAL)
         self.SetChannelFlags(channel, Ly.CF_NORMAL)
         return True
 
@@ -327,16 +665,35 @@ class pscript(lys.mclass):
         # Click on the help button to get more information.
 
         # Process the channels
-        samples_per_block = Ly.GetTimeBaseBlockSize(2)
-        deltaT = Ly.GetTimeBaseSampleDistance(2)
-        block_length_sec = samples_per_block * deltaT
+        samples_per_block = self.get_block_size()
+        deltaT = self.get_sample_distance()
 
         # Read data and append to software sample buffer
-        enabled_channels = list(range(0, self.NumOutChannel))
+        enabled_channels = list(range(0, self.get_num_ai_channels()))
         try:
-            ai_read_data, lost_count, corrupt_count = self.pvar.wf_device.AnalogInput.read_available_samples(
-                enabled_channels
-            )
+            ai_block = self.pvar.ai_subscription.read_block()
+            if self.pvar.resampler:
+                ai_block = self.pvar.resampler.process_block(ai_block)
+            ai_read_data = ai_block.data
+
+            if self.pvar.stream_publisher and ai_block.num_samples > 0:
+                self.pvar.stream_publisher.publish(ai_block)
+
+            if ai_block.lost > 0:
+                # Buffered samples are no longer contiguous with the new data, restart the output blocks after the gap
+                Logger.warn(
+                    f"Module {module_name} - {ai_block.lost} samples lost, output blocks realigned to sample {ai_block.first_sample_index}"
+                )
+                self.pvar.ai_data_buffer = self.pvar.wf_device.AnalogInput._get_data_container(enabled_channels)
+                if self.pvar.statistics:
+                    self.pvar.statistics.reset()
+
+            if self.pvar.statistics:
+                for statistics in self.pvar.statistics.update(ai_block):
+                    self.output_statistic(statistics, len(enabled_channels), samples_per_block * deltaT)
+
+            if self.pvar.spectrum and self.pvar.spectrum.update(ai_block) > 0:
+                self.output_spectrum(len(enabled_channels), samples_per_block, deltaT)
 
             # Logger.debug(f"enabled_channels : {enabled_channels}")
             # Logger.debug(f"ai_read_data : [{len(ai_read_data[0])}][{len(ai_read_data[1])}]")
@@ -344,32 +701,266 @@ class pscript(lys.mclass):
             # self.write_csv(self.pvar.ai_data_buffer)
 
             for channel_index in enabled_channels:
-                next_time = self.pvar.m_outputs_done[channel_index] * block_length_sec
+                # An empty buffer starts at the block's first sample (an acquisition shared with other modules may
+                # already be running when this module starts)
+                if not self.pvar.ai_data_buffer[channel_index]:
+                    self.pvar.ai_buffer_start_index[channel_index] = ai_block.first_sample_index
                 self.pvar.ai_data_buffer[channel_index] += ai_read_data[channel_index]
 
-                # Blocks for all channels should populate at same rate since sample rate is not per channel
-                if len(self.pvar.ai_data_buffer[channel_index]) >= samples_per_block:
+                # Output every complete block in order, up to the per call limit.  Blocks for all channels populate at
+                # the same rate since the sample rate is not per channel
+                channel_buffer = self.pvar.ai_data_buffer[channel_index]
+                num_blocks = min(len(channel_buffer) // samples_per_block, self.info.max_blocks_per_call)
+                for block_index in range(num_blocks):
+                    offset = block_index * samples_per_block
                     OutBuff = self.GetOutputBlock(channel_index)
-                    for sample_index in range(samples_per_block):
-                        OutBuff[sample_index] = self.pvar.ai_data_buffer[channel_index][sample_index]
-                    OutBuff.StartTime = next_time
+                    self.pvar.output_writer.write(OutBuff, channel_buffer[offset : offset + samples_per_block])
+                    # Start time from the absolute sample index so lost samples don't shift the time axis
+                    OutBuff.StartTime = (self.pvar.ai_buffer_start_index[channel_index] + offset) * deltaT
                     OutBuff.SampleDistance = deltaT
                     OutBuff.BlockSize = samples_per_block
                     OutBuff.Release()
-
-                    # Increment block output count and removed output data from sample buffer
                     self.pvar.m_outputs_done[channel_index] += 1
-                    self.pvar.ai_data_buffer[channel_index] = self.pvar.ai_data_buffer[channel_index][
-                        samples_per_block:
-                    ]
 
-                    # Logger.debug(f"Blocks output: {self.pvar.m_outputs_done}")
+                # Drop the output samples, and the oldest blocks of a backlog over the limit, from the sample buffer
+                num_output = num_blocks * samples_per_block
+                num_output += self.get_backlog_overflow(len(channel_buffer) - num_output, samples_per_block, deltaT)
+                self.pvar.ai_buffer_start_index[channel_index] += num_output
+                self.pvar.ai_data_buffer[channel_index] = channel_buffer[num_output:]
+
+                # Logger.debug(f"Blocks output: {self.pvar.m_outputs_done}")
+
+            if enabled_channels:
+                self.update_backlog(len(self.pvar.ai_data_buffer[0]) * deltaT, None)
+                get_trace().record(TraceEvent.OutputBlocks, num_blocks, len(self.pvar.ai_data_buffer[0]), 0)
+
+            if self.pvar.di_data_buffer is not None:
+                self.process_digital_data(len(enabled_channels) * len(self.get_output_groups()))
 
         except Exception as e:
             Logger.error(e)
+            self.dump_trace()
 
         return True
 
+    def start_resampler(self, num_channels: int, sample_rate: float) -> None:
+        """
+        Resample the analog input to the timebase's sample rate when the device coerced it, so the output time does
+        not drift from DASYLab's
+        """
+        self.pvar.resampler = None
+        actual_sample_rate = self.pvar.wf_device.AnalogInput.get_sample_rate()
+        if abs(actual_sample_rate - sample_rate) <= sample_rate * RESAMPLE_TOLERANCE:
+            return
+
+        self.pvar.resampler = Resampler(num_channels, actual_sample_rate, sample_rate)
+        print(
+            f"Module {module_name} - Device sample rate {actual_sample_rate} S/s differs from the timebase's {sample_rate} S/s by {self.pvar.resampler.get_rate_error() * 1e6:.3f} ppm, resampling (residual error {self.pvar.resampler.get_residual_error() * 1e6:.1e} ppm)"
+        )
+
+    def start_digital_input(self, lines: list[int], sample_rate: float) -> None:
+        """
+        Start recording the digital input lines
+        """
+        digital_input = self.pvar.wf_device.DigitalInput
+        digital_input.check_lines(lines)
+        digital_input.record(sample_rate, get_sample_format(lines))
+        if digital_input.actual_sample_rate != sample_rate:
+            Logger.warn(
+                f"Module {module_name} - Digital sample rate coerced from {sample_rate} to {digital_input.actual_sample_rate} S/s"
+            )
+        self.pvar.di_data_buffer = np.empty(0, dtype=SAMPLE_DTYPES[digital_input.sample_format])
+        self.pvar.di_buffer_start_index = 0
+
+    def process_digital_data(self, first_output: int) -> None:
+        """
+        Read the digital input and output a block on each digital line output once a full block is buffered
+        """
+        multiple = self.get_digital_rate_multiple()
+        samples_per_block = self.get_block_size() * multiple
+        deltaT = self.get_sample_distance() / multiple
+        lines = self.get_digital_lines()
+
+        di_block = self.pvar.wf_device.DigitalInput.read_block()
+        if di_block.lost > 0:
+            Logger.warn(
+                f"Module {module_name} - {di_block.lost} digital samples lost, output blocks realigned to sample {di_block.first_sample_index}"
+            )
+            self.pvar.di_data_buffer = self.pvar.di_data_buffer[0:0]
+        if len(self.pvar.di_data_buffer) == 0:
+            self.pvar.di_buffer_start_index = di_block.first_sample_index
+        self.pvar.di_data_buffer = np.concatenate((self.pvar.di_data_buffer, di_block.data))
+
+        # Output every complete block in order, up to the per call limit
+        num_blocks = min(len(self.pvar.di_data_buffer) // samples_per_block, self.info.max_blocks_per_call)
+        num_output = num_blocks * samples_per_block
+        if num_blocks > 0:
+            levels = extract_lines(self.pvar.di_data_buffer[0:num_output], lines)
+            for line_index in range(0, len(lines)):
+                line_levels = levels[line_index]
+                for block_index in range(num_blocks):
+                    offset = block_index * samples_per_block
+                    OutBuff = self.GetOutputBlock(first_output + line_index)
+                    self.pvar.output_writer.write(OutBuff, line_levels[offset : offset + samples_per_block])
+                    OutBuff.StartTime = (self.pvar.di_buffer_start_index + offset) * deltaT
+                    OutBuff.SampleDistance = deltaT
+                    OutBuff.BlockSize = samples_per_block
+                    OutBuff.Release()
+
+        num_output += self.get_backlog_overflow(len(self.pvar.di_data_buffer) - num_output, samples_per_block, deltaT)
+        self.pvar.di_buffer_start_index += num_output
+        self.pvar.di_data_buffer = self.pvar.di_data_buffer[num_output:]
+        self.update_backlog(None, len(self.pvar.di_data_buffer) * deltaT)
+        get_trace().record(TraceEvent.OutputBlocks, num_blocks, len(self.pvar.di_data_buffer), first_output)
+
+    def get_backlog_overflow(self, backlog: int, samples_per_block: int, deltaT: float) -> int:
+        """
+        Apply the backlog policy to a backlog of samples not yet output, returns the number of oldest samples to drop
+        (whole blocks, so the following blocks keep their start times)
+        """
+        backlog_max = max(self.info.max_blocks_per_call, int(BACKLOG_SECONDS_MAX / (samples_per_block * deltaT)))
+        overflow = backlog - backlog_max * samples_per_block
+        if overflow <= 0:
+            return 0
+
+        stop_experiment = self.info.backlog_policy == BacklogPolicy.StopExperiment.value
+        num_dropped = 0 if stop_experiment else -(-overflow // samples_per_block) * samples_per_block
+        get_trace().record(TraceEvent.BacklogOverflow, num_dropped, backlog)
+        if not self.pvar.backlog_overflow:
+            # Report the first overflow only, it repeats on every call while DASYLab is not keeping up
+            self.pvar.backlog_overflow = True
+            action = "stopping" if stop_experiment else "dropping the oldest samples"
+            Logger.error(
+                f"Module {module_name} - Output backlog over {BACKLOG_SECONDS_MAX} s, DASYLab is not keeping up with the acquisition, {action}."
+            )
+            if stop_experiment:
+                Ly.StopExperiment()
+
+        return num_dropped
+
+    def dump_trace(self) -> None:
+        """
+        Write the trace of the latest acquisition events to a file, once per run
+        """
+        if self.pvar.trace_dumped:
+            return
+        self.pvar.trace_dumped = True
+        try:
+            trace = get_trace()
+            file_path = trace.dump()
+            Logger.error(
+                "Module %s - Trace of the last %d events written to %s", module_name, trace.get_num_records(), file_path
+            )
+        except OSError as e:
+            Logger.error(e)
+
+    def update_backlog(self, ai_backlog_seconds: Optional[float], di_backlog_seconds: Optional[float]) -> None:
+        """
+        Update the backlog gauge, pass None for a path that was not read
+        """
+        if ai_backlog_seconds is not None:
+            self.pvar.ai_backlog_seconds = ai_backlog_seconds
+        if di_backlog_seconds is not None:
+            self.pvar.di_backlog_seconds = di_backlog_seconds
+        self.pvar.backlog_peak_seconds = max(self.pvar.backlog_peak_seconds, self.get_backlog_seconds())
+
+    def get_backlog_seconds(self) -> float:
+        """
+        Duration of the samples buffered but not yet output, the longer of the analog and digital paths
+        """
+        return max(self.pvar.ai_backlog_seconds, self.pvar.di_backlog_seconds)
+
+    def is_statistic_output_enabled(self) -> bool:
+        return self.info.statistic_output != StatisticOutput.Off.value
+
+    def get_output_groups(self) -> list[OutputGroup]:
+        """
+        Output groups in connector order, each group has one output per analog input channel
+        """
+        output_groups = [OutputGroup.Data]
+        if self.is_statistic_output_enabled():
+            output_groups.append(OutputGroup.Statistic)
+        if self.info.spectrum_output:
+            output_groups.append(OutputGroup.Spectrum)
+        return output_groups
+
+    def get_sample_distance(self) -> float:
+        """
+        Output sample distance of the selected timebase in seconds
+        """
+        return Ly.GetTimeBaseSampleDistance(self.info.timebase)
+
+    def get_block_size(self) -> int:
+        """
+        Output block size of the selected timebase in samples
+        """
+        return Ly.GetTimeBaseBlockSize(self.info.timebase)
+
+    def get_num_ai_channels(self) -> int:
+        return (self.NumOutChannel - len(self.get_digital_lines())) // len(self.get_output_groups())
+
+    def get_digital_lines(self) -> list[int]:
+        return DigitalLines(self.info.digital_lines).get_lines()
+
+    def get_digital_rate_multiples(self) -> list[int]:
+        """
+        Digital rate multiples the selected device supports at the module's sample rate
+        """
+        sample_rate = 1 / self.get_sample_distance()
+        multiples = [
+            multiple for multiple in DIGITAL_RATE_MULTIPLES if sample_rate * multiple <= self.pvar.digital_rate_max
+        ]
+        return multiples if multiples else DIGITAL_RATE_MULTIPLES[0:1]
+
+    def get_digital_rate_multiple(self) -> int:
+        """
+        Selected digital rate multiple, reduced if the module's sample rate has been raised since it was selected
+        """
+        multiples = self.get_digital_rate_multiples()
+        return max([multiple for multiple in multiples if multiple <= self.info.digital_rate_multiple] or multiples[0:1])
+
+    def output_statistic(self, statistics: StatisticsResult, num_ai_channels: int, block_duration: float) -> None:
+        """
+        Output one block's statistic on each statistic output
+        """
+        statistic = StatisticOutput(self.info.statistic_output)
+        if statistic == StatisticOutput.Mean:
+            values = statistics.mean
+        elif statistic == StatisticOutput.RMS:
+            values = statistics.get_rms()
+        elif statistic == StatisticOutput.Minimum:
+            values = statistics.minimum
+        elif statistic == StatisticOutput.Maximum:
+            values = statistics.maximum
+        elif statistic == StatisticOutput.PeakToPeak:
+            values = statistics.get_peak_to_peak()
+        else:
+            values = statistics.get_std()
+
+        deltaT = self.get_sample_distance()
+        first_output = self.get_output_groups().index(OutputGroup.Statistic) * num_ai_channels
+        for channel_index in range(0, num_ai_channels):
+            OutBuff = self.GetOutputBlock(first_output + channel_index)
+            OutBuff[0] = float(values[channel_index])
+            OutBuff.StartTime = statistics.first_sample_index * deltaT
+            OutBuff.SampleDistance = block_duration
+            OutBuff.BlockSize = 1
+            OutBuff.Release()
+
+    def output_spectrum(self, num_ai_channels: int, samples_per_block: int, deltaT: float) -> None:
+        """
+        Output the current averaged spectrum on each spectrum output
+        """
+        _, spectrum = self.pvar.spectrum.get_spectrum()
+        first_output = self.get_output_groups().index(OutputGroup.Spectrum) * num_ai_channels
+        for channel_index in range(0, num_ai_channels):
+            OutBuff = self.GetOutputBlock(first_output + channel_index)
+            self.pvar.output_writer.write(OutBuff, spectrum[channel_index][0:samples_per_block])
+            OutBuff.StartTime = self.pvar.spectrum.end_sample_index * deltaT
+            OutBuff.SampleDistance = self.pvar.spectrum.get_resolution()
+            OutBuff.BlockSize = samples_per_block
+            OutBuff.Release()
+
     def selected_device_change_handler(self, dlg) -> None:
         self.pvar.device_manager.enumerate_devices()
 
@@ -399,6 +990,18 @@ class pscript(lys.mclass):
     #             f"Analog input sample rate reduced from {selected_sample_rate} to max rate of {self.pvar.sample_rate_max} S/s"
     #         )
 
+    def warn_record_rate(self, timebase: int, num_channels: int) -> None:
+        """
+        Warn when the timebase's sample rate exceeds the record rate measured without loss on the selected device with
+        num_channels channels
+        """
+        max_rate = self.pvar.capability_cache.get_max_record_rate(self.pvar.selected_device_serial_number, num_channels)
+        sample_rate = 1 / Ly.GetTimeBaseSampleDistance(timebase)
+        if max_rate is not None and sample_rate > max_rate:
+            Logger.warn(
+                f"Module {module_name} - The sample rate of timebase {timebase} ({sample_rate} S/s) exceeds the measured lossless record rate ({max_rate} S/s) of device ({self.pvar.selected_device_serial_number}) with {num_channels} channel(s).  Samples will be lost."
+            )
+
     def update_range_options(self, dlg) -> None:
         selected_range = dlg.GetProperty(SettingName.Range.value)
 
@@ -440,15 +1043,58 @@ class pscript(lys.mclass):
                 f"Module {module_name} - The selected device with serial number ({self.pvar.selected_device_serial_number}) is not available."
             )
 
-        Logger.debug(f"Using device with serial number ({self.pvar.selected_device_serial_number})")
+        Logger.debug("Using device with serial number (%s)", self.pvar.selected_device_serial_number)
 
     def close_selected_device(self) -> None:
-        self.pvar.wf_manager.close_device(self.pvar.wf_device)
+        self.release_device()
+
+    def get_held_device(self) -> Optional[Device]:
+        """
+        Return the device kept open by a previous run if it is still the selected device
+        """
+        device = self.pvar.wf_device
+        if device and self.info.stay_connected and device.serial_number == self.pvar.selected_device_serial_number:
+            return device
+        return None
+
+    def release_device(self) -> None:
+        """
+        Release this module's reference to its device, the device is closed once no module uses it
+        """
+        try:
+            if self.pvar.wf_device:
+                self.pvar.device_manager.release_device(self.pvar.wf_device)
+        finally:
+            self.pvar.wf_device = None
+
+    def open_stream_publisher(self, num_channels: int, sample_rate: float) -> None:
+        """
+        Create the shared memory stream, named after the device serial number
+        """
+        base_name = f"digilent_{self.pvar.selected_device_serial_number}"
+        capacity = int(sample_rate * STREAM_SECONDS)
+        for attempt in range(1, 16):
+            name = base_name if attempt == 1 else f"{base_name}_{attempt}"
+            try:
+                self.pvar.stream_publisher = StreamPublisher(name, num_channels, capacity, sample_rate)
+                print(f"Module {module_name} - Publishing stream ({name})")
+                return
+            except DwfException as e:
+                if e.code != StreamError.NAME_IN_USE.value:
+                    raise e
+        Logger.warn(f"Module {module_name} - No free stream name for ({base_name}), stream not published")
 
     def refresh_device_parameter_options(self) -> None:
+        held_device = self.get_held_device()
+        device = held_device
         try:
             Logger.debug("refresh_device_parameter_options()")
-            device = self.pvar.device_manager.open_device_by_serial_number(self.pvar.selected_device_serial_number)
+            if not device:
+                # A device held for a previous selection is no longer needed
+                self.release_device()
+                device = self.pvar.device_manager.open_device_by_serial_number(
+                    self.pvar.selected_device_serial_number
+                )
 
             if not device:
                 error = self.pvar.wf_manager.get_error()
@@ -465,6 +1111,12 @@ class pscript(lys.mclass):
 
             self.info.range_values = device.AnalogInput.get_range_steps()
 
+            # Pick up record rates probed since the cache was loaded
+            self.pvar.capability_cache.load()
+
+            self.pvar.num_digital_lines = device.di_count
+            self.pvar.digital_rate_max = device.DigitalInput.get_sample_rate_max()
+
             range_names: list[str] = []
             for p2p_range in self.info.range_values:
                 full_range = ("%f" % (p2p_range / 2)).rstrip("0").rstrip(".")
@@ -478,5 +1130,5 @@ class pscript(lys.mclass):
             Logger.error(e)
 
         finally:
-            self.pvar.wf_manager.close_all_devices()
-            self.pvar.wf_device = None
+            if not held_device and device:
+                self.pvar.device_manager.release_device(device)